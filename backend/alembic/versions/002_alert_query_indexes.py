@@ -0,0 +1,47 @@
+# ===========================
+# backend/alembic/versions/002_alert_query_indexes.py
+# ===========================
+"""Add composite indexes for alert queries
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    # alerts/alert_history não são criadas pela 001; em banco novo a 003 as
+    # cria já com estes índices
+    if _table_exists('alerts'):
+        # Alertas ativos: company_id + faixa de triggered_at
+        op.create_index('ix_alerts_company_triggered', 'alerts', ['company_id', 'triggered_at'], unique=False)
+        op.create_index(
+            'ix_alerts_company_unresolved',
+            'alerts',
+            ['company_id', 'triggered_at'],
+            unique=False,
+            postgresql_where=sa.text('resolved_at IS NULL')
+        )
+    
+    if _table_exists('alert_history'):
+        # Histórico: company_id + faixa de created_at
+        op.create_index('ix_alert_history_company_created', 'alert_history', ['company_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_alert_history_company_created')
+    op.execute('DROP INDEX IF EXISTS ix_alerts_company_unresolved')
+    op.execute('DROP INDEX IF EXISTS ix_alerts_company_triggered')
@@ -0,0 +1,271 @@
+# ===========================
+# backend/alembic/versions/003_partition_alert_tables.py
+# ===========================
+"""Partition alerts and alert_history by month
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# Tabela -> (coluna de particionamento, índice company_id + coluna,
+# coluna usada quando a de particionamento está nula)
+PARTITIONED_TABLES = {
+    'alerts': ('triggered_at', 'ix_alerts_company_triggered', 'created_at'),
+    'alert_history': ('created_at', 'ix_alert_history_company_created', 'event_timestamp'),
+}
+
+# Meses futuros criados antecipadamente
+MONTHS_AHEAD = 3
+
+
+# Cria (se necessário) as partições mensais de uma tabela entre o mês de
+# start_month e months_ahead meses após o mês atual. Chamada também pela
+# task periódica ensure_alert_partitions.
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(
+    parent_table text,
+    months_ahead integer,
+    start_month date DEFAULT date_trunc('month', now())::date
+) RETURNS void AS $$
+DECLARE
+    month_start date := date_trunc('month', start_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('%s_%s', parent_table, to_char(month_start, 'YYYY_MM'));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, parent_table, month_start, (month_start + interval '1 month')::date
+        );
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _table_exists(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def _create_alerts() -> None:
+    # Mesmas colunas de app.models.alert.Alert; referências a usuários e regras
+    # são validadas pela aplicação (a 001 não cria alert_rules)
+    op.create_table(
+        'alerts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.Column('rule_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('triggered_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('triggered_by', sa.String(length=50), nullable=False),
+        sa.Column('trigger_value', sa.Numeric(10, 2), nullable=True),
+        sa.Column('trigger_data', sa.JSON(), nullable=True),
+        sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('acknowledged_by_id', sa.Integer(), nullable=True),
+        sa.Column('acknowledgment_note', sa.Text(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('resolved_by_id', sa.Integer(), nullable=True),
+        sa.Column('resolution_note', sa.Text(), nullable=True),
+        sa.Column('auto_resolved', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('notified_users', sa.JSON(), nullable=False),
+        sa.Column('notification_sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('notification_channels_used', sa.JSON(), nullable=False),
+        sa.Column('source_type', sa.String(length=50), nullable=True),
+        sa.Column('source_id', sa.Integer(), nullable=True),
+        sa.Column('impact_level', sa.String(length=20), nullable=True),
+        sa.Column('affected_products', sa.JSON(), nullable=True),
+        sa.Column('estimated_impact', sa.JSON(), nullable=True),
+        sa.Column('actions_taken', sa.JSON(), nullable=True),
+        sa.Column('recommendations', sa.JSON(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('metadata', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'triggered_at'),
+        postgresql_partition_by='RANGE (triggered_at)'
+    )
+
+
+def _create_alert_history() -> None:
+    op.create_table(
+        'alert_history',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.Column('alert_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('event_timestamp', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('old_status', sa.String(length=20), nullable=True),
+        sa.Column('new_status', sa.String(length=20), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('event_data', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+    )
+
+
+CREATE_TABLES = {
+    'alerts': _create_alerts,
+    'alert_history': _create_alert_history,
+}
+
+# Demais índices dos models; LIKE não copia índices da tabela antiga
+MODEL_INDEXES = {
+    'alerts': {
+        'idx_alert_company_status': ['company_id', 'status'],
+        'idx_alert_company_type': ['company_id', 'type'],
+        'idx_alert_expires_at': ['expires_at'],
+        'idx_alert_rule': ['rule_id'],
+    },
+    'alert_history': {
+        'idx_alert_history_alert': ['alert_id'],
+        'idx_alert_history_timestamp': ['event_timestamp'],
+    },
+}
+
+
+def _create_partitions(table: str, start_month: str) -> None:
+    """Partições mensais a partir de start_month e a DEFAULT para datas fora delas"""
+    op.execute(f"SELECT ensure_monthly_partitions('{table}', {MONTHS_AHEAD}, {start_month})")
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+
+def _partition_table(table: str, column: str, fallback: str) -> None:
+    legacy = f'{table}_legacy'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+
+    # A coluna de partição entra na chave primária e fica NOT NULL
+    op.execute(
+        f'UPDATE {legacy} SET {column} = COALESCE({fallback}, now()) WHERE {column} IS NULL'
+    )
+
+    # Mesma estrutura; a chave primária precisa incluir a coluna de partição
+    op.execute(
+        f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({column})'
+    )
+    op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, {column})')
+
+    # A sequência do id passa a pertencer à nova tabela antes do DROP da antiga
+    op.execute(
+        f"DO $$ DECLARE seq text := pg_get_serial_sequence('{legacy}', 'id'); BEGIN "
+        f"IF seq IS NOT NULL THEN EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', seq); "
+        f"END IF; END $$"
+    )
+
+    # Partições desde o registro mais antigo
+    _create_partitions(table, f"COALESCE((SELECT min({column}) FROM {legacy})::date, now()::date)")
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+
+    # Sem CASCADE: dependências inesperadas devem falhar a migração
+    op.execute(f'DROP TABLE {legacy}')
+
+
+def _unpartition_table(table: str, column: str, index_name: str) -> None:
+    legacy = f'{table}_partitioned'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    op.execute(f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+    op.execute(
+        f"DO $$ DECLARE seq text := pg_get_serial_sequence('{legacy}', 'id'); BEGIN "
+        f"IF seq IS NOT NULL THEN EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', seq); "
+        f"END IF; END $$"
+    )
+    op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    op.execute(f'DROP TABLE {legacy}')
+
+    op.create_index(index_name, table, ['company_id', column], unique=False)
+
+
+def upgrade() -> None:
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+
+    # Índices da 002 (se criados) são recriados no pai particionado
+    op.execute('DROP INDEX IF EXISTS ix_alerts_company_unresolved')
+    for table, (column, index_name, fallback) in PARTITIONED_TABLES.items():
+        op.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+    # FKs para tabelas particionadas exigem a chave completa (id, triggered_at);
+    # alert_history.alert_id passa a ser validado pela aplicação
+    if _table_exists('alert_history') and _table_exists('alerts'):
+        op.execute(
+            "DO $$ DECLARE fk record; BEGIN "
+            "FOR fk IN SELECT conname FROM pg_constraint "
+            "WHERE conrelid = 'alert_history'::regclass AND confrelid = 'alerts'::regclass "
+            "AND contype = 'f' LOOP "
+            "EXECUTE format('ALTER TABLE alert_history DROP CONSTRAINT %I', fk.conname); "
+            "END LOOP; END $$"
+        )
+
+    for table, (column, index_name, fallback) in PARTITIONED_TABLES.items():
+        if _table_exists(table):
+            _partition_table(table, column, fallback)
+        else:
+            # Banco novo: a 001 não cria as tabelas de alertas
+            CREATE_TABLES[table]()
+            _create_partitions(table, 'now()::date')
+
+        # Índices no pai são propagados para cada partição
+        op.create_index(index_name, table, ['company_id', column], unique=False)
+        for model_index, columns in MODEL_INDEXES[table].items():
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS {model_index} ON {table} ({", ".join(columns)})'
+            )
+
+    op.create_index(
+        'ix_alerts_company_unresolved',
+        'alerts',
+        ['company_id', 'triggered_at'],
+        unique=False,
+        postgresql_where=sa.text('resolved_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_company_unresolved', table_name='alerts')
+
+    for table, (column, index_name, fallback) in PARTITIONED_TABLES.items():
+        op.drop_index(index_name, table_name=table)
+        _unpartition_table(table, column, index_name)
+
+    op.execute(
+        'ALTER TABLE alert_history ADD CONSTRAINT alert_history_alert_id_fkey '
+        'FOREIGN KEY (alert_id) REFERENCES alerts (id)'
+    )
+    op.create_index(
+        'ix_alerts_company_unresolved',
+        'alerts',
+        ['company_id', 'triggered_at'],
+        unique=False,
+        postgresql_where=sa.text('resolved_at IS NULL')
+    )
+
+    op.execute('DROP FUNCTION IF EXISTS ensure_monthly_partitions(text, integer, date)')
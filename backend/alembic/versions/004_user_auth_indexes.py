@@ -0,0 +1,52 @@
+# ===========================
+# backend/alembic/versions/004_user_auth_indexes.py
+# ===========================
+"""Add lookup indexes for user authentication queries
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Colunas de token buscadas por igualdade nos fluxos de autenticação
+TOKEN_COLUMNS = {
+    'refresh_token': 'VARCHAR(500)',
+    'reset_password_token': 'VARCHAR(255)',
+    'email_verification_token': 'VARCHAR(255)',
+}
+
+
+def upgrade() -> None:
+    # Colunas do model User ausentes na migração inicial
+    for column, column_type in TOKEN_COLUMNS.items():
+        op.execute(f'ALTER TABLE users ADD COLUMN IF NOT EXISTS {column} {column_type}')
+    op.execute('ALTER TABLE users ADD COLUMN IF NOT EXISTS reset_password_expires TIMESTAMP WITH TIME ZONE')
+    
+    # Emails armazenados já normalizados
+    op.execute('UPDATE users SET email = lower(email) WHERE email <> lower(email)')
+    op.create_index('ix_user_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    
+    # Índices parciais: a maioria das linhas tem token NULL
+    for column in TOKEN_COLUMNS:
+        op.create_index(
+            f'ix_user_{column}',
+            'users',
+            [column],
+            unique=False,
+            postgresql_where=sa.text(f'{column} IS NOT NULL')
+        )
+
+
+def downgrade() -> None:
+    for column in TOKEN_COLUMNS:
+        op.drop_index(f'ix_user_{column}', table_name='users')
+    op.drop_index('ix_user_email_lower', table_name='users')
@@ -0,0 +1,49 @@
+# ===========================
+# backend/alembic/versions/005_refresh_tokens_table.py
+# ===========================
+"""Store opaque refresh tokens as hashes in refresh_tokens
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Uma linha por sessão; apenas o hash do token é armazenado
+    op.create_table('refresh_tokens',
+        sa.Column('token_hash', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False)
+    
+    # Refresh tokens JWT armazenados em users deixam de ser aceitos
+    op.drop_index('ix_user_refresh_token', table_name='users')
+    op.drop_column('users', 'refresh_token')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('refresh_token', sa.String(length=500), nullable=True))
+    op.create_index(
+        'ix_user_refresh_token',
+        'users',
+        ['refresh_token'],
+        unique=False,
+        postgresql_where=sa.text('refresh_token IS NOT NULL')
+    )
+    
+    op.drop_index(op.f('ix_refresh_tokens_user_id'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -0,0 +1,37 @@
+# ===========================
+# backend/alembic/versions/006_drop_refresh_tokens_table.py
+# ===========================
+"""Move refresh tokens to Redis and drop refresh_tokens
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Refresh tokens passam a ser armazenados no Redis (rt:{hash} -> user_id);
+    # sessões existentes precisam de novo login
+    op.drop_index(op.f('ix_refresh_tokens_user_id'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
+
+
+def downgrade() -> None:
+    op.create_table('refresh_tokens',
+        sa.Column('token_hash', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False)
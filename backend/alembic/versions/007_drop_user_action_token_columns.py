@@ -0,0 +1,41 @@
+# ===========================
+# backend/alembic/versions/007_drop_user_action_token_columns.py
+# ===========================
+"""Drop email verification and password reset token columns
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# Tokens de verificação e reset passam a ser assinados (sem estado no banco)
+TOKEN_COLUMNS = ('reset_password_token', 'email_verification_token')
+
+
+def upgrade() -> None:
+    for column in TOKEN_COLUMNS:
+        op.drop_index(f'ix_user_{column}', table_name='users')
+        op.drop_column('users', column)
+    op.drop_column('users', 'reset_password_expires')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('reset_password_expires', sa.DateTime(timezone=True), nullable=True))
+    for column in TOKEN_COLUMNS:
+        op.add_column('users', sa.Column(column, sa.String(length=255), nullable=True))
+        op.create_index(
+            f'ix_user_{column}',
+            'users',
+            [column],
+            unique=False,
+            postgresql_where=sa.text(f'{column} IS NOT NULL')
+        )
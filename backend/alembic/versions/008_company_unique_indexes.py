@@ -0,0 +1,47 @@
+# ===========================
+# backend/alembic/versions/008_company_unique_indexes.py
+# ===========================
+"""Enforce company slug and CNPJ uniqueness with partial unique indexes
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Colunas do model Company ausentes na migração inicial
+    op.execute('ALTER TABLE companies ADD COLUMN IF NOT EXISTS cnpj VARCHAR(20)')
+    op.execute('ALTER TABLE companies ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITH TIME ZONE')
+    
+    # Slug de empresa excluída (soft delete) pode ser reutilizado
+    op.drop_constraint('companies_slug_key', 'companies', type_='unique')
+    op.create_index(
+        'ux_companies_slug',
+        'companies',
+        ['slug'],
+        unique=True,
+        postgresql_where=sa.text('deleted_at IS NULL')
+    )
+    op.create_index(
+        'ux_companies_cnpj',
+        'companies',
+        ['cnpj'],
+        unique=True,
+        postgresql_where=sa.text('cnpj IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_companies_cnpj', table_name='companies')
+    op.drop_index('ux_companies_slug', table_name='companies')
+    op.create_unique_constraint('companies_slug_key', 'companies', ['slug'])
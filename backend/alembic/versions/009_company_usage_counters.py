@@ -0,0 +1,85 @@
+# ===========================
+# backend/alembic/versions/009_company_usage_counters.py
+# ===========================
+"""Denormalize active user and active alert counters into companies
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+# Status que contam como alerta ativo (mesmos de get_company_statistics)
+ACTIVE_ALERT_STATUSES = "('pending', 'triggered')"
+
+# Alertas são gravados por mais de um serviço (ORM e bulk insert); o contador
+# é mantido pelo banco para não depender de cada caminho de escrita.
+SYNC_ALERTS_COUNT_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION sync_company_active_alerts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IN {ACTIVE_ALERT_STATUSES} THEN
+        UPDATE companies
+        SET current_alerts_count = GREATEST(current_alerts_count - 1, 0)
+        WHERE id = OLD.company_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IN {ACTIVE_ALERT_STATUSES} THEN
+        UPDATE companies
+        SET current_alerts_count = current_alerts_count + 1
+        WHERE id = NEW.company_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    # Colunas do model Company ausentes na migração inicial
+    for column in ('current_users_count', 'active_users_count', 'current_alerts_count'):
+        op.execute(
+            f'ALTER TABLE companies ADD COLUMN IF NOT EXISTS {column} INTEGER NOT NULL DEFAULT 0'
+        )
+    op.create_check_constraint(
+        'check_active_users_positive', 'companies', 'active_users_count >= 0'
+    )
+
+    # Contadores recalculados uma única vez a partir das tabelas
+    op.execute(
+        'UPDATE companies c SET '
+        'current_users_count = u.total, active_users_count = u.active '
+        'FROM (SELECT company_id, count(*) AS total, '
+        'count(*) FILTER (WHERE is_active) AS active '
+        'FROM users WHERE deleted_at IS NULL GROUP BY company_id) u '
+        'WHERE u.company_id = c.id'
+    )
+    op.execute(
+        'UPDATE companies c SET current_alerts_count = a.total '
+        'FROM (SELECT company_id, count(*) AS total FROM alerts '
+        f'WHERE status IN {ACTIVE_ALERT_STATUSES} GROUP BY company_id) a '
+        'WHERE a.company_id = c.id'
+    )
+
+    # alerts é criada (já particionada) pela 003; o trigger no pai é
+    # propagado para as partições
+    op.execute(SYNC_ALERTS_COUNT_FUNCTION)
+    op.execute(
+        'CREATE TRIGGER alerts_sync_company_count '
+        'AFTER INSERT OR DELETE OR UPDATE OF status, company_id ON alerts '
+        'FOR EACH ROW EXECUTE FUNCTION sync_company_active_alerts()'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS alerts_sync_company_count ON alerts')
+    op.execute('DROP FUNCTION IF EXISTS sync_company_active_alerts()')
+    op.drop_constraint('check_active_users_positive', 'companies', type_='check')
+    for column in ('current_alerts_count', 'active_users_count', 'current_users_count'):
+        op.execute(f'ALTER TABLE companies DROP COLUMN IF EXISTS {column}')
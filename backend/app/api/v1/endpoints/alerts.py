@@ -1,7 +1,8 @@
 # GET/POST /alerts, /notifications
 # backend/app/api/v1/endpoints/alerts.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Any
 from datetime import datetime, date
@@ -250,22 +251,33 @@ async def get_alert_history(
     end_date: Optional[date] = Query(None),
     alert_type: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=500),
+    stream: bool = Query(False, description="Stream the full period as JSON lines (limit is ignored)"),
     current_user: User = Depends(deps.get_current_active_user),
     company: Company = Depends(deps.get_current_company),
     db: Session = Depends(deps.get_db)
 ) -> Any:
     """
     Get alert history
+    
+    With stream=true the whole period is exported as NDJSON, converted in
+    batches instead of being built as a single list.
     """
     service = AlertService(db, company.id)
     
     try:
-        history = await service.get_alert_history(
-            start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
-            end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None,
-            alert_type=AlertType(alert_type) if alert_type else None,
-            limit=limit
-        )
+        filters = {
+            "start_date": datetime.combine(start_date, datetime.min.time()) if start_date else None,
+            "end_date": datetime.combine(end_date, datetime.max.time()) if end_date else None,
+            "alert_type": AlertType(alert_type) if alert_type else None,
+        }
+        
+        if stream:
+            return StreamingResponse(
+                service.stream_alert_history(**filters),
+                media_type="application/x-ndjson"
+            )
+        
+        history = await service.get_alert_history(**filters, limit=limit)
         return history
         
     except Exception as e:
@@ -275,6 +287,32 @@ async def get_alert_history(
         )
 
 
+@router.get("/history/stats")
+async def get_alert_stats(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(deps.get_current_active_user),
+    company: Company = Depends(deps.get_current_company),
+    db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Get aggregated alert history statistics
+    """
+    service = AlertService(db, company.id)
+    
+    try:
+        return await service.get_alert_stats(
+            start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+            end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting alert stats: {str(e)}"
+        )
+
+
 @router.post("/{alert_id}/resolve")
 async def resolve_alert(
     alert_id: str,
@@ -329,6 +367,35 @@ async def test_alert_rule(
         )
 
 
+@router.post("/test/{rule_id}/records")
+async def evaluate_alert_rule_on_records(
+    rule_id: str,
+    records: List[dict] = Body(..., max_length=10000),
+    current_user: User = Depends(deps.require_role("manager")),
+    company: Company = Depends(deps.get_current_company),
+    db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Evaluate an alert rule against historical records (backfill) without triggering it
+    """
+    service = AlertService(db, company.id)
+    
+    try:
+        matches = await service.evaluate_rule_on_records(rule_id, records)
+        return {
+            "rule_id": rule_id,
+            "evaluated": len(matches),
+            "matched": sum(matches),
+            "matches": matches
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error evaluating alert rule: {str(e)}"
+        )
+
+
 # ===========================
 # backend/app/api/v1/endpoints/notifications.py
 # ===========================
@@ -767,19 +834,23 @@ async def get_export_status(
 async def get_export_history(
     limit: int = Query(50, ge=1, le=200),
     include_failed: bool = Query(False),
+    include_parameters: bool = Query(False),
     current_user: User = Depends(deps.get_current_active_user),
     company: Company = Depends(deps.get_current_company),
     db: Session = Depends(deps.get_db)
 ) -> Any:
     """
     Get export/report history
+    
+    Job parameters are only loaded and decoded with include_parameters=true.
     """
     service = ExportService(db, company.id)
     
     try:
         history = await service.get_export_history(
             limit=limit,
-            include_failed=include_failed
+            include_failed=include_failed,
+            include_parameters=include_parameters
         )
         
         return {
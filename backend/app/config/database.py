@@ -22,7 +22,7 @@ from sqlalchemy import (
     text
 )
 from sqlalchemy.sql import func
-from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
@@ -34,11 +34,22 @@ logger = logging.getLogger(__name__)
 
 # ==================== ENGINE CONFIGURATION ====================
 
+def _async_database_url(url: str) -> str:
+    """Usa o driver asyncpg quando a URL não especifica driver."""
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+DATABASE_URL = _async_database_url(str(settings.DATABASE_URL))
+
 # Configuração do engine assíncrono
 engine_config = {
     "echo": settings.DB_ECHO,  # Log SQL statements
     "future": True,  # SQLAlchemy 2.0 style
     "pool_pre_ping": settings.DB_POOL_PRE_PING,  # Verifica conexões antes de usar
+    "query_cache_size": settings.DB_QUERY_CACHE_SIZE,  # SQL compilado reutilizado
 }
 
 # Configuração do pool de conexões baseado no ambiente
@@ -46,18 +57,27 @@ if settings.DEBUG:
     # Em desenvolvimento, usa NullPool (sem pool)
     engine_config["poolclass"] = NullPool
 else:
-    # Em produção, usa QueuePool com configurações otimizadas
+    # Em produção, usa o pool de filas adaptado para o engine assíncrono.
+    # Cada query de uma AsyncSession usa uma conexão do pool.
     engine_config.update({
-        "poolclass": QueuePool,
+        "poolclass": AsyncAdaptedQueuePool,
         "pool_size": settings.DB_POOL_SIZE,
         "max_overflow": settings.DB_MAX_OVERFLOW,
-        "pool_timeout": 30,
-        "pool_recycle": 1800,  # Recicla conexões a cada 30 minutos
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
     })
 
+# asyncpg: statements repetidos (busca por id/slug, contagens) reutilizam
+# o plano preparado na conexão
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    engine_config["connect_args"] = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
 # Cria o engine assíncrono
 engine: AsyncEngine = create_async_engine(
-    str(settings.DATABASE_URL),
+    DATABASE_URL,
     **engine_config
 )
 
@@ -96,6 +116,10 @@ class TimestampMixin:
         nullable=False,
         index=True
     )
+    
+    # Valores gerados pelo banco (created_at, updated_at, expressões SQL)
+    # voltam no RETURNING do flush, dispensando refresh() após o commit
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class TenantMixin:
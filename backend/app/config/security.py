@@ -4,14 +4,17 @@ Configurações de segurança, autenticação JWT e OAuth.
 Implementa sistema de autenticação multi-tenant com refresh tokens.
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr
+import base64
+import json
 import secrets
 import hashlib
 import hmac
+import struct
 from enum import Enum
 
 from app.config.settings import settings
@@ -82,11 +85,17 @@ class Permission(str, Enum):
 
 # ==================== PASSWORD HASHING ====================
 
-# Contexto para hashing de senhas usando bcrypt
+# Contexto para hashing de senhas usando bcrypt.
+# bcrypt_sha256 aplica SHA-256 antes do bcrypt: entrada de tamanho fixo, sem
+# truncamento em 72 bytes. Hashes bcrypt antigos continuam verificando e são
+# marcados como obsoletos para serem refeitos no próximo login.
+# Hashes com custo abaixo de BCRYPT_COST também são considerados obsoletos.
 pwd_context = CryptContext(
-    schemes=["bcrypt"],
+    schemes=["bcrypt_sha256", "bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12  # Número de rounds para bcrypt
+    bcrypt_sha256__default_rounds=settings.BCRYPT_COST,
+    bcrypt_sha256__min_rounds=settings.BCRYPT_COST,
+    bcrypt__default_rounds=settings.BCRYPT_COST
 )
 
 
@@ -104,6 +113,36 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e gera novo hash se o atual usa esquema obsoleto.
+    
+    Args:
+        plain_password: Senha em texto plano
+        hashed_password: Hash da senha armazenado
+        
+    Returns:
+        tuple: (senha correta, novo hash ou None)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Verifica se o hash usa esquema obsoleto ou custo abaixo do configurado.
+    
+    Args:
+        hashed_password: Hash da senha armazenado
+        
+    Returns:
+        bool: True se o hash deve ser refeito
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """
     Gera hash bcrypt de uma senha.
@@ -150,6 +189,86 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
 
 # ==================== JWT TOKEN MANAGEMENT ====================
 
+# Algoritmos HMAC assinados diretamente, sem passar pelo python-jose
+_HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64url(data: bytes) -> bytes:
+    """Base64 URL-safe sem padding (formato JWT)."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Cabeçalho e chave fixos: serializados uma única vez
+_JWT_HEADER_B64 = _b64url(
+    json.dumps({"alg": settings.ALGORITHM, "typ": "JWT"}, separators=(",", ":")).encode()
+)
+_SECRET_KEY_BYTES = settings.SECRET_KEY.encode()
+
+
+def _encode_hmac_jwt(claims: Dict[str, Any]) -> str:
+    """Assina JWT HMAC com cabeçalho pré-serializado e uma chamada a hmac."""
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(
+        json.dumps(claims, separators=(",", ":")).encode()
+    )
+    signature = hmac.new(
+        _SECRET_KEY_BYTES,
+        signing_input,
+        _HMAC_DIGESTS[settings.ALGORITHM]
+    ).digest()
+    return (signing_input + b"." + _b64url(signature)).decode()
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    """Decodifica base64 URL-safe sem padding."""
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _decode_hmac_jwt(token: str) -> Dict[str, Any]:
+    """
+    Verifica e decodifica JWT HMAC com a chave já carregada.
+    
+    Raises:
+        JWTError: Se formato, assinatura ou expiração inválidos
+    """
+    try:
+        signing_input, signature_b64 = token.encode().rsplit(b".", 1)
+        header_b64, payload_b64 = signing_input.split(b".")
+        
+        # Cabeçalho idêntico ao emitido dispensa o parse
+        if header_b64 != _JWT_HEADER_B64:
+            header = json.loads(_b64url_decode(header_b64))
+            if not isinstance(header, dict) or header.get("alg") != settings.ALGORITHM:
+                raise JWTError("Algoritmo do token não permitido")
+        
+        expected = hmac.new(
+            _SECRET_KEY_BYTES,
+            signing_input,
+            _HMAC_DIGESTS[settings.ALGORITHM]
+        ).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            raise JWTError("Assinatura do token inválida")
+        
+        payload = json.loads(_b64url_decode(payload_b64))
+        if not isinstance(payload, dict):
+            raise JWTError("Payload do token inválido")
+    except JWTError:
+        raise
+    except (ValueError, TypeError) as e:
+        raise JWTError(f"Token malformado: {e}")
+    
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)):
+        raise JWTError("Token sem expiração")
+    if exp <= datetime.now(timezone.utc).timestamp():
+        raise JWTError("Token expirado")
+    
+    return payload
+
+
 def create_token(
     data: Dict[str, Any],
     token_type: TokenType = TokenType.ACCESS,
@@ -188,12 +307,15 @@ def create_token(
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     
     to_encode.update({
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": int(expire.timestamp()),
+        "iat": int(datetime.now(timezone.utc).timestamp()),
         "type": token_type.value,
         "jti": secrets.token_urlsafe(16)  # JWT ID único
     })
     
+    if settings.ALGORITHM in _HMAC_DIGESTS:
+        return _encode_hmac_jwt(to_encode)
+    
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -218,11 +340,14 @@ def decode_token(token: str, expected_type: Optional[TokenType] = None) -> Dict[
         JWTError: Se o token for inválido
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        if settings.ALGORITHM in _HMAC_DIGESTS:
+            payload = _decode_hmac_jwt(token)
+        else:
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
         
         # Valida tipo do token se especificado
         if expected_type and payload.get("type") != expected_type.value:
@@ -275,6 +400,135 @@ def create_refresh_token(user_id: int, company_id: int) -> str:
     return create_token(data, TokenType.REFRESH)
 
 
+# ==================== OPAQUE REFRESH TOKENS ====================
+
+# Chave do hash de refresh tokens, derivada da SECRET_KEY
+_REFRESH_TOKEN_PEPPER = hashlib.sha256(
+    f"refresh-token:{settings.SECRET_KEY}".encode()
+).digest()
+
+
+def generate_refresh_token() -> str:
+    """
+    Gera refresh token opaco (aleatório, sem JWT).
+    
+    Returns:
+        str: Refresh token
+    """
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(refresh_token: str) -> bytes:
+    """
+    Gera hash de um refresh token para armazenamento e busca.
+    
+    Args:
+        refresh_token: Refresh token em texto plano
+        
+    Returns:
+        bytes: Hash blake2b de 32 bytes
+    """
+    return hashlib.blake2b(
+        refresh_token.encode(),
+        key=_REFRESH_TOKEN_PEPPER,
+        digest_size=32
+    ).digest()
+
+
+# ==================== SIGNED ACTION TOKENS ====================
+
+# Tokens de verificação de email e reset de senha, sem estado no banco:
+# base64url(user_id || exp || blake2b(tipo || user_id || exp || vínculo))
+_SIGNED_TOKEN_KEY = hashlib.sha256(
+    f"signed-token:{settings.SECRET_KEY}".encode()
+).digest()
+_SIGNED_TOKEN_PAYLOAD = struct.Struct(">QI")
+_SIGNED_TOKEN_MAC_SIZE = 16
+
+
+def _signed_token_mac(payload: bytes, token_type: TokenType, binding: str) -> bytes:
+    """MAC do token; o tipo impede usar um token de verificação como reset."""
+    return hashlib.blake2b(
+        token_type.value.encode() + b"." + payload + b"." + binding.encode(),
+        key=_SIGNED_TOKEN_KEY,
+        digest_size=_SIGNED_TOKEN_MAC_SIZE
+    ).digest()
+
+
+def _split_signed_token(token: str) -> Tuple[bytes, bytes]:
+    """Separa payload e MAC; ValueError se o formato for inválido."""
+    raw = _b64url_decode(token.encode("ascii"))
+    if len(raw) != _SIGNED_TOKEN_PAYLOAD.size + _SIGNED_TOKEN_MAC_SIZE:
+        raise ValueError("Token malformado")
+    return raw[:_SIGNED_TOKEN_PAYLOAD.size], raw[_SIGNED_TOKEN_PAYLOAD.size:]
+
+
+def create_signed_token(
+    user_id: int,
+    token_type: TokenType,
+    expires_delta: timedelta,
+    binding: str = ""
+) -> str:
+    """
+    Cria token assinado para ações por email (verificação, reset de senha).
+    
+    Args:
+        user_id: ID do usuário
+        token_type: Finalidade do token
+        expires_delta: Validade do token
+        binding: Valor atual que invalida o token quando muda (ex.: hash da senha)
+        
+    Returns:
+        str: Token URL-safe
+    """
+    expires_at = int((datetime.now(timezone.utc) + expires_delta).timestamp())
+    payload = _SIGNED_TOKEN_PAYLOAD.pack(user_id, expires_at)
+    return _b64url(payload + _signed_token_mac(payload, token_type, binding)).decode()
+
+
+def get_signed_token_user_id(token: str) -> int:
+    """
+    Lê o ID do usuário de um token assinado, sem verificar a assinatura.
+    
+    Usado para buscar o valor de vínculo antes de verify_signed_token.
+    
+    Raises:
+        ValueError: Se o formato for inválido
+    """
+    payload, _ = _split_signed_token(token)
+    return _SIGNED_TOKEN_PAYLOAD.unpack(payload)[0]
+
+
+def verify_signed_token(
+    token: str,
+    token_type: TokenType,
+    binding: str = ""
+) -> Tuple[int, datetime]:
+    """
+    Verifica assinatura de um token criado por create_signed_token.
+    
+    A expiração é retornada para que o chamador diferencie token expirado.
+    
+    Args:
+        token: Token recebido
+        token_type: Finalidade esperada
+        binding: Mesmo valor de vínculo usado na criação
+        
+    Returns:
+        Tuple[int, datetime]: ID do usuário e expiração
+        
+    Raises:
+        ValueError: Se formato ou assinatura inválidos
+    """
+    payload, mac = _split_signed_token(token)
+    
+    if not hmac.compare_digest(mac, _signed_token_mac(payload, token_type, binding)):
+        raise ValueError("Assinatura do token inválida")
+    
+    user_id, expires_at = _SIGNED_TOKEN_PAYLOAD.unpack(payload)
+    return user_id, datetime.fromtimestamp(expires_at, tz=timezone.utc)
+
+
 # ==================== ROLE-BASED ACCESS CONTROL (RBAC) ====================
 
 # Mapeamento de roles para permissões
@@ -466,6 +720,8 @@ __all__ = [
     
     # Password
     "verify_password",
+    "verify_and_update_password",
+    "password_needs_rehash",
     "get_password_hash",
     "validate_password_strength",
     
@@ -474,6 +730,11 @@ __all__ = [
     "decode_token",
     "create_access_token",
     "create_refresh_token",
+    "generate_refresh_token",
+    "hash_refresh_token",
+    "create_signed_token",
+    "get_signed_token_user_id",
+    "verify_signed_token",
     
     # RBAC
     "ROLE_PERMISSIONS",
@@ -37,6 +37,9 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Custo do bcrypt; hashes abaixo deste custo são refeitos no próximo login
+    BCRYPT_COST: int = 12
+    
     # Security Headers
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -69,10 +72,18 @@ class Settings(BaseSettings):
             path=values.data.get("POSTGRES_DB"),
         )
     
-    # Pool de conexões
-    DB_POOL_SIZE: int = 10
-    DB_MAX_OVERFLOW: int = 20
+    # Pool de conexões (por worker do uvicorn).
+    # Referência: pool_size ~ max(5, rps esperado * ms médio por query / (1000 * workers))
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # Recicla conexões a cada 30 minutos
     DB_POOL_PRE_PING: bool = True
+    # Cache de prepared statements do asyncpg (por conexão)
+    DB_STATEMENT_CACHE_SIZE: int = 1024
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 512
+    # Cache de SQL compilado do SQLAlchemy (por engine)
+    DB_QUERY_CACHE_SIZE: int = 1200
     DB_ECHO: bool = False  # SQL logging
     
     # ==================== REDIS ====================
@@ -0,0 +1,168 @@
+# ===========================
+# backend/app/core/bg.py
+# ===========================
+"""
+Fila de tarefas em background no próprio processo da API.
+Usada para trabalho que não precisa segurar a resposta HTTP (ex.: envio de emails).
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue:
+    """
+    Fila limitada consumida por workers asyncio iniciados no lifespan da aplicação.
+    """
+
+    def __init__(self, maxsize: int = 10_000, workers: int = 4):
+        self.maxsize = maxsize
+        self.num_workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Inicia os workers."""
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.num_workers)
+        ]
+        logger.info(f"Background task queue started with {self.num_workers} workers")
+
+    async def stop(self) -> None:
+        """Processa as tarefas pendentes e encerra os workers."""
+        if not self._workers:
+            return
+
+        await self._queue.join()
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        self._workers = []
+        logger.info("Background task queue stopped")
+
+    async def submit(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """
+        Enfileira uma corrotina para execução em background.
+
+        Sem workers ativos (ex.: scripts, Celery), executa imediatamente.
+
+        Args:
+            func: Função assíncrona
+            args: Argumentos da função
+        """
+        if not self._workers:
+            await self._run(func, args)
+            return
+
+        # Fila cheia: aguarda espaço (backpressure)
+        await self._queue.put((func, args))
+
+    async def _worker(self, worker_id: int) -> None:
+        """Consome tarefas da fila."""
+        while True:
+            func, args = await self._queue.get()
+            try:
+                await self._run(func, args)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    async def _run(func: Callable[..., Awaitable[Any]], args: tuple) -> None:
+        """Executa tarefa registrando falhas sem propagar."""
+        try:
+            await func(*args)
+        except Exception as e:
+            logger.error(f"Background task {getattr(func, '__name__', func)} failed: {e}")
+
+
+class Debouncer:
+    """
+    Agrupa escritas repetidas por chave e as aplica em lote periodicamente.
+
+    Só o último valor de cada chave é mantido entre duas descargas.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Dict[Any, Any]], Awaitable[Any]],
+        interval: float = 0.25
+    ):
+        self.flush_func = flush
+        self.interval = interval
+        self._pending: Dict[Any, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Inicia a descarga periódica."""
+        if self._task:
+            return
+
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Encerra a descarga periódica e grava o que estiver pendente."""
+        if not self._task:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        await self.flush()
+
+    async def submit(self, key: Any, value: Any) -> None:
+        """
+        Registra o valor mais recente de uma chave.
+
+        Sem descarga periódica ativa (ex.: scripts, Celery), grava imediatamente.
+
+        Args:
+            key: Chave de agrupamento
+            value: Valor a gravar
+        """
+        if not self._task:
+            await self._run({key: value})
+            return
+
+        self._pending[key] = value
+
+    def discard(self, key: Any) -> None:
+        """Descarta valor pendente (ex.: sobrescrito por gravação direta)."""
+        self._pending.pop(key, None)
+
+    async def flush(self) -> None:
+        """Grava imediatamente os valores pendentes."""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        await self._run(batch)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def _run(self, batch: Dict[Any, Any]) -> None:
+        """Executa descarga registrando falhas sem propagar."""
+        try:
+            await self.flush_func(batch)
+        except Exception as e:
+            logger.error(
+                f"Debounced flush {getattr(self.flush_func, '__name__', self.flush_func)} "
+                f"failed for {len(batch)} keys: {e}"
+            )
+
+
+# Fila global da aplicação
+task_queue = TaskQueue()
@@ -7,12 +7,16 @@ Redis cache configuration
 
 import redis.asyncio as redis
 from typing import Optional, Any
+import asyncio
 import json
+import logging
 import pickle
 from datetime import timedelta
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Redis client
 redis_client = redis.from_url(
     settings.REDIS_URL,
@@ -99,6 +99,13 @@ celery_app.conf.beat_schedule = {
         "options": {"queue": "alerts", "priority": 10}
     },
     
+    # Partições mensais das tabelas de alertas (diariamente à 1h)
+    "ensure-alert-partitions": {
+        "task": "ensure_alert_partitions",
+        "schedule": crontab(hour=1, minute=0),  # Diariamente à 1h
+        "options": {"queue": "alerts"}
+    },
+    
     # Treinar modelos ML diariamente às 3h
     "train-ml-models": {
         "task": "app.tasks.ml_tasks.retrain_all_models",
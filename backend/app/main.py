@@ -50,6 +50,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Redis connection failed: {e}")
     
+    # Start background task queue
+    from app.core.bg import task_queue
+    await task_queue.start()
+    
+    # Start debounced onboarding writes
+    from app.services.company_service import onboarding_writes
+    await onboarding_writes.start()
+    
     # Test Celery
     try:
         result = celery_app.send_task("app.tasks.health_check")
@@ -66,6 +74,20 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("👋 Shutting down WeatherBiz Analytics...")
     
+    # Flush pending onboarding writes
+    try:
+        await onboarding_writes.stop()
+        logger.info("✅ Onboarding writes flushed")
+    except Exception as e:
+        logger.warning(f"⚠️ Error flushing onboarding writes: {e}")
+    
+    # Drain background task queue
+    try:
+        await task_queue.stop()
+        logger.info("✅ Background task queue stopped")
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping background task queue: {e}")
+    
     # Close Redis connection
     try:
         from app.core.cache import redis_client
@@ -186,6 +208,10 @@ async def health_check() -> dict:
         health_status["database"] = f"error: {str(e)}"
         health_status["status"] = "degraded"
     
+    # Pool de conexões do engine assíncrono
+    from app.config.database import engine as async_engine
+    health_status["db_pool"] = async_engine.pool.status()
+    
     # Check Redis
     try:
         from app.core.cache import redis_client
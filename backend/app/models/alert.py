@@ -8,7 +8,7 @@ from datetime import datetime, timezone
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime,
     ForeignKey, Text, JSON, Index, Numeric,
-    Enum as SQLEnum
+    Enum as SQLEnum, text, func, event, DDL
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -313,7 +313,8 @@ class Alert(Base, TimestampMixin, TenantMixin):
     __tablename__ = "alerts"
     
     # ==================== PRIMARY KEY ====================
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # Tabela particionada por triggered_at: a chave inclui a coluna de partição
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
     
     # ==================== RULE REFERENCE ====================
     rule_id: Mapped[Optional[int]] = mapped_column(
@@ -365,8 +366,9 @@ class Alert(Base, TimestampMixin, TenantMixin):
     triggered_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=func.now(),
+        primary_key=True,
         nullable=False,
-        doc="Quando foi disparado"
+        doc="Quando foi disparado (chave de partição)"
     )
     
     triggered_by: Mapped[str] = mapped_column(
@@ -563,6 +565,14 @@ class Alert(Base, TimestampMixin, TenantMixin):
         Index("idx_alert_triggered_at", "triggered_at"),
         Index("idx_alert_expires_at", "expires_at"),
         Index("idx_alert_rule", "rule_id"),
+        Index("ix_alerts_company_triggered", "company_id", "triggered_at"),
+        Index(
+            "ix_alerts_company_unresolved",
+            "company_id",
+            "triggered_at",
+            postgresql_where=text("resolved_at IS NULL")
+        ),
+        {"postgresql_partition_by": "RANGE (triggered_at)"},
     )
     
     # ==================== PROPERTIES ====================
@@ -664,12 +674,22 @@ class AlertHistory(Base, TimestampMixin, TenantMixin):
     __tablename__ = "alert_history"
     
     # ==================== PRIMARY KEY ====================
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # Tabela particionada por created_at: a chave inclui a coluna de partição
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True,
+        nullable=False,
+        index=True,
+        doc="Criação do registro (chave de partição)"
+    )
     
     # ==================== ALERT REFERENCE ====================
+    # Sem FK: em alerts particionada a chave é (id, triggered_at); validado pela aplicação
     alert_id: Mapped[int] = mapped_column(
         Integer,
-        ForeignKey("alerts.id"),
         nullable=False,
         index=True,
         doc="ID do alerta original"
@@ -725,8 +745,23 @@ class AlertHistory(Base, TimestampMixin, TenantMixin):
     __table_args__ = (
         Index("idx_alert_history_alert", "alert_id"),
         Index("idx_alert_history_timestamp", "event_timestamp"),
+        Index("ix_alert_history_company_created", "company_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
     
     # ==================== STRING REPRESENTATION ====================
     def __repr__(self) -> str:
-        return f"<AlertHistory(alert_id={self.alert_id}, event={self.event_type})>"
\ No newline at end of file
+        return f"<AlertHistory(alert_id={self.alert_id}, event={self.event_type})>"
+
+
+# Tabelas criadas por create_all precisam de ao menos uma partição para aceitar
+# inserts; as mensais são criadas pelas migrações/ensure_alert_partitions
+for _partitioned in (Alert.__table__, AlertHistory.__table__):
+    event.listen(
+        _partitioned,
+        "after_create",
+        DDL(
+            f"CREATE TABLE IF NOT EXISTS {_partitioned.name}_default "
+            f"PARTITION OF {_partitioned.name} DEFAULT"
+        ).execute_if(dialect="postgresql")
+    )
@@ -10,10 +10,11 @@ from decimal import Decimal
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, 
     Text, JSON, Index, Numeric, Date,
-    Enum as SQLEnum, CheckConstraint
+    Enum as SQLEnum, CheckConstraint, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.sql import func
 
 from app.config.database import Base, TimestampMixin, SoftDeleteMixin
 
@@ -75,7 +76,6 @@ class Company(Base, TimestampMixin, SoftDeleteMixin):
     
     slug: Mapped[str] = mapped_column(
         String(100),
-        unique=True,
         index=True,
         nullable=False,
         doc="Slug único para URL (ex: empresa-xyz)"
@@ -89,7 +89,6 @@ class Company(Base, TimestampMixin, SoftDeleteMixin):
     
     cnpj: Mapped[Optional[str]] = mapped_column(
         String(20),
-        unique=True,
         nullable=True,
         doc="CNPJ da empresa (único)"
     )
@@ -272,6 +271,13 @@ class Company(Base, TimestampMixin, SoftDeleteMixin):
         doc="Número atual de usuários"
     )
     
+    active_users_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        doc="Número atual de usuários ativos"
+    )
+    
     current_alerts_count: Mapped[int] = mapped_column(
         Integer,
         default=0,
@@ -466,12 +472,26 @@ class Company(Base, TimestampMixin, SoftDeleteMixin):
         CheckConstraint("max_alerts >= 0", name="check_max_alerts_positive"),
         CheckConstraint("current_users_count >= 0", name="check_current_users_positive"),
         CheckConstraint("current_alerts_count >= 0", name="check_current_alerts_positive"),
+        CheckConstraint("active_users_count >= 0", name="check_active_users_positive"),
         
         # Indexes
         Index("idx_company_status", "status"),
         Index("idx_company_plan", "plan"),
         Index("idx_company_created", "created_at"),
-        Index("idx_company_cnpj", "cnpj"),
+        
+        # Unicidade garantida pelo banco (create_company depende destes índices)
+        Index(
+            "ux_companies_slug",
+            "slug",
+            unique=True,
+            postgresql_where=text("deleted_at IS NULL")
+        ),
+        Index(
+            "ux_companies_cnpj",
+            "cnpj",
+            unique=True,
+            postgresql_where=text("cnpj IS NOT NULL")
+        ),
     )
     
     # ==================== PROPERTIES ====================
@@ -562,21 +582,33 @@ class Company(Base, TimestampMixin, SoftDeleteMixin):
         """
         Faz upgrade do plano.
         
+        Args:
+            new_plan: Novo plano
+        """
+        for field, value in self.plan_values(new_plan).items():
+            setattr(self, field, value)
+    
+    @staticmethod
+    def plan_values(new_plan: str) -> dict:
+        """
+        Valores de coluna de uma troca de plano, para uso em UPDATE direto.
+        
         Args:
             new_plan: Novo plano
         """
         from app.config.settings import settings
         
-        self.plan = new_plan
         plan_limits = settings.PLAN_LIMITS.get(new_plan, {})
         
-        self.max_users = plan_limits.get("max_users", 3)
-        self.max_alerts = plan_limits.get("max_alerts", 10)
-        self.max_api_calls_daily = plan_limits.get("max_api_calls_daily", 1000)
-        self.data_retention_days = plan_limits.get("data_retention_days", 30)
-        
-        self.subscription_starts_at = datetime.now(timezone.utc)
-        self.status = CompanyStatus.ACTIVE
+        return {
+            "plan": new_plan,
+            "max_users": plan_limits.get("max_users", 3),
+            "max_alerts": plan_limits.get("max_alerts", 10),
+            "max_api_calls_daily": plan_limits.get("max_api_calls_daily", 1000),
+            "data_retention_days": plan_limits.get("data_retention_days", 30),
+            "subscription_starts_at": func.now(),
+            "status": CompanyStatus.ACTIVE,
+        }
     
     def to_dict(self) -> dict:
         """
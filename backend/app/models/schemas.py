@@ -4,11 +4,11 @@ Schemas Pydantic para validação de dados de entrada/saída da API.
 Centraliza todos os schemas do sistema WeatherBiz Analytics.
 """
 
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Annotated
 from datetime import datetime, date, time
 from decimal import Decimal
 from pydantic import (
-    BaseModel, EmailStr, Field, ConfigDict,
+    BaseModel, EmailStr, Field, ConfigDict, BeforeValidator,
     field_validator, model_validator
 )
 from enum import Enum
@@ -65,9 +65,18 @@ class PaginatedResponse(BaseModel):
 
 # ==================== USER SCHEMAS ====================
 
+def _lower_email(value: Any) -> Any:
+    """Email em minúsculas, forma canônica usada nas consultas."""
+    return value.lower() if isinstance(value, str) else value
+
+
+# Email normalizado antes da validação; entrada não textual segue para o EmailStr
+NormalizedEmail = Annotated[EmailStr, BeforeValidator(_lower_email)]
+
+
 class UserBase(BaseSchema):
     """Base para schemas de usuário."""
-    email: EmailStr
+    email: NormalizedEmail
     username: Optional[str] = None
     full_name: str
     phone: Optional[str] = None
@@ -97,7 +106,7 @@ class UserCreate(UserBase):
 
 class UserUpdate(BaseSchema):
     """Schema para atualizar usuário."""
-    email: Optional[EmailStr] = None
+    email: Optional[NormalizedEmail] = None
     username: Optional[str] = None
     full_name: Optional[str] = None
     phone: Optional[str] = None
@@ -194,6 +203,7 @@ class CompanyInDB(CompanyBase):
     plan: str = "free"
     status: str = "trial"
     current_users_count: int = 0
+    active_users_count: int = 0
     current_alerts_count: int = 0
     created_at: datetime
     updated_at: datetime
@@ -211,7 +221,7 @@ class CompanyResponse(CompanyInDB):
 
 class LoginRequest(BaseSchema):
     """Schema para login."""
-    email: EmailStr
+    email: NormalizedEmail
     password: str
 
 
@@ -167,36 +167,12 @@ class User(Base, TimestampMixin, TenantMixin, SoftDeleteMixin):
     )
     
     # ==================== TOKENS ====================
-    refresh_token: Mapped[Optional[str]] = mapped_column(
-        String(500),
-        nullable=True,
-        doc="Refresh token atual"
-    )
-    
     api_key_hash: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         doc="Hash da API key do usuário"
     )
     
-    reset_password_token: Mapped[Optional[str]] = mapped_column(
-        String(255),
-        nullable=True,
-        doc="Token para reset de senha"
-    )
-    
-    reset_password_expires: Mapped[Optional[datetime]] = mapped_column(
-        DateTime(timezone=True),
-        nullable=True,
-        doc="Expiração do token de reset"
-    )
-    
-    email_verification_token: Mapped[Optional[str]] = mapped_column(
-        String(255),
-        nullable=True,
-        doc="Token para verificação de email"
-    )
-    
     # ==================== PREFERENCES ====================
     preferences: Mapped[Optional[dict]] = mapped_column(
         JSON,
@@ -312,10 +288,30 @@ class User(Base, TimestampMixin, TenantMixin, SoftDeleteMixin):
         Args:
             password: Senha em texto plano
         """
-        self.hashed_password = get_password_hash(password)
-        self.password_changed_at = datetime.now(timezone.utc)
-        self.reset_password_token = None
-        self.reset_password_expires = None
+        self.set_password_hash(get_password_hash(password))
+    
+    def set_password_hash(self, hashed_password: str) -> None:
+        """
+        Define hash de senha já calculado.
+        
+        Args:
+            hashed_password: Hash da nova senha
+        """
+        for column, value in self.password_hash_values(hashed_password).items():
+            setattr(self, column, value)
+    
+    @staticmethod
+    def password_hash_values(hashed_password: str) -> dict:
+        """
+        Valores de coluna de uma troca de senha, para uso em UPDATE direto.
+        
+        Args:
+            hashed_password: Hash da nova senha
+        """
+        return {
+            "hashed_password": hashed_password,
+            "password_changed_at": datetime.now(timezone.utc),
+        }
     
     def verify_password(self, password: str) -> bool:
         """
@@ -411,4 +407,8 @@ class User(Base, TimestampMixin, TenantMixin, SoftDeleteMixin):
         return f"<User(id={self.id}, email={self.email}, company_id={self.company_id})>"
     
     def __str__(self) -> str:
-        return self.display_name
\ No newline at end of file
+        return self.display_name
+
+
+# Busca por email sem diferenciar maiúsculas/minúsculas
+Index("ix_user_email_lower", func.lower(User.email), unique=True)
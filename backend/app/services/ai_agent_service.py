@@ -1,6 +1,7 @@
 # backend/app/services/ai_agent_service.py
 
 import os
+import sys
 import json
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple
@@ -21,15 +22,120 @@ from ..models.database import (
 from ..models.schemas import ChatMessage, ChatResponse, AIInsight
 from ..core.exceptions import AIServiceError, ValidationError
 from ..core.config import settings
+from ..core.cache import cache_service
 from ..services.sales_service import SalesService
 from ..services.ml_service import MLService
 from ..services.weather_service import WeatherService
 import hashlib
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Palavras-chave reconhecidas em uma única varredura do texto. Cada termo marca
+# um ou mais bits; tipo de gráfico, período, necessidade de gráfico e confiança
+# da resposta consultam a mesma máscara.
+_KW_CHART_LINE = 1 << 0
+_KW_CHART_BAR = 1 << 1
+_KW_CHART_PIE = 1 << 2
+_KW_PERIOD_TODAY = 1 << 3
+_KW_PERIOD_YESTERDAY = 1 << 4
+_KW_PERIOD_WEEK = 1 << 5
+_KW_PERIOD_MONTH = 1 << 6
+_KW_PERIOD_YEAR = 1 << 7
+_KW_NEEDS_CHART = 1 << 8
+_KW_NEGATION = 1 << 9
+_KW_INSUFFICIENT = 1 << 10
+
+_KEYWORD_TAGS = {
+    "evolução": _KW_CHART_LINE | _KW_NEEDS_CHART,
+    "histórico": _KW_CHART_LINE | _KW_NEEDS_CHART,
+    "comparar": _KW_CHART_BAR | _KW_NEEDS_CHART,
+    "proporção": _KW_CHART_PIE,
+    "percentual": _KW_CHART_PIE,
+    "gráfico": _KW_NEEDS_CHART,
+    "visualizar": _KW_NEEDS_CHART,
+    "mostrar": _KW_NEEDS_CHART,
+    "exibir": _KW_NEEDS_CHART,
+    "plotar": _KW_NEEDS_CHART,
+    "tendência": _KW_NEEDS_CHART,
+    "hoje": _KW_PERIOD_TODAY,
+    "ontem": _KW_PERIOD_YESTERDAY,
+    "semana": _KW_PERIOD_WEEK,
+    "mês": _KW_PERIOD_MONTH,
+    "mes": _KW_PERIOD_MONTH,
+    "ano": _KW_PERIOD_YEAR,
+    "não": _KW_NEGATION,
+    "insuficiente": _KW_INSUFFICIENT,
+}
+_KEYWORD_PATTERN = re.compile("|".join(_KEYWORD_TAGS), re.IGNORECASE)
+
+# Tipo de gráfico e período por bit, em ordem de prioridade
+_CHART_TYPE_PRIORITY = (
+    (_KW_CHART_LINE, "line"),
+    (_KW_CHART_BAR, "bar"),
+    (_KW_CHART_PIE, "pie"),
+)
+_TIME_PERIOD_PRIORITY = (
+    (_KW_PERIOD_TODAY, "today"),
+    (_KW_PERIOD_YESTERDAY, "yesterday"),
+    (_KW_PERIOD_WEEK, "week"),
+    (_KW_PERIOD_MONTH, "month"),
+    (_KW_PERIOD_YEAR, "year"),
+)
+
+
+def _scan_keywords(text: str) -> int:
+    """Máscara com os bits de todas as palavras-chave presentes no texto"""
+    mask = 0
+    for m in _KEYWORD_PATTERN.finditer(text):
+        mask |= _KEYWORD_TAGS.get(m.group().casefold(), 0)
+    return mask
+
+
+# Perguntas se repetem (re-polling, novas tentativas); respostas do LLM não
+_question_keywords = lru_cache(maxsize=1024)(_scan_keywords)
+
+# Multiplicador de confiança indexado pelos bits de negação/insuficiência
+_CONFIDENCE_MULTIPLIERS = (1.0, 0.7, 0.7, 0.7)
+_CONFIDENCE_SHIFT = 9
+_MAX_ANSWER_CONFIDENCE = 0.95
+
+# Palavras-chave que determinam quais dados coletar para uma pergunta
+_SALES_KEYWORDS = ("venda", "receita", "faturamento")
+_WEATHER_KEYWORDS = ("clima", "tempo", "temperatura", "chuva")
+_PREDICTION_KEYWORDS = ("previsão", "futuro", "próximo")
+_ALERT_KEYWORDS = ("alert", "aviso", "problema")
+
+# Dados de gráfico são reaproveitados por pouco tempo para perguntas repetidas
+_CHART_DATA_CACHE_TTL = 60  # segundos
+
+# Rótulos das fontes exibidos ao usuário. São internados explicitamente, então
+# quem consome a lista pode compará-los por identidade (label is SALES_SOURCE_LABEL)
+SALES_SOURCE_LABEL = sys.intern("Dados de vendas")
+WEATHER_SOURCE_LABEL = sys.intern("Dados climáticos")
+PREDICTIONS_SOURCE_LABEL = sys.intern("Modelos preditivos")
+ALERTS_SOURCE_LABEL = sys.intern("Sistema de alertas")
+
+# Chave do contexto de dados -> rótulo da fonte
+_SOURCE_LABELS = tuple(
+    (sys.intern(key), label)
+    for key, label in (
+        ("sales", SALES_SOURCE_LABEL),
+        ("weather", WEATHER_SOURCE_LABEL),
+        ("predictions", PREDICTIONS_SOURCE_LABEL),
+        ("alerts", ALERTS_SOURCE_LABEL),
+    )
+)
+_SOURCE_KEYS = frozenset(key for key, _ in _SOURCE_LABELS)
+
+
+@lru_cache(maxsize=2 ** len(_SOURCE_LABELS))
+def _source_labels_for(keys: frozenset) -> Tuple[str, ...]:
+    """Rótulos das fontes presentes; há no máximo uma entrada por combinação de chaves"""
+    return tuple(label for key, label in _SOURCE_LABELS if key in keys)
+
 class IntentType(Enum):
     GREETING = "greeting"
     SALES_QUERY = "sales_query"
@@ -57,6 +163,27 @@ class ConversationContext:
     messages_history: List[Dict]
     current_topic: Optional[str]
     data_context: Dict
+
+@dataclass(slots=True)
+class DataContext:
+    """Dados coletados para responder uma pergunta, com as fontes presentes"""
+    sales: Optional[Any] = None
+    weather: Optional[Any] = None
+    predictions: Optional[Any] = None
+    alerts: Optional[Any] = None
+    sources: frozenset = frozenset()
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DataContext":
+        sources = frozenset(data.keys() & _SOURCE_KEYS)
+        return cls(**{key: data[key] for key in sources}, sources=sources)
+
+@dataclass(slots=True)
+class QuestionFeatures:
+    """Atributos da pergunta calculados uma única vez por requisição"""
+    text: str
+    keywords: int
+    period: Optional[Dict[str, datetime]] = None
     
 class AIAgentService:
     """Service para agente AI com Google Gemini"""
@@ -94,6 +221,12 @@ class AIAgentService:
         # Cache de contexto
         self.context_cache = {}
         
+        # Construtores de dados de gráfico por fonte, em ordem de preferência
+        self._chart_data_builders = {
+            "sales": lambda period: self._prepare_sales_chart_data(period, None),
+            "weather": self._prepare_weather_chart_data,
+        }
+        
     async def process_message(
         self,
         message: str,
@@ -348,20 +481,31 @@ class AIAgentService:
             # Processar resposta
             answer = response.text
             
+            # Fontes presentes resolvidas uma única vez para os auxiliares abaixo
+            context = DataContext.from_dict(data_context)
+            
+            # Uma varredura de palavras-chave para a pergunta e outra para a resposta
+            features = self._extract_question_features(question, context)
+            answer_keywords = _scan_keywords(answer)
+            
             # Verificar se precisa de visualização
-            needs_chart = self._check_if_needs_chart(question, answer)
+            needs_chart = self._check_if_needs_chart(features.keywords | answer_keywords)
             
             result = {
                 "question": question,
                 "answer": answer,
-                "confidence": self._calculate_answer_confidence(answer, data_context),
-                "sources": self._identify_data_sources(data_context),
+                "confidence": self._calculate_answer_confidence(answer_keywords, data_context),
+                "sources": self._identify_data_sources(context),
                 "timestamp": datetime.utcnow().isoformat()
             }
             
             if needs_chart:
-                result["chart_data"] = await self._prepare_chart_data(question, data_context)
-                result["chart_type"] = self._suggest_chart_type(question, data_context)
+                # Sem fonte com gráfico (período não extraído) não há corrotina a aguardar
+                if features.period is not None:
+                    result["chart_data"] = await self._prepare_chart_data(features, context)
+                else:
+                    result["chart_data"] = {}
+                result["chart_type"] = self._suggest_chart_type(features, context)
             
             return result
             
@@ -996,25 +1140,33 @@ class AIAgentService:
         
         return base_suggestions[:3]
     
-    def _extract_time_period(self, message: str) -> Dict[datetime, datetime]:
-        """Extrai período de tempo da mensagem"""
+    def _extract_time_period(
+        self,
+        message: str,
+        keywords: Optional[int] = None
+    ) -> Dict[datetime, datetime]:
+        """Extrai período de tempo da mensagem (ou da máscara já calculada)"""
         
         now = datetime.utcnow()
         
-        # Padrões comuns
-        if "hoje" in message.lower():
+        # Padrões comuns, identificados em uma única passada
+        if keywords is None:
+            keywords = _scan_keywords(message)
+        period = next((name for bit, name in _TIME_PERIOD_PRIORITY if keywords & bit), None)
+        
+        if period == "today":
             return {"start": now.replace(hour=0, minute=0, second=0), "end": now}
-        elif "ontem" in message.lower():
+        elif period == "yesterday":
             yesterday = now - timedelta(days=1)
             return {
                 "start": yesterday.replace(hour=0, minute=0, second=0),
                 "end": yesterday.replace(hour=23, minute=59, second=59)
             }
-        elif "semana" in message.lower():
+        elif period == "week":
             return {"start": now - timedelta(days=7), "end": now}
-        elif "mês" in message.lower() or "mes" in message.lower():
+        elif period == "month":
             return {"start": now - timedelta(days=30), "end": now}
-        elif "ano" in message.lower():
+        elif period == "year":
             return {"start": now - timedelta(days=365), "end": now}
         else:
             # Padrão: últimos 30 dias
@@ -1606,17 +1758,18 @@ class AIAgentService:
         
         # Análise simples de keywords para determinar dados necessários
         data = {}
+        folded = question.casefold()
         
-        if any(word in question.lower() for word in ["venda", "receita", "faturamento"]):
+        if any(word in folded for word in _SALES_KEYWORDS):
             data["sales"] = await self._get_recent_sales_summary()
         
-        if any(word in question.lower() for word in ["clima", "tempo", "temperatura", "chuva"]):
+        if any(word in folded for word in _WEATHER_KEYWORDS):
             data["weather"] = await self._get_recent_weather_summary()
         
-        if any(word in question.lower() for word in ["previsão", "futuro", "próximo"]):
+        if any(word in folded for word in _PREDICTION_KEYWORDS):
             data["predictions"] = await self._get_recent_predictions()
         
-        if any(word in question.lower() for word in ["alert", "aviso", "problema"]):
+        if any(word in folded for word in _ALERT_KEYWORDS):
             data["alerts"] = await self._get_active_alerts_summary()
         
         return data
@@ -1638,18 +1791,13 @@ class AIAgentService:
         Use linguagem clara e inclua números específicos quando relevante.
         """
     
-    def _check_if_needs_chart(self, question: str, answer: str) -> bool:
+    def _check_if_needs_chart(self, keywords: int) -> bool:
         """Verifica se a resposta seria melhor com gráfico"""
         
-        chart_keywords = [
-            "gráfico", "visualizar", "mostrar", "exibir", "plotar",
-            "evolução", "tendência", "comparar", "histórico"
-        ]
-        
-        return any(keyword in question.lower() or keyword in answer.lower() 
-                  for keyword in chart_keywords)
+        # keywords combina as máscaras da pergunta e da resposta
+        return bool(keywords & _KW_NEEDS_CHART)
     
-    def _calculate_answer_confidence(self, answer: str, data_context: Dict) -> float:
+    def _calculate_answer_confidence(self, answer_keywords: int, data_context: Dict) -> float:
         """Calcula confiança na resposta"""
         
         # Heurística simples baseada em quantidade de dados
@@ -1663,56 +1811,66 @@ class AIAgentService:
             confidence += 0.1 * min(len(data_context), 3)
         
         # Ajustar baseado na resposta
-        if "não" in answer.lower() or "insuficiente" in answer.lower():
-            confidence *= 0.7
+        mask = (answer_keywords >> _CONFIDENCE_SHIFT) & 0b11
+        confidence *= _CONFIDENCE_MULTIPLIERS[mask]
         
-        return min(confidence, 0.95)
+        return confidence if confidence < _MAX_ANSWER_CONFIDENCE else _MAX_ANSWER_CONFIDENCE
     
-    def _identify_data_sources(self, data_context: Dict) -> List[str]:
+    def _identify_data_sources(self, context: DataContext) -> List[str]:
         """Identifica fontes de dados usadas"""
         
-        sources = []
-        
-        if "sales" in data_context:
-            sources.append("Dados de vendas")
-        
-        if "weather" in data_context:
-            sources.append("Dados climáticos")
+        return list(_source_labels_for(context.sources))
+    
+    def _extract_question_features(self, question: str, context: DataContext) -> QuestionFeatures:
+        """Normaliza a pergunta; o período só é extraído se houver dados para gráfico"""
         
-        if "predictions" in data_context:
-            sources.append("Modelos preditivos")
+        keywords = _question_keywords(question)
         
-        if "alerts" in data_context:
-            sources.append("Sistema de alertas")
+        period = None
+        if context.sources & self._chart_data_builders.keys():
+            period = self._extract_time_period(question, keywords)
         
-        return sources
+        return QuestionFeatures(
+            text=question,
+            keywords=keywords,
+            period=period
+        )
     
-    async def _prepare_chart_data(self, question: str, data_context: Dict) -> Dict:
+    async def _prepare_chart_data(self, features: QuestionFeatures, context: DataContext) -> Dict:
         """Prepara dados para gráfico baseado na pergunta"""
         
         # Implementação simplificada
         # Determinar tipo de gráfico baseado na pergunta
         
-        if "sales" in data_context:
-            return await self._prepare_sales_chart_data(
-                self._extract_time_period(question),
-                None
-            )
-        elif "weather" in data_context:
-            return await self._prepare_weather_chart_data(
-                self._extract_time_period(question)
-            )
-        else:
+        if not context.sources:
+            return {}
+        
+        kind = next((k for k in self._chart_data_builders if k in context.sources), None)
+        if kind is None:
             return {}
+        
+        period = features.period
+        
+        # As consultas filtram por data, então o dia inicial/final identifica o resultado
+        cache_key = (
+            f"chart_data:{self.company_id}:{kind}:"
+            f"{period['start'].date().isoformat()}:{period['end'].date().isoformat()}"
+        )
+        
+        cached = await cache_service.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        chart_data = await self._chart_data_builders[kind](period)
+        
+        await cache_service.set(cache_key, chart_data, _CHART_DATA_CACHE_TTL)
+        
+        return chart_data
     
-    def _suggest_chart_type(self, question: str, data_context: Dict) -> str:
+    def _suggest_chart_type(self, features: QuestionFeatures, context: DataContext) -> str:
         """Sugere tipo de gráfico apropriado"""
         
-        if "evolução" in question.lower() or "histórico" in question.lower():
-            return "line"
-        elif "comparar" in question.lower():
-            return "bar"
-        elif "proporção" in question.lower() or "percentual" in question.lower():
-            return "pie"
-        else:
-            return "line"
\ No newline at end of file
+        return next(
+            (chart_type for bit, chart_type in _CHART_TYPE_PRIORITY if features.keywords & bit),
+            "line"
+        )
@@ -1,23 +1,174 @@
 # Sistema de alertas/notificações
 # backend/app/services/alert_service.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-import json
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, or_, func, case
+import orjson
 import asyncio
+import heapq
+import numbers
+import operator
 from enum import Enum
 from ..models.database import Alert, AlertRule, AlertHistory, Company, WeatherData, SalesData
 from ..models.schemas import AlertConfig, AlertTrigger, AlertResponse
 from ..core.exceptions import AlertError, ValidationError
+from ..core.cache import redis_client
 from ..services.notification_service import NotificationService
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import groupby
 import re
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+
+def _dumps(obj: Any) -> str:
+    """Serializa para texto JSON com orjson (Decimal e afins viram string)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Tamanho do lote ao percorrer o histórico de alertas
+_HISTORY_BATCH_SIZE = 500
+
+
+# Placeholders de templates de mensagem
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+_TEMPLATE_FIELD_RE = re.compile(r'\{([^{}]+)\}')
+_VALID_PLACEHOLDERS = frozenset({
+    'alert_type', 'priority', 'value', 'threshold',
+    'company_name', 'timestamp', 'location', 'product'
+})
+
+def _between(field_value: Any, value: Any, value2: Any) -> bool:
+    return value <= field_value <= value2
+
+
+def _contains(field_value: Any, value: Any) -> bool:
+    # Campo já textual dispensa a conversão com str()
+    if type(field_value) is str:
+        return value in field_value
+    return value in str(field_value)
+
+
+# Operadores de condição: (valor do campo, *argumentos) -> bool
+_CONDITION_OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'contains': _contains,
+    'between': _between,
+    'in': lambda field_value, value: field_value in value,
+    'not_in': lambda field_value, value: field_value not in value,
+}
+
+# Versões vetorizadas dos operadores numéricos, usadas na avaliação em lote
+_VECTOR_OPERATORS = {
+    operator.gt: np.greater,
+    operator.lt: np.less,
+    operator.ge: np.greater_equal,
+    operator.le: np.less_equal,
+    operator.eq: np.equal,
+    operator.ne: np.not_equal,
+    _between: lambda column, value, value2: (column >= value) & (column <= value2),
+}
+
+
+def _ignore_condition(field_value: Any, *args: Any) -> bool:
+    return True
+
+
+def _compile_conditions(conditions: List[Dict]) -> List[tuple]:
+    """Converte condições em tuplas (campo, função, argumentos)"""
+    compiled = []
+    
+    for condition in conditions:
+        # Operador desconhecido não restringe o disparo
+        evaluate = _CONDITION_OPERATORS.get(condition['operator'], _ignore_condition)
+        
+        if condition['operator'] == 'between':
+            args = (condition['value'], condition.get('value2'))
+        else:
+            args = (condition['value'],)
+        
+        compiled.append((condition['field'], evaluate, args))
+    
+    return compiled
+
+
+# O JSON armazenado na regra é a chave do cache: qualquer alteração gera nova entrada
+@lru_cache(maxsize=512)
+def _parse_conditions(conditions_json: str) -> tuple:
+    """Condições compiladas a partir do JSON da regra"""
+    return tuple(_compile_conditions(orjson.loads(conditions_json)))
+
+
+@lru_cache(maxsize=512)
+def _required_fields(conditions_json: str) -> frozenset:
+    """Campos de contexto referenciados pelas condições da regra"""
+    return frozenset(field for field, _, _ in _parse_conditions(conditions_json))
+
+
+def _evaluate_scalar(evaluate: Any, field_value: Any, args: tuple) -> bool:
+    """Avalia uma condição em um valor, tratando ausência e erros como não atendida"""
+    if field_value is None:
+        return False
+    try:
+        return bool(evaluate(field_value, *args))
+    except Exception:
+        return False
+
+
+def _evaluate_conditions_batch(conditions: tuple, records: List[Dict]) -> np.ndarray:
+    """
+    Avalia condições compiladas em vários registros de uma vez.
+    
+    Operadores numéricos com limites numéricos são aplicados sobre a coluna
+    inteira com NumPy quando todos os valores já são números; os demais
+    (contains, in, not_in, colunas com texto) caem na avaliação por linha,
+    com o mesmo resultado de _evaluate_scalar.
+    """
+    mask = np.ones(len(records), dtype=bool)
+    
+    for field, evaluate, args in conditions:
+        values = [record.get(field) for record in records]
+        vectorized = _VECTOR_OPERATORS.get(evaluate)
+        
+        # Texto numérico ("5") não pode virar float: por linha, "5" == 5 é falso
+        if vectorized is not None and all(
+            isinstance(a, (int, float)) and not isinstance(a, bool) for a in args
+        ) and all(v is None or isinstance(v, numbers.Number) for v in values):
+            try:
+                column = np.array([np.nan if v is None else v for v in values], dtype=float)
+            except (TypeError, ValueError):
+                column = None
+            
+            if column is not None:
+                # Campo ausente nunca atende a condição (inclusive para '!=')
+                with np.errstate(invalid='ignore'):
+                    mask &= ~np.isnan(column) & vectorized(column, *args)
+                continue
+        
+        mask &= np.fromiter(
+            (_evaluate_scalar(evaluate, v, args) for v in values),
+            dtype=bool,
+            count=len(values)
+        )
+    
+    return mask
+
+
+@lru_cache(maxsize=512)
+def _parse_channels(channels_json: str) -> tuple:
+    """Canais da regra a partir do JSON armazenado"""
+    return tuple(orjson.loads(channels_json))
+
 class AlertType(Enum):
     WEATHER_EXTREME = "weather_extreme"
     SALES_ANOMALY = "sales_anomaly"
@@ -30,6 +181,14 @@ class AlertPriority(Enum):
     MEDIUM = "medium"
     HIGH = "high"
     CRITICAL = "critical"
+    
+    @property
+    def rank(self) -> int:
+        """Ordem de urgência (0 = mais urgente)"""
+        return _PRIORITY_RANKS[self.value]
+
+# Ordem de urgência das prioridades; ordenar pela string daria ordem alfabética
+_PRIORITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
 
 class AlertChannel(Enum):
     EMAIL = "email"
@@ -53,7 +212,9 @@ class AlertService:
         self.db = db
         self.company_id = company_id
         self.notification_service = NotificationService(db, company_id)
-        self.cooldown_cache = {}  # Cache para cooldown de alertas
+        self.cooldown_cache = {}  # Fallback local quando o Redis está indisponível
+        self._cooldown_heap = []  # (expira_em, rule_id) em ordem de expiração
+        self._company_name: Optional[str] = None
         
     async def create_alert_rule(
         self,
@@ -83,13 +244,13 @@ class AlertService:
                 company_id=self.company_id,
                 name=name,
                 alert_type=alert_type.value,
-                conditions=json.dumps(validated_conditions),
-                channels=json.dumps([c.value for c in channels]),
+                conditions=_dumps(validated_conditions),
+                channels=_dumps([c.value for c in channels]),
                 priority=priority.value,
                 message_template=message_template or self._get_default_template(alert_type),
                 cooldown_minutes=cooldown_minutes,
                 is_active=is_active,
-                metadata=json.dumps(metadata) if metadata else None,
+                metadata=_dumps(metadata) if metadata else None,
                 created_at=datetime.utcnow()
             )
             
@@ -110,34 +271,73 @@ class AlertService:
         Verifica todas as regras ativas e dispara alertas necessários
         """
         try:
-            triggered_alerts = []
-            
-            # Buscar regras ativas
-            rules = self.db.query(AlertRule).filter(
+            to_fire = []
+            
+            # Buscar regras ativas, apenas com as colunas usadas na avaliação e no disparo
+            rules = self.db.query(AlertRule).options(
+                load_only(
+                    AlertRule.id, AlertRule.name, AlertRule.alert_type,
+                    AlertRule.conditions, AlertRule.channels, AlertRule.priority,
+                    AlertRule.message_template, AlertRule.cooldown_minutes
+                )
+            ).filter(
                 and_(
                     AlertRule.company_id == self.company_id,
                     AlertRule.is_active == True
                 )
             ).all()
             
-            for rule in rules:
-                # Verificar cooldown
-                if self._is_in_cooldown(rule.id):
-                    logger.debug(f"Rule {rule.name} in cooldown, skipping")
-                    continue
-                
-                # Verificar condições
-                should_trigger, context = await self._evaluate_rule(rule)
+            # Agrupar por tipo: os dados de contexto são buscados uma vez por tipo
+            rules.sort(key=lambda r: r.alert_type)
+            
+            for alert_type, group in groupby(rules, key=lambda r: r.alert_type):
+                type_context = None
                 
-                if should_trigger:
-                    # Disparar alerta
-                    alert_response = await self._trigger_alert(rule, context)
-                    triggered_alerts.append(alert_response)
+                for rule in group:
+                    # Verificar cooldown
+                    if await self._is_in_cooldown(rule.id):
+                        logger.debug(f"Rule {rule.name} in cooldown, skipping")
+                        continue
+                    
+                    if type_context is None:
+                        type_context = self._fetch_context_for_type(AlertType(alert_type))
+                    
+                    # Regra referencia campos que este tipo de contexto não fornece
+                    if not _required_fields(rule.conditions) <= type_context.keys():
+                        logger.debug(f"Rule {rule.name} requires fields missing from context, skipping")
+                        continue
+                    
+                    # Cópia: o contexto é alterado ao formatar a mensagem
+                    context = dict(type_context)
                     
-                    # Atualizar cooldown
-                    self._set_cooldown(rule.id, rule.cooldown_minutes)
+                    # Verificar condições
+                    should_trigger = self._evaluate_conditions_with_data(
+                        _parse_conditions(rule.conditions),
+                        context
+                    )
+                    
+                    if should_trigger:
+                        # Reivindicar cooldown; se outro worker já disparou a regra, pular
+                        if not await self._set_cooldown(rule.id, rule.cooldown_minutes):
+                            logger.debug(f"Rule {rule.name} claimed by another worker, skipping")
+                            continue
+                        
+                        to_fire.append((rule, context))
+            
+            if not to_fire:
+                return []
+            
+            # Gravar todos os alertas do ciclo em lote
+            try:
+                alert_rows = self._insert_alerts(to_fire)
+            except Exception:
+                # Nenhum alerta gravado: as regras não devem ficar silenciadas
+                await self._release_cooldowns([rule.id for rule, _ in to_fire])
+                raise
             
-            return triggered_alerts
+            # Alertas já gravados: falhas daqui em diante mantêm o cooldown,
+            # senão o próximo ciclo notificaria os mesmos alertas de novo
+            return await self._trigger_alerts(to_fire, alert_rows)
             
         except Exception as e:
             logger.error(f"Error checking alerts: {str(e)}")
@@ -162,7 +362,7 @@ class AlertService:
                 title=title,
                 message=message,
                 priority=priority.value,
-                data=json.dumps(data) if data else None,
+                data=_dumps(data) if data else None,
                 triggered_at=datetime.utcnow(),
                 is_manual=True
             )
@@ -171,24 +371,19 @@ class AlertService:
             self.db.commit()
             
             # Enviar para canais especificados
-            delivery_status = {}
-            for channel in channels:
-                success = await self._send_to_channel(
-                    channel,
-                    alert,
-                    {"title": title, "message": message}
-                )
-                delivery_status[channel.value] = success
+            delivery_status = await self._send_to_channels(
+                channels,
+                alert,
+                {"title": title, "message": message}
+            )
             
             # Registrar no histórico
-            history = AlertHistory(
-                company_id=self.company_id,
-                alert_id=alert.id,
-                rule_id=None,
-                channels_notified=json.dumps([c.value for c in channels]),
-                delivery_status=json.dumps(delivery_status),
-                created_at=datetime.utcnow()
-            )
+            history = AlertHistory(**self._build_history_row(
+                alert.id,
+                None,
+                _dumps([c.value for c in channels]),
+                delivery_status
+            ))
             
             self.db.add(history)
             self.db.commit()
@@ -219,7 +414,68 @@ class AlertService:
         Obtém histórico de alertas disparados
         """
         try:
-            query = self.db.query(AlertHistory).filter(
+            query = self._alert_history_query(start_date, end_date, alert_type).limit(limit)
+            
+            # Linhas convertidas em lotes, sem materializar o resultado inteiro
+            return [
+                self._format_history_row(h, alert, rule)
+                for h, alert, rule in query.yield_per(_HISTORY_BATCH_SIZE)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error getting alert history: {str(e)}")
+            raise AlertError(f"Failed to get alert history: {str(e)}")
+    
+    def stream_alert_history(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        alert_type: Optional[AlertType] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Gera o histórico de alertas como linhas JSON, para exportações grandes
+        
+        Gerador síncrono: a sessão é síncrona, e o StreamingResponse consome
+        iteradores síncronos no threadpool, sem bloquear o event loop.
+        """
+        try:
+            query = self._alert_history_query(start_date, end_date, alert_type)
+            if limit:
+                query = query.limit(limit)
+            
+            for h, alert, rule in query.yield_per(_HISTORY_BATCH_SIZE):
+                yield _dumps(self._format_history_row(h, alert, rule)) + "\n"
+                
+        except Exception as e:
+            # Resposta já iniciada: não há como devolver erro HTTP, encerra o stream
+            logger.error(f"Error streaming alert history: {str(e)}")
+    
+    async def get_alert_stats(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Obtém estatísticas agregadas do histórico de alertas
+        
+        Contagens calculadas no banco em uma única consulta; o detalhe
+        por alerta continua disponível em get_alert_history.
+        """
+        try:
+            # Entrega bem-sucedida: ao menos um canal com status true no JSON
+            delivered = func.sum(
+                case((AlertHistory.delivery_status.like('%true%'), 1), else_=0)
+            )
+            
+            query = self.db.query(
+                Alert.alert_type,
+                Alert.priority,
+                func.count(AlertHistory.id),
+                delivered
+            ).join(
+                Alert, Alert.id == AlertHistory.alert_id
+            ).filter(
                 AlertHistory.company_id == self.company_id
             )
             
@@ -228,45 +484,86 @@ class AlertService:
             if end_date:
                 query = query.filter(AlertHistory.created_at <= end_date)
             
-            if alert_type:
-                # Join com Alert para filtrar por tipo
-                query = query.join(Alert).filter(Alert.alert_type == alert_type.value)
-            
-            history = query.order_by(
-                AlertHistory.created_at.desc()
-            ).limit(limit).all()
-            
-            # Formatar resposta
-            formatted_history = []
-            for h in history:
-                alert = self.db.query(Alert).filter(Alert.id == h.alert_id).first()
-                rule = None
-                if h.rule_id:
-                    rule = self.db.query(AlertRule).filter(AlertRule.id == h.rule_id).first()
-                
-                formatted_history.append({
-                    'id': h.id,
-                    'alert': {
-                        'id': alert.id,
-                        'type': alert.alert_type,
-                        'title': alert.title,
-                        'message': alert.message,
-                        'priority': alert.priority
-                    },
-                    'rule': {
-                        'id': rule.id,
-                        'name': rule.name
-                    } if rule else None,
-                    'channels_notified': json.loads(h.channels_notified),
-                    'delivery_status': json.loads(h.delivery_status),
-                    'created_at': h.created_at.isoformat()
-                })
-            
-            return formatted_history
+            rows = query.group_by(Alert.alert_type, Alert.priority).all()
+            
+            total = 0
+            total_delivered = 0
+            by_type: Dict[str, int] = {}
+            by_priority: Dict[str, int] = {}
+            
+            for alert_type, priority, count, delivered_count in rows:
+                delivered_count = delivered_count or 0
+                total += count
+                total_delivered += delivered_count
+                by_type[alert_type] = by_type.get(alert_type, 0) + count
+                by_priority[priority] = by_priority.get(priority, 0) + count
+            
+            return {
+                'total': total,
+                'delivered': total_delivered,
+                'success_rate': total_delivered / total if total else 0.0,
+                'by_type': by_type,
+                'by_priority': by_priority
+            }
             
         except Exception as e:
-            logger.error(f"Error getting alert history: {str(e)}")
-            raise AlertError(f"Failed to get alert history: {str(e)}")
+            logger.error(f"Error getting alert stats: {str(e)}")
+            raise AlertError(f"Failed to get alert stats: {str(e)}")
+    
+    def _alert_history_query(
+        self,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        alert_type: Optional[AlertType]
+    ):
+        """Monta a consulta de histórico com alerta e regra associados"""
+        # Alerta e regra vêm na mesma consulta, sem uma busca extra por linha
+        query = self.db.query(AlertHistory, Alert, AlertRule).join(
+            Alert, Alert.id == AlertHistory.alert_id
+        ).outerjoin(
+            AlertRule, AlertRule.id == AlertHistory.rule_id
+        ).options(
+            # Apenas as colunas usadas na resposta
+            load_only(
+                AlertHistory.id, AlertHistory.channels_notified,
+                AlertHistory.delivery_status, AlertHistory.created_at
+            ),
+            load_only(Alert.id, Alert.alert_type, Alert.title, Alert.message, Alert.priority),
+            load_only(AlertRule.id, AlertRule.name)
+        ).filter(
+            AlertHistory.company_id == self.company_id
+        )
+        
+        if start_date:
+            query = query.filter(AlertHistory.created_at >= start_date)
+        if end_date:
+            query = query.filter(AlertHistory.created_at <= end_date)
+        
+        if alert_type:
+            query = query.filter(Alert.alert_type == alert_type.value)
+        
+        return query.order_by(AlertHistory.created_at.desc())
+    
+    @staticmethod
+    def _format_history_row(h: AlertHistory, alert: Alert, rule: Optional[AlertRule]) -> Dict:
+        """Converte uma linha do histórico no formato de resposta"""
+        return {
+            'id': h.id,
+            'alert': {
+                'id': alert.id,
+                'type': alert.alert_type,
+                'title': alert.title,
+                'message': alert.message,
+                'priority': alert.priority
+            },
+            'rule': {
+                'id': rule.id,
+                'name': rule.name
+            } if rule else None,
+            'channels_notified': orjson.loads(h.channels_notified),
+            'delivery_status': orjson.loads(h.delivery_status),
+            'created_at': h.created_at.isoformat()
+        }
     
     async def update_alert_rule(
         self,
@@ -296,9 +593,9 @@ class AlertService:
             for field, value in updates.items():
                 if field in allowed_fields:
                     if field == 'conditions':
-                        value = json.dumps(self._validate_conditions(value))
+                        value = _dumps(self._validate_conditions(value))
                     elif field == 'channels':
-                        value = json.dumps([c.value if isinstance(c, AlertChannel) else c for c in value])
+                        value = _dumps([c.value if isinstance(c, AlertChannel) else c for c in value])
                     elif field == 'priority' and isinstance(value, AlertPriority):
                         value = value.value
                     
@@ -353,7 +650,12 @@ class AlertService:
             # Alertas das últimas 24 horas que ainda estão ativos
             cutoff_time = datetime.utcnow() - timedelta(hours=24)
             
-            alerts = self.db.query(Alert).filter(
+            alerts = self.db.query(Alert).options(
+                load_only(
+                    Alert.id, Alert.alert_type, Alert.title, Alert.message,
+                    Alert.priority, Alert.triggered_at, Alert.data
+                )
+            ).filter(
                 and_(
                     Alert.company_id == self.company_id,
                     Alert.triggered_at >= cutoff_time,
@@ -362,7 +664,10 @@ class AlertService:
                         Alert.resolved_at > datetime.utcnow()
                     )
                 )
-            ).order_by(Alert.priority.desc(), Alert.triggered_at.desc()).all()
+            ).order_by(
+                case(_PRIORITY_RANKS, value=Alert.priority, else_=len(_PRIORITY_RANKS)),
+                Alert.triggered_at.desc()
+            ).all()
             
             return [
                 {
@@ -372,7 +677,7 @@ class AlertService:
                     'message': a.message,
                     'priority': a.priority,
                     'triggered_at': a.triggered_at.isoformat(),
-                    'data': json.loads(a.data) if a.data else None
+                    'data': orjson.loads(a.data) if a.data else None
                 }
                 for a in alerts
             ]
@@ -402,9 +707,9 @@ class AlertService:
             
             alert.resolved_at = datetime.utcnow()
             if resolution_note:
-                current_data = json.loads(alert.data) if alert.data else {}
+                current_data = orjson.loads(alert.data) if alert.data else {}
                 current_data['resolution_note'] = resolution_note
-                alert.data = json.dumps(current_data)
+                alert.data = _dumps(current_data)
             
             self.db.commit()
             
@@ -417,6 +722,33 @@ class AlertService:
             self.db.rollback()
             raise AlertError(f"Failed to resolve alert: {str(e)}")
     
+    async def evaluate_rule_on_records(
+        self,
+        rule_id: str,
+        records: List[Dict]
+    ) -> List[bool]:
+        """
+        Avalia regra em vários registros históricos (backfill) sem disparar alertas
+        """
+        try:
+            rule = self.db.query(AlertRule).filter(
+                and_(
+                    AlertRule.id == rule_id,
+                    AlertRule.company_id == self.company_id
+                )
+            ).first()
+            
+            if not rule:
+                raise ValidationError(f"Alert rule {rule_id} not found")
+            
+            mask = _evaluate_conditions_batch(_parse_conditions(rule.conditions), records)
+            
+            return mask.tolist()
+            
+        except Exception as e:
+            logger.error(f"Error evaluating alert rule on records: {str(e)}")
+            raise AlertError(f"Failed to evaluate alert rule on records: {str(e)}")
+    
     async def test_alert_rule(
         self,
         rule_id: str,
@@ -440,7 +772,7 @@ class AlertService:
             if test_data:
                 # Usar dados de teste fornecidos
                 should_trigger = self._evaluate_conditions_with_data(
-                    json.loads(rule.conditions),
+                    _parse_conditions(rule.conditions),
                     test_data
                 )
                 context = test_data
@@ -455,7 +787,7 @@ class AlertService:
                 'rule_name': rule.name,
                 'would_trigger': should_trigger,
                 'test_message': message,
-                'channels': json.loads(rule.channels),
+                'channels': list(_parse_channels(rule.channels)),
                 'priority': rule.priority,
                 'context_data': context
             }
@@ -489,18 +821,12 @@ class AlertService:
     
     def _validate_message_template(self, template: str) -> bool:
         """Valida template de mensagem"""
-        # Verificar placeholders válidos
-        valid_placeholders = [
-            '{alert_type}', '{priority}', '{value}', '{threshold}',
-            '{company_name}', '{timestamp}', '{location}', '{product}'
-        ]
-        
         # Extrair placeholders do template
-        placeholders = re.findall(r'\{(\w+)\}', template)
+        placeholders = _PLACEHOLDER_RE.findall(template)
         
         # Verificar se todos são válidos
         for placeholder in placeholders:
-            if f"{{{placeholder}}}" not in valid_placeholders:
+            if placeholder not in _VALID_PLACEHOLDERS:
                 logger.warning(f"Unknown placeholder in template: {{{placeholder}}}")
         
         return True
@@ -517,31 +843,76 @@ class AlertService:
         
         return templates.get(alert_type, "Alerta: {alert_type}")
     
-    def _is_in_cooldown(self, rule_id: str) -> bool:
+    def _cooldown_key(self, rule_id: str) -> str:
+        """Chave Redis do cooldown da regra"""
+        return f"alert:cooldown:{self.company_id}:{rule_id}"
+    
+    async def _is_in_cooldown(self, rule_id: str) -> bool:
         """Verifica se regra está em período de cooldown"""
-        if rule_id not in self.cooldown_cache:
-            return False
+        try:
+            return bool(await redis_client.exists(self._cooldown_key(rule_id)))
+        except Exception as e:
+            logger.warning(f"Redis unavailable for cooldown check, using local cache: {str(e)}")
+        
+        self._prune_local_cooldowns()
+        return rule_id in self.cooldown_cache
+    
+    def _prune_local_cooldowns(self) -> None:
+        """Remove cooldowns locais expirados, incluindo os de regras nunca mais consultadas"""
+        now = datetime.utcnow()
         
-        cooldown_until = self.cooldown_cache[rule_id]
-        if datetime.utcnow() < cooldown_until:
+        while self._cooldown_heap and self._cooldown_heap[0][0] <= now:
+            expires_at, rule_id = heapq.heappop(self._cooldown_heap)
+            # Renovações deixam entradas antigas no heap; só remove a vigente
+            if self.cooldown_cache.get(rule_id) == expires_at:
+                del self.cooldown_cache[rule_id]
+    
+    async def _set_cooldown(self, rule_id: str, minutes: int) -> bool:
+        """
+        Define período de cooldown para regra.
+        
+        Usa SET NX EX: retorna False se outro worker já reivindicou o cooldown.
+        """
+        if minutes <= 0:
             return True
         
-        # Limpar cache expirado
-        del self.cooldown_cache[rule_id]
-        return False
+        try:
+            claimed = await redis_client.set(
+                self._cooldown_key(rule_id), "1", ex=minutes * 60, nx=True
+            )
+            return bool(claimed)
+        except Exception as e:
+            logger.warning(f"Redis unavailable for cooldown, using local cache: {str(e)}")
+        
+        expires_at = datetime.utcnow() + timedelta(minutes=minutes)
+        self.cooldown_cache[rule_id] = expires_at
+        heapq.heappush(self._cooldown_heap, (expires_at, rule_id))
+        return True
     
-    def _set_cooldown(self, rule_id: str, minutes: int):
-        """Define período de cooldown para regra"""
-        self.cooldown_cache[rule_id] = datetime.utcnow() + timedelta(minutes=minutes)
+    async def _release_cooldowns(self, rule_ids: List[str]) -> None:
+        """Libera cooldowns reivindicados cujo disparo falhou"""
+        for rule_id in rule_ids:
+            self.cooldown_cache.pop(rule_id, None)
+        
+        try:
+            await redis_client.delete(*(self._cooldown_key(rule_id) for rule_id in rule_ids))
+        except Exception as e:
+            logger.warning(f"Redis unavailable, could not release cooldowns: {str(e)}")
     
     async def _evaluate_rule(self, rule: AlertRule) -> tuple[bool, Dict]:
         """Avalia se regra deve ser disparada"""
-        conditions = json.loads(rule.conditions)
-        alert_type = AlertType(rule.alert_type)
+        conditions = _parse_conditions(rule.conditions)
         
         # Buscar dados relevantes baseado no tipo de alerta
-        context = {}
+        context = self._fetch_context_for_type(AlertType(rule.alert_type))
         
+        # Avaliar condições
+        should_trigger = self._evaluate_conditions_with_data(conditions, context)
+        
+        return should_trigger, context
+    
+    def _fetch_context_for_type(self, alert_type: AlertType) -> Dict:
+        """Busca os dados usados pelas regras de um tipo de alerta"""
         if alert_type == AlertType.WEATHER_EXTREME:
             # Buscar dados climáticos atuais
             weather = self.db.query(WeatherData).filter(
@@ -552,7 +923,7 @@ class AlertService:
             ).first()
             
             if weather:
-                context = {
+                return {
                     'temperature': weather.temperature,
                     'precipitation': weather.precipitation,
                     'humidity': weather.humidity,
@@ -560,49 +931,51 @@ class AlertService:
                 }
         
         elif alert_type == AlertType.SALES_ANOMALY:
-            # Buscar dados de vendas recentes
-            recent_sales = self.db.query(SalesData).filter(
-                and_(
-                    SalesData.company_id == self.company_id,
-                    SalesData.date >= (datetime.utcnow() - timedelta(days=1)).date()
-                )
-            ).order_by(SalesData.date.desc()).first()
-            
-            if recent_sales:
-                # Calcular média histórica
-                avg_sales = self.db.query(
-                    func.avg(SalesData.revenue)
-                ).filter(
-                    and_(
-                        SalesData.company_id == self.company_id,
-                        SalesData.date >= (datetime.utcnow() - timedelta(days=30)).date()
-                    )
-                ).scalar()
-                
-                context = {
-                    'current_sales': recent_sales.revenue,
-                    'average_sales': avg_sales or 0,
-                    'deviation': abs(recent_sales.revenue - (avg_sales or 0)) / (avg_sales or 1) * 100
-                }
+            return self._fetch_sales_context()
         
-        # Avaliar condições
-        should_trigger = self._evaluate_conditions_with_data(conditions, context)
+        return {}
+    
+    def _fetch_sales_context(self) -> Dict:
+        """Venda mais recente e média de 30 dias em uma única consulta"""
         
-        return should_trigger, context
+        # Média histórica como subconsulta escalar da busca pela venda mais recente
+        avg_sales_subquery = self.db.query(
+            func.avg(SalesData.revenue)
+        ).filter(
+            and_(
+                SalesData.company_id == self.company_id,
+                SalesData.date >= (datetime.utcnow() - timedelta(days=30)).date()
+            )
+        ).scalar_subquery()
+        
+        row = self.db.query(
+            SalesData.revenue,
+            avg_sales_subquery
+        ).filter(
+            and_(
+                SalesData.company_id == self.company_id,
+                SalesData.date >= (datetime.utcnow() - timedelta(days=1)).date()
+            )
+        ).order_by(SalesData.date.desc()).first()
+        
+        if not row:
+            return {}
+        
+        current_sales, avg_sales = row
+        return {
+            'current_sales': current_sales,
+            'average_sales': avg_sales or 0,
+            'deviation': abs(current_sales - (avg_sales or 0)) / (avg_sales or 1) * 100
+        }
     
     def _evaluate_conditions_with_data(
         self,
-        conditions: List[Dict],
+        conditions: tuple,
         data: Dict
     ) -> bool:
-        """Avalia condições com dados fornecidos"""
+        """Avalia condições já compiladas com dados fornecidos"""
         
-        for condition in conditions:
-            field = condition['field']
-            operator = condition['operator']
-            value = condition['value']
-            value2 = condition.get('value2')
-            
+        for field, evaluate, args in conditions:
             # Obter valor do campo nos dados
             field_value = data.get(field)
             
@@ -612,36 +985,8 @@ class AlertService:
             
             # Avaliar condição
             try:
-                if operator == '>':
-                    if not (field_value > value):
-                        return False
-                elif operator == '<':
-                    if not (field_value < value):
-                        return False
-                elif operator == '>=':
-                    if not (field_value >= value):
-                        return False
-                elif operator == '<=':
-                    if not (field_value <= value):
-                        return False
-                elif operator == '==':
-                    if not (field_value == value):
-                        return False
-                elif operator == '!=':
-                    if not (field_value != value):
-                        return False
-                elif operator == 'contains':
-                    if value not in str(field_value):
-                        return False
-                elif operator == 'between':
-                    if not (value <= field_value <= value2):
-                        return False
-                elif operator == 'in':
-                    if field_value not in value:
-                        return False
-                elif operator == 'not_in':
-                    if field_value in value:
-                        return False
+                if not evaluate(field_value, *args):
+                    return False
             except Exception as e:
                 logger.error(f"Error evaluating condition: {str(e)}")
                 return False
@@ -649,69 +994,99 @@ class AlertService:
         # Todas as condições foram atendidas
         return True
     
-    async def _trigger_alert(
+    def _build_alert_row(self, rule: AlertRule, context: Dict) -> Dict[str, Any]:
+        """Monta colunas do alerta a partir de regra disparada"""
+        # Formatar antes de serializar: a formatação adiciona campos ao contexto
+        message = self._format_message(rule.message_template, context)
+        
+        return {
+            'company_id': self.company_id,
+            'alert_type': rule.alert_type,
+            'title': rule.name,
+            'message': message,
+            'priority': rule.priority,
+            'data': _dumps(context),
+            'triggered_at': datetime.utcnow(),
+            'rule_id': rule.id
+        }
+    
+    def _build_history_row(
         self,
-        rule: AlertRule,
-        context: Dict
-    ) -> AlertResponse:
-        """Dispara alerta baseado em regra"""
+        alert_id: str,
+        rule_id: Optional[str],
+        channels_notified: str,
+        delivery_status: Dict[str, bool]
+    ) -> Dict[str, Any]:
+        """Monta colunas do histórico de um alerta enviado"""
+        return {
+            'company_id': self.company_id,
+            'alert_id': alert_id,
+            'rule_id': rule_id,
+            'channels_notified': channels_notified,
+            'delivery_status': _dumps(delivery_status),
+            'created_at': datetime.utcnow()
+        }
+    
+    def _insert_alerts(self, to_fire: List[tuple[AlertRule, Dict]]) -> List[Dict]:
+        """Grava os alertas de várias regras em lote e retorna as linhas (com id)"""
         try:
-            # Formatar mensagem
-            message = self._format_message(rule.message_template, context)
-            
-            # Criar alerta
-            alert = Alert(
-                company_id=self.company_id,
-                alert_type=rule.alert_type,
-                title=rule.name,
-                message=message,
-                priority=rule.priority,
-                data=json.dumps(context),
-                triggered_at=datetime.utcnow(),
-                rule_id=rule.id
-            )
-            
-            self.db.add(alert)
+            # return_defaults preenche o id de cada linha
+            alert_rows = [self._build_alert_row(rule, context) for rule, context in to_fire]
+            self.db.bulk_insert_mappings(Alert, alert_rows, return_defaults=True)
             self.db.commit()
+            return alert_rows
             
-            # Enviar para canais configurados
-            channels = json.loads(rule.channels)
-            delivery_status = {}
-            
-            for channel_str in channels:
-                channel = AlertChannel(channel_str)
-                success = await self._send_to_channel(channel, alert, context)
-                delivery_status[channel_str] = success
-            
-            # Registrar no histórico
-            history = AlertHistory(
-                company_id=self.company_id,
-                alert_id=alert.id,
-                rule_id=rule.id,
-                channels_notified=rule.channels,
-                delivery_status=json.dumps(delivery_status),
-                created_at=datetime.utcnow()
-            )
-            
-            self.db.add(history)
+        except Exception as e:
+            logger.error(f"Error saving alerts: {str(e)}")
+            self.db.rollback()
+            raise AlertError(f"Failed to save alerts: {str(e)}")
+    
+    async def _trigger_alerts(
+        self,
+        to_fire: List[tuple[AlertRule, Dict]],
+        alert_rows: List[Dict]
+    ) -> List[AlertResponse]:
+        """Notifica e registra o histórico de alertas já gravados"""
+        try:
+            # Instâncias transitórias (fora da sessão) apenas para o envio
+            alerts = [Alert(**row) for row in alert_rows]
+            
+            # Enviar para os canais de todas as regras em uma única onda
+            channels_per_rule = [list(_parse_channels(rule.channels)) for rule, _ in to_fire]
+            deliveries = await asyncio.gather(*[
+                self._send_to_channels([AlertChannel(c) for c in channels], alert, context)
+                for (_, context), alert, channels in zip(to_fire, alerts, channels_per_rule)
+            ])
+            
+            # Registrar histórico em lote com um único commit
+            self.db.bulk_insert_mappings(AlertHistory, [
+                self._build_history_row(alert.id, rule.id, rule.channels, delivery_status)
+                for (rule, _), alert, delivery_status in zip(to_fire, alerts, deliveries)
+            ])
             self.db.commit()
             
-            logger.info(f"Alert triggered: {rule.name} for company {self.company_id}")
+            responses = []
+            for (rule, _), alert, channels, delivery_status in zip(
+                to_fire, alerts, channels_per_rule, deliveries
+            ):
+                logger.info(f"Alert triggered: {rule.name} for company {self.company_id}")
+                
+                responses.append(AlertResponse(
+                    alert_id=alert.id,
+                    title=rule.name,
+                    message=alert.message,
+                    priority=rule.priority,
+                    channels_notified=channels,
+                    delivery_status=delivery_status,
+                    triggered_at=alert.triggered_at.isoformat()
+                ))
             
-            return AlertResponse(
-                alert_id=alert.id,
-                title=rule.name,
-                message=message,
-                priority=rule.priority,
-                channels_notified=channels,
-                delivery_status=delivery_status,
-                triggered_at=alert.triggered_at.isoformat()
-            )
+            return responses
             
         except Exception as e:
-            logger.error(f"Error triggering alert: {str(e)}")
+            logger.error(f"Error triggering alerts: {str(e)}")
             self.db.rollback()
-            raise AlertError(f"Failed to trigger alert: {str(e)}")
+            raise AlertError(f"Failed to trigger alerts: {str(e)}")
     
     def _format_message(self, template: str, context: Dict) -> str:
         """Formata mensagem com dados do contexto"""
@@ -721,24 +1096,45 @@ class AlertService:
         context['timestamp'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M')
         context['company_name'] = self._get_company_name()
         
-        # Substituir placeholders
-        for key, value in context.items():
-            placeholder = f"{{{key}}}"
-            if placeholder in message:
-                message = message.replace(placeholder, str(value))
-        
-        # Limpar placeholders não utilizados
-        message = re.sub(r'\{[^}]+\}', '', message)
+        # Uma passada: só campos simples {nome} são substituídos; ausentes e
+        # demais placeholders viram string vazia. O template vem do usuário,
+        # então nada de str.format ({value:>999999999}, {company_name.__class__}).
+        def replace(match: re.Match) -> str:
+            field = match.group(1)
+            return str(context.get(field, '')) if field.isidentifier() else ''
         
-        return message
+        return _TEMPLATE_FIELD_RE.sub(replace, message)
     
     def _get_company_name(self) -> str:
-        """Obtém nome da empresa"""
-        company = self.db.query(Company).filter(
-            Company.id == self.company_id
-        ).first()
+        """Obtém nome da empresa (consultado uma vez por instância)"""
+        if self._company_name is None:
+            company = self.db.query(Company).filter(
+                Company.id == self.company_id
+            ).first()
+            
+            self._company_name = company.name if company else "Company"
+        
+        return self._company_name
+    
+    async def _send_to_channels(
+        self,
+        channels: List[AlertChannel],
+        alert: Alert,
+        context: Dict
+    ) -> Dict[str, bool]:
+        """Envia alerta para todos os canais em paralelo"""
+        results = await asyncio.gather(
+            *[self._send_to_channel(channel, alert, context) for channel in channels],
+            return_exceptions=True
+        )
+        
+        delivery_status = {}
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending to channel {channel}: {str(result)}")
+            delivery_status[channel.value] = result is True
         
-        return company.name if company else "Company"
+        return delivery_status
     
     async def _send_to_channel(
         self,
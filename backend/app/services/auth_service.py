@@ -4,13 +4,22 @@ Service de autenticação para o sistema WeatherBiz Analytics.
 Gerencia login, tokens JWT, refresh tokens e reset de senha.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set, Tuple
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import multiprocessing
+import os
 import secrets
 import logging
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, bindparam, insert, update
+from sqlalchemy.exc import IntegrityError
 from jose import JWTError
+import redis.asyncio as redis
 
 from app.models.user import User
 from app.models.company import Company
@@ -19,31 +28,271 @@ from app.models.schemas import (
     TokenResponse, PasswordReset
 )
 from app.config.settings import settings
+from app.config.database import AsyncSessionLocal
 from app.config.security import (
-    verify_password, get_password_hash,
-    create_access_token, create_refresh_token,
+    verify_password, password_needs_rehash, get_password_hash,
+    create_access_token, generate_refresh_token, hash_refresh_token,
+    create_signed_token, get_signed_token_user_id, verify_signed_token,
     decode_token, TokenType, UserRole
 )
 from app.core.exceptions import (
     InvalidCredentials, TokenExpired, InvalidToken,
     NotFoundError, ValidationError, AuthenticationError
 )
+from app.core.bg import task_queue
+from app.core.cache import redis_client
 from app.integrations.notifications.email import EmailService
 
 logger = logging.getLogger(__name__)
 
 
+# Hash usado quando o usuário não existe, para que o tempo de resposta
+# do login não revele se o email está cadastrado
+_DUMMY_PASSWORD_HASH = get_password_hash(secrets.token_urlsafe(16))
+
+# Limita operações de hash simultâneas para que logins em paralelo
+# não acumulem trabalho sem limite na fila do pool
+_PASSWORD_HASH_SEMAPHORE = asyncio.Semaphore((os.cpu_count() or 1) * 2)
+
+# Pool de processos para bcrypt (criado no primeiro uso). forkserver evita
+# copiar o estado da aplicação para os workers.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    """Retorna o pool de processos de hashing."""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _hash_pool
+
+
+async def _run_in_hash_pool(func, *args):
+    """Executa função de hashing em outro processo, sem bloquear o event loop."""
+    async with _PASSWORD_HASH_SEMAPHORE:
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_hash_pool(), func, *args
+        )
+
+
+async def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica senha."""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    """Gera hash de senha em outro processo (bcrypt bloquearia o event loop)."""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def _rehash_password(user_id: int, password: str, old_hash: str) -> None:
+    """Refaz hash com esquema/custo atual, fora do fluxo do login."""
+    new_hash = await hash_password(password)
+    
+    async with AsyncSessionLocal() as db:
+        # Só substitui se a senha não mudou nesse meio tempo
+        await db.execute(
+            update(User).where(
+                and_(User.id == user_id, User.hashed_password == old_hash)
+            ).values(hashed_password=new_hash)
+        )
+        await db.commit()
+
+
+# Colunas usadas na autenticação; evita carregar o modelo User inteiro
+_AUTH_COLUMNS = (
+    User.id, User.email, User.full_name, User.hashed_password,
+    User.is_active, User.is_verified, User.locked_until,
+    User.company_id, User.role
+)
+
+
+# ==================== QUERIES ====================
+
+# Consultas montadas uma única vez; parâmetros via bindparam na execução
+_USER_AUTH_BY_EMAIL = select(*_AUTH_COLUMNS).where(User.email == bindparam("email"))
+
+_USER_TOKEN_CLAIMS_BY_ID = select(
+    User.is_active, User.company_id, User.role
+).where(User.id == bindparam("user_id"))
+
+_USER_EMAIL_BY_ID = select(User.email).where(User.id == bindparam("user_id"))
+
+_USER_PASSWORD_BY_ID = select(
+    User.email, User.full_name, User.hashed_password
+).where(User.id == bindparam("user_id"))
+
+_USER_RESET_BY_EMAIL = select(
+    User.id, User.email, User.full_name, User.hashed_password
+).where(User.email == bindparam("email"))
+
+_ACTIVE_USER_ID = select(User.id).where(
+    and_(
+        User.id == bindparam("user_id"),
+        User.is_active == True
+    )
+)
+
+
+# ==================== LOGIN THROTTLING ====================
+
+# Tentativas de login falhadas contadas no Redis; o banco só é escrito no bloqueio
+MAX_FAILED_LOGIN_ATTEMPTS = 5
+FAILED_LOGIN_WINDOW_SECONDS = 900
+ACCOUNT_LOCK_MINUTES = 30
+
+# Solicitações de reset de senha por email dentro da janela
+MAX_PASSWORD_RESET_REQUESTS = 5
+PASSWORD_RESET_WINDOW_SECONDS = 3600
+
+# Validade dos tokens assinados enviados por email
+PASSWORD_RESET_TOKEN_TTL = timedelta(hours=1)
+EMAIL_VERIFICATION_TOKEN_TTL = timedelta(days=7)
+
+
+# ==================== TOKEN CACHE ====================
+
+# Payloads de access tokens já verificados (assinatura + usuário ativo)
+_TOKEN_CACHE_TTL = 60
+_TOKEN_CACHE_MAXSIZE = 100_000
+
+# hash do token -> (payload, expira_em); ordem de inserção = ordem LRU
+_validated_tokens: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+# Índice reverso para invalidação: user_id -> hashes de tokens em cache
+_user_token_hashes: Dict[int, Set[bytes]] = defaultdict(set)
+
+
+def _token_hash(token: str) -> bytes:
+    """Chave do cache (o token em si não é armazenado)."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _forget_token_hash(user_id: int, token_hash: bytes) -> None:
+    """Remove o hash do índice reverso; o conjunto vazio do usuário é descartado."""
+    hashes = _user_token_hashes.get(user_id)
+    if hashes is None:
+        return
+    hashes.discard(token_hash)
+    if not hashes:
+        del _user_token_hashes[user_id]
+
+
+def _get_cached_token(token_hash: bytes) -> Optional[Dict[str, Any]]:
+    """Retorna payload em cache se ainda válido."""
+    entry = _validated_tokens.get(token_hash)
+    if entry is None:
+        return None
+    
+    payload, expires_at = entry
+    if expires_at <= time.time():
+        _validated_tokens.pop(token_hash, None)
+        _forget_token_hash(int(payload["sub"]), token_hash)
+        return None
+    
+    _validated_tokens.move_to_end(token_hash)
+    return payload
+
+
+def _cache_validated_token(token_hash: bytes, payload: Dict[str, Any]) -> None:
+    """Armazena payload verificado até min(exp, agora + TTL)."""
+    user_id = int(payload["sub"])
+    expires_at = min(float(payload["exp"]), time.time() + _TOKEN_CACHE_TTL)
+    
+    _validated_tokens[token_hash] = (payload, expires_at)
+    _validated_tokens.move_to_end(token_hash)
+    _user_token_hashes[user_id].add(token_hash)
+    
+    while len(_validated_tokens) > _TOKEN_CACHE_MAXSIZE:
+        evicted_hash, (evicted_payload, _) = _validated_tokens.popitem(last=False)
+        _forget_token_hash(int(evicted_payload["sub"]), evicted_hash)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Remove do cache os tokens validados de um usuário."""
+    for token_hash in _user_token_hashes.pop(user_id, ()):
+        _validated_tokens.pop(token_hash, None)
+
+
+# ==================== REFRESH TOKENS ====================
+
+# Refresh tokens ficam apenas no Redis: rt:{hash} -> user_id com TTL, e
+# rt:user:{user_id} guarda as chaves de cada usuário (logout/revogação)
+REFRESH_TOKEN_TTL_SECONDS = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def _refresh_token_key(refresh_token: str) -> str:
+    """Chave Redis do refresh token (o token em si não é armazenado)."""
+    return f"rt:{hash_refresh_token(refresh_token).hex()}"
+
+
+def _user_refresh_tokens_key(user_id: int) -> str:
+    """Chave do conjunto de refresh tokens de um usuário."""
+    return f"rt:user:{user_id}"
+
+
+async def _revoke_refresh_tokens(redis_conn: redis.Redis, *user_ids: int) -> None:
+    """Remove todos os refresh tokens dos usuários."""
+    user_keys = [_user_refresh_tokens_key(user_id) for user_id in user_ids]
+    
+    pipe = redis_conn.pipeline()
+    for user_key in user_keys:
+        pipe.smembers(user_key)
+    token_keys = set().union(*await pipe.execute())
+    
+    await redis_conn.delete(*user_keys, *token_keys)
+
+
+# ==================== ACTIVE USERS ====================
+
+# Bitmap no Redis: bit N = usuário N ativo. Populado sob demanda em
+# validate_token; bit zerado apenas significa "consultar o banco".
+ACTIVE_USERS_KEY = "auth:active_users"
+
+
+async def revoke_user_access(*user_ids: int) -> None:
+    """
+    Remove usuários do bitmap de ativos, do cache de tokens e encerra
+    seus refresh tokens.
+    
+    Deve ser chamado por todo fluxo que desativa ou exclui usuários.
+    
+    Args:
+        user_ids: IDs dos usuários
+    """
+    for user_id in user_ids:
+        invalidate_user_tokens(user_id)
+    
+    if not user_ids:
+        return
+    
+    try:
+        pipe = redis_client.pipeline()
+        for user_id in user_ids:
+            pipe.setbit(ACTIVE_USERS_KEY, user_id, 0)
+        await pipe.execute()
+        
+        await _revoke_refresh_tokens(redis_client, *user_ids)
+    except Exception as e:
+        logger.error(f"Redis error revoking access for users {user_ids}: {e}")
+
+
 class AuthService:
     """Service para autenticação e autorização."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, redis_conn: Optional[redis.Redis] = None):
         """
         Inicializa o service.
         
         Args:
             db: Sessão do banco de dados
+            redis_conn: Cliente Redis (padrão: cliente compartilhado)
         """
         self.db = db
+        self.redis = redis_conn or redis_client
         self.email_service = EmailService()
     
     async def login(self, credentials: LoginRequest) -> TokenResponse:
@@ -61,58 +310,67 @@ class AuthService:
             AuthenticationError: Se conta bloqueada
         """
         # Busca usuário
-        query = select(User).where(
-            User.email == credentials.email.lower()
+        result = await self.db.execute(
+            _USER_AUTH_BY_EMAIL, {"email": credentials.email}
         )
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+        user = result.mappings().one_or_none()
         
         if not user:
+            await _verify_password(credentials.password, _DUMMY_PASSWORD_HASH)
             logger.warning(f"Login attempt for non-existent user: {credentials.email}")
             raise InvalidCredentials()
         
         # Verifica se conta está bloqueada
-        if user.is_locked:
-            logger.warning(f"Login attempt for locked account: {user.email}")
+        if user["locked_until"] and datetime.now(timezone.utc) < user["locked_until"]:
+            logger.warning(f"Login attempt for locked account: {user['email']}")
             raise AuthenticationError("Conta bloqueada. Tente novamente mais tarde")
         
         # Verifica senha
-        if not user.verify_password(credentials.password):
-            user.increment_failed_login()
-            await self.db.commit()
-            logger.warning(f"Invalid password for user: {user.email}")
+        if not await _verify_password(credentials.password, user["hashed_password"]):
+            await self._register_failed_login(user["id"], user["email"])
+            logger.warning(f"Invalid password for user: {user['email']}")
             raise InvalidCredentials()
         
         # Verifica se usuário está ativo
-        if not user.is_active:
+        if not user["is_active"]:
             raise AuthenticationError("Conta desativada")
         
         # Verifica se email foi verificado
-        if not user.is_verified and not settings.DEBUG:
+        if not user["is_verified"] and not settings.DEBUG:
             raise AuthenticationError("Email não verificado. Verifique sua caixa de entrada")
         
         # Atualiza último login
-        user.update_last_login(
-            ip_address=credentials.ip_address if hasattr(credentials, 'ip_address') else None
+        login_values = {
+            "last_login_at": datetime.now(timezone.utc),
+            "last_login_ip": credentials.ip_address if hasattr(credentials, 'ip_address') else None,
+            "failed_login_attempts": 0
+        }
+        
+        await self.db.execute(
+            update(User).where(User.id == user["id"]).values(**login_values)
         )
         
         # Gera tokens
         access_token = create_access_token(
-            user_id=user.id,
-            company_id=user.company_id,
-            role=user.role
+            user_id=user["id"],
+            company_id=user["company_id"],
+            role=user["role"]
         )
         
-        refresh_token = create_refresh_token(
-            user_id=user.id,
-            company_id=user.company_id
+        # Commit (banco), refresh token e contador de falhas (Redis) são independentes
+        _, refresh_token, _ = await asyncio.gather(
+            self.db.commit(),
+            self._issue_refresh_token(user["id"]),
+            self._clear_failed_logins(user["id"])
         )
         
-        # Salva refresh token
-        user.refresh_token = refresh_token
-        await self.db.commit()
+        # Hash obsoleto ou com custo baixo: refeito em background
+        if password_needs_rehash(user["hashed_password"]):
+            await task_queue.submit(
+                _rehash_password, user["id"], credentials.password, user["hashed_password"]
+            )
         
-        logger.info(f"Successful login for user: {user.email}")
+        logger.info(f"Successful login for user: {user['email']}")
         
         return TokenResponse(
             access_token=access_token,
@@ -139,69 +397,81 @@ class AuthService:
         Raises:
             ValidationError: Se dados inválidos
         """
-        # Verifica se email já existe
-        query = select(User).where(User.email == user_data.email.lower())
-        result = await self.db.execute(query)
-        if result.scalar_one_or_none():
-            raise ValidationError(
-                "Email já cadastrado",
-                fields={"email": "Este email já está em uso"}
-            )
+        hashed_password = await hash_password(user_data.password)
         
-        # Se deve criar empresa
-        company_id = user_data.company_id
-        if create_company:
-            company = Company(
-                name=user_data.full_name + "'s Company",
-                slug=user_data.email.split('@')[0] + "-company",
-                email=user_data.email,
-                timezone=user_data.timezone,
-                language=user_data.language,
-                plan="trial",
-                status="trial",
-                trial_ends_at=datetime.now(timezone.utc) + timedelta(days=14)
+        # Email duplicado é detectado pelo índice único, sem consulta prévia
+        try:
+            # Se deve criar empresa
+            company_id = user_data.company_id
+            if create_company:
+                company = Company(
+                    name=user_data.full_name + "'s Company",
+                    slug=user_data.email.split('@')[0] + "-company",
+                    email=user_data.email,
+                    timezone=user_data.timezone,
+                    language=user_data.language,
+                    plan="trial",
+                    status="trial",
+                    trial_ends_at=datetime.now(timezone.utc) + timedelta(days=14),
+                    current_users_count=1,  # Já conta o usuário criado abaixo
+                    active_users_count=1
+                )
+                self.db.add(company)
+                await self.db.flush()  # Para obter o ID
+                company_id = company.id
+                
+                # Primeiro usuário vira admin
+                user_data.role = UserRole.COMPANY_ADMIN
+            
+            if not company_id:
+                raise ValidationError("company_id é obrigatório")
+            
+            # Cria usuário; RETURNING devolve a linha completa sem refresh
+            result = await self.db.execute(
+                insert(User).values(
+                    email=user_data.email,
+                    username=user_data.username,
+                    full_name=user_data.full_name,
+                    phone=user_data.phone,
+                    company_id=company_id,
+                    role=user_data.role,
+                    timezone=user_data.timezone,
+                    language=user_data.language,
+                    hashed_password=hashed_password,
+                    is_active=True,
+                    is_verified=False  # Precisa verificar email
+                ).returning(User)
             )
-            self.db.add(company)
-            await self.db.flush()  # Para obter o ID
-            company_id = company.id
+            user = result.scalar_one()
+            
+            # Atualiza contador da empresa existente
+            if not create_company:
+                await self.db.execute(
+                    update(Company).where(Company.id == company_id).values(
+                        current_users_count=Company.current_users_count + 1,
+                        active_users_count=Company.active_users_count + 1
+                    )
+                )
             
-            # Primeiro usuário vira admin
-            user_data.role = UserRole.COMPANY_ADMIN
-        
-        if not company_id:
-            raise ValidationError("company_id é obrigatório")
-        
-        # Cria usuário
-        user = User(
-            email=user_data.email.lower(),
-            username=user_data.username,
-            full_name=user_data.full_name,
-            phone=user_data.phone,
-            company_id=company_id,
-            role=user_data.role,
-            timezone=user_data.timezone,
-            language=user_data.language,
-            hashed_password=get_password_hash(user_data.password),
-            is_active=True,
-            is_verified=False  # Precisa verificar email
-        )
-        
-        # Gera token de verificação de email
-        user.email_verification_token = secrets.token_urlsafe(32)
-        
-        self.db.add(user)
-        
-        # Atualiza contador da empresa
-        company_query = select(Company).where(Company.id == company_id)
-        company_result = await self.db.execute(company_query)
-        company = company_result.scalar_one()
-        company.current_users_count += 1
-        
-        await self.db.commit()
-        await self.db.refresh(user)
+            await self.db.commit()
+            
+        except IntegrityError as e:
+            await self.db.rollback()
+            if "email" in str(e.orig):
+                raise ValidationError(
+                    "Email já cadastrado",
+                    fields={"email": "Este email já está em uso"}
+                )
+            raise
         
-        # Envia email de verificação
-        await self._send_verification_email(user)
+        # Envia email de verificação (token assinado, nada gravado no banco)
+        verification_token = create_signed_token(
+            user.id, TokenType.EMAIL_VERIFICATION, EMAIL_VERIFICATION_TOKEN_TTL
+        )
+        await task_queue.submit(
+            self._send_verification_email,
+            user.email, user.full_name, verification_token
+        )
         
         logger.info(f"New user registered: {user.email}")
         
@@ -220,53 +490,41 @@ class AuthService:
         Raises:
             InvalidToken: Se token inválido
         """
-        try:
-            # Decodifica refresh token
-            payload = decode_token(refresh_token, TokenType.REFRESH)
-            user_id = int(payload.get("sub"))
-            
-            # Busca usuário
-            query = select(User).where(
-                and_(
-                    User.id == user_id,
-                    User.refresh_token == refresh_token
-                )
-            )
-            result = await self.db.execute(query)
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                raise InvalidToken()
-            
-            if not user.is_active:
-                raise AuthenticationError("Conta desativada")
-            
-            # Gera novo access token
-            access_token = create_access_token(
-                user_id=user.id,
-                company_id=user.company_id,
-                role=user.role
-            )
-            
-            # Opcionalmente, gera novo refresh token
-            new_refresh_token = create_refresh_token(
-                user_id=user.id,
-                company_id=user.company_id
-            )
-            
-            user.refresh_token = new_refresh_token
-            await self.db.commit()
-            
-            return TokenResponse(
-                access_token=access_token,
-                refresh_token=new_refresh_token,
-                token_type="bearer",
-                expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-            )
-            
-        except (JWTError, ValueError) as e:
-            logger.error(f"Invalid refresh token: {e}")
+        # Rotação: GETDEL remove o token usado atomicamente (não pode ser reusado);
+        # tokens expirados já foram removidos pelo TTL
+        token_key = _refresh_token_key(refresh_token)
+        user_id = await self.redis.getdel(token_key)
+        
+        if user_id is None:
+            raise InvalidToken()
+        
+        user_id = int(user_id)
+        await self.redis.srem(_user_refresh_tokens_key(user_id), token_key)
+        
+        result = await self.db.execute(_USER_TOKEN_CLAIMS_BY_ID, {"user_id": user_id})
+        row = result.mappings().one_or_none()
+        
+        if not row:
             raise InvalidToken()
+        
+        if not row["is_active"]:
+            raise AuthenticationError("Conta desativada")
+        
+        # Gera novo access token
+        access_token = create_access_token(
+            user_id=user_id,
+            company_id=row["company_id"],
+            role=row["role"]
+        )
+        
+        new_refresh_token = await self._issue_refresh_token(user_id)
+        
+        return TokenResponse(
+            access_token=access_token,
+            refresh_token=new_refresh_token,
+            token_type="bearer",
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
     
     async def logout(self, user_id: int) -> bool:
         """
@@ -278,14 +536,14 @@ class AuthService:
         Returns:
             bool: Sucesso
         """
-        query = select(User).where(User.id == user_id)
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
-        
-        if user:
-            user.refresh_token = None
-            await self.db.commit()
-            logger.info(f"User logged out: {user.email}")
+        result = await self.db.execute(_USER_EMAIL_BY_ID, {"user_id": user_id})
+        email = result.scalar_one_or_none()
+        
+        if email:
+            # Encerra todas as sessões do usuário
+            await _revoke_refresh_tokens(self.redis, user_id)
+            invalidate_user_tokens(user_id)
+            logger.info(f"User logged out: {email}")
             return True
         
         return False
@@ -301,24 +559,38 @@ class AuthService:
             bool: Sucesso (sempre True por segurança)
         """
         # Sempre retorna True para não revelar se email existe
-        query = select(User).where(User.email == email.lower())
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
-        
-        if user:
-            # Gera token de reset
-            user.reset_password_token = secrets.token_urlsafe(32)
-            user.reset_password_expires = datetime.now(timezone.utc) + timedelta(hours=1)
-            
-            await self.db.commit()
-            
-            # Envia email
-            await self._send_password_reset_email(user)
-            
-            logger.info(f"Password reset requested for: {user.email}")
+        if await self._hit_counter(
+            f"auth:reset:{email.lower()}", PASSWORD_RESET_WINDOW_SECONDS
+        ) > MAX_PASSWORD_RESET_REQUESTS:
+            logger.warning(f"Password reset rate limit reached for: {email}")
+            return True
+        
+        # Busca, escrita e email ficam fora da requisição: o tempo de resposta
+        # não depende de o email existir
+        await task_queue.submit(self._do_password_reset, email.lower())
         
         return True
     
+    async def _do_password_reset(self, email: str) -> None:
+        """Gera token de reset e envia email (executado em background)."""
+        # Sessão própria: a sessão da requisição já foi encerrada
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(_USER_RESET_BY_EMAIL, {"email": email})
+            user = result.mappings().one_or_none()
+        
+        if not user:
+            return
+        
+        # Vinculado ao hash atual: o token deixa de valer após a troca de senha
+        reset_token = create_signed_token(
+            user["id"], TokenType.RESET_PASSWORD, PASSWORD_RESET_TOKEN_TTL,
+            binding=user["hashed_password"]
+        )
+        
+        await self._send_password_reset_email(user["email"], user["full_name"], reset_token)
+        
+        logger.info(f"Password reset requested for: {user['email']}")
+    
     async def reset_password(self, reset_data: PasswordReset) -> bool:
         """
         Reseta senha do usuário.
@@ -330,30 +602,57 @@ class AuthService:
             bool: Sucesso
             
         Raises:
-            InvalidToken: Se token inválido ou expirado
+            InvalidToken: Se token inválido ou já utilizado
+            TokenExpired: Se token expirado
         """
-        query = select(User).where(
-            User.reset_password_token == reset_data.token
-        )
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+        try:
+            user_id = get_signed_token_user_id(reset_data.token)
+        except ValueError:
+            raise InvalidToken()
+        
+        result = await self.db.execute(_USER_PASSWORD_BY_ID, {"user_id": user_id})
+        user = result.mappings().one_or_none()
         
         if not user:
             raise InvalidToken()
         
-        # Verifica se token expirou
-        if user.reset_password_expires < datetime.now(timezone.utc):
+        try:
+            _, expires_at = verify_signed_token(
+                reset_data.token, TokenType.RESET_PASSWORD,
+                binding=user["hashed_password"]
+            )
+        except ValueError:
+            raise InvalidToken()
+        
+        if expires_at < datetime.now(timezone.utc):
             raise TokenExpired()
         
-        # Atualiza senha
-        user.set_password(reset_data.new_password)
+        hashed_password = await hash_password(reset_data.new_password)
+        
+        # Condição no hash antigo: dois resets simultâneos não usam o mesmo token
+        result = await self.db.execute(
+            update(User).where(
+                and_(
+                    User.id == user_id,
+                    User.hashed_password == user["hashed_password"]
+                )
+            ).values(
+                **User.password_hash_values(hashed_password)
+            ).returning(User.id)
+        )
+        
+        if result.scalar_one_or_none() is None:
+            raise InvalidToken()
         
         await self.db.commit()
+        invalidate_user_tokens(user_id)
         
         # Envia confirmação por email
-        await self._send_password_changed_email(user)
+        await task_queue.submit(
+            self._send_password_changed_email, user["email"], user["full_name"]
+        )
         
-        logger.info(f"Password reset completed for: {user.email}")
+        logger.info(f"Password reset completed for: {user['email']}")
         
         return True
     
@@ -368,23 +667,33 @@ class AuthService:
             bool: Sucesso
             
         Raises:
-            InvalidToken: Se token inválido
+            InvalidToken: Se token inválido ou email já verificado
+            TokenExpired: Se token expirado
         """
-        query = select(User).where(
-            User.email_verification_token == token
+        try:
+            user_id, expires_at = verify_signed_token(token, TokenType.EMAIL_VERIFICATION)
+        except ValueError:
+            raise InvalidToken()
+        
+        if expires_at < datetime.now(timezone.utc):
+            raise TokenExpired()
+        
+        result = await self.db.execute(
+            update(User).where(
+                and_(
+                    User.id == user_id,
+                    User.is_verified == False
+                )
+            ).values(is_verified=True).returning(User.email)
         )
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+        email = result.scalar_one_or_none()
         
-        if not user:
+        if not email:
             raise InvalidToken()
         
-        user.is_verified = True
-        user.email_verification_token = None
-        
         await self.db.commit()
         
-        logger.info(f"Email verified for: {user.email}")
+        logger.info(f"Email verified for: {email}")
         
         return True
     
@@ -408,26 +717,32 @@ class AuthService:
         Raises:
             InvalidCredentials: Se senha atual incorreta
         """
-        query = select(User).where(User.id == user_id)
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+        result = await self.db.execute(_USER_PASSWORD_BY_ID, {"user_id": user_id})
+        user = result.mappings().one_or_none()
         
         if not user:
             raise NotFoundError("User", user_id)
         
         # Verifica senha atual
-        if not user.verify_password(current_password):
+        if not await _verify_password(current_password, user["hashed_password"]):
             raise InvalidCredentials()
         
         # Atualiza senha
-        user.set_password(new_password)
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(
+                **User.password_hash_values(await hash_password(new_password))
+            )
+        )
         
         await self.db.commit()
+        invalidate_user_tokens(user_id)
         
         # Envia confirmação
-        await self._send_password_changed_email(user)
+        await task_queue.submit(
+            self._send_password_changed_email, user["email"], user["full_name"]
+        )
         
-        logger.info(f"Password changed for: {user.email}")
+        logger.info(f"Password changed for: {user['email']}")
         
         return True
     
@@ -444,68 +759,153 @@ class AuthService:
         Raises:
             InvalidToken: Se token inválido
         """
+        token_hash = _token_hash(token)
+        
+        # Token já verificado recentemente: sem assinatura nem consulta
+        cached_payload = _get_cached_token(token_hash)
+        if cached_payload is not None:
+            return cached_payload
+        
         try:
             payload = decode_token(token, TokenType.ACCESS)
             
             # Verifica se usuário ainda existe e está ativo
             user_id = int(payload.get("sub"))
-            query = select(User).where(
-                and_(
-                    User.id == user_id,
-                    User.is_active == True
-                )
-            )
-            result = await self.db.execute(query)
-            user = result.scalar_one_or_none()
-            
-            if not user:
+            if not await self._is_user_active(user_id):
                 raise InvalidToken()
             
+            _cache_validated_token(token_hash, payload)
+            
             return payload
             
         except (JWTError, ValueError) as e:
             logger.error(f"Invalid access token: {e}")
             raise InvalidToken()
     
+    # ==================== TOKEN HELPERS ====================
+    
+    async def _issue_refresh_token(self, user_id: int) -> str:
+        """Gera refresh token opaco e registra seu hash no Redis."""
+        refresh_token = generate_refresh_token()
+        token_key = _refresh_token_key(refresh_token)
+        user_key = _user_refresh_tokens_key(user_id)
+        
+        pipe = self.redis.pipeline()
+        pipe.set(token_key, user_id, ex=REFRESH_TOKEN_TTL_SECONDS)
+        pipe.sadd(user_key, token_key)
+        pipe.expire(user_key, REFRESH_TOKEN_TTL_SECONDS)
+        await pipe.execute()
+        
+        return refresh_token
+    
+    async def _is_user_active(self, user_id: int) -> bool:
+        """Consulta o bitmap de ativos; no miss, consulta o banco e marca o bit."""
+        try:
+            if await self.redis.getbit(ACTIVE_USERS_KEY, user_id):
+                return True
+        except Exception as e:
+            logger.error(f"Redis error checking active user {user_id}: {e}")
+        
+        result = await self.db.execute(_ACTIVE_USER_ID, {"user_id": user_id})
+        if result.scalar_one_or_none() is None:
+            return False
+        
+        try:
+            await self.redis.setbit(ACTIVE_USERS_KEY, user_id, 1)
+        except Exception as e:
+            logger.error(f"Redis error marking active user {user_id}: {e}")
+        
+        return True
+    
+    # ==================== THROTTLING HELPERS ====================
+    
+    async def _hit_counter(self, key: str, window_seconds: int) -> int:
+        """Incrementa contador com expiração; 0 se o Redis estiver indisponível."""
+        try:
+            count = await self.redis.incr(key)
+            if count == 1:
+                await self.redis.expire(key, window_seconds)
+            return count
+        except Exception as e:
+            logger.error(f"Redis counter error for {key}: {e}")
+            return 0
+    
+    async def _register_failed_login(self, user_id: int, email: str) -> None:
+        """Conta falha de login no Redis e bloqueia a conta ao atingir o limite."""
+        count = await self._hit_counter(
+            f"auth:fail:{user_id}", FAILED_LOGIN_WINDOW_SECONDS
+        )
+        
+        if count == 0:
+            # Sem Redis: contador no banco
+            result = await self.db.execute(
+                update(User).where(User.id == user_id).values(
+                    failed_login_attempts=User.failed_login_attempts + 1
+                ).returning(User.failed_login_attempts)
+            )
+            if result.scalar_one() < MAX_FAILED_LOGIN_ATTEMPTS:
+                await self.db.commit()
+                return
+        
+        elif count < MAX_FAILED_LOGIN_ATTEMPTS:
+            return
+        
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(
+                failed_login_attempts=max(count, MAX_FAILED_LOGIN_ATTEMPTS),
+                locked_until=datetime.now(timezone.utc) + timedelta(minutes=ACCOUNT_LOCK_MINUTES)
+            )
+        )
+        await self.db.commit()
+        await self._clear_failed_logins(user_id)
+        logger.warning(f"Account locked after repeated failed logins: {email}")
+    
+    async def _clear_failed_logins(self, user_id: int) -> None:
+        """Zera contador de falhas de login."""
+        try:
+            await self.redis.delete(f"auth:fail:{user_id}")
+        except Exception as e:
+            logger.error(f"Redis error clearing failed logins for user {user_id}: {e}")
+    
     # ==================== EMAIL HELPERS ====================
     
-    async def _send_verification_email(self, user: User) -> None:
+    async def _send_verification_email(self, email: str, full_name: str, token: str) -> None:
         """Envia email de verificação."""
-        verification_url = f"{settings.FRONTEND_URL}/verify-email?token={user.email_verification_token}"
+        verification_url = f"{settings.FRONTEND_URL}/verify-email?token={token}"
         
         await self.email_service.send_email(
-            to=user.email,
+            to=email,
             subject="Verifique seu email - WeatherBiz Analytics",
             template="email_verification",
             context={
-                "user_name": user.full_name,
+                "user_name": full_name,
                 "verification_url": verification_url
             }
         )
     
-    async def _send_password_reset_email(self, user: User) -> None:
+    async def _send_password_reset_email(self, email: str, full_name: str, token: str) -> None:
         """Envia email de reset de senha."""
-        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={user.reset_password_token}"
+        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={token}"
         
         await self.email_service.send_email(
-            to=user.email,
+            to=email,
             subject="Reset de Senha - WeatherBiz Analytics",
             template="password_reset",
             context={
-                "user_name": user.full_name,
+                "user_name": full_name,
                 "reset_url": reset_url,
                 "expires_in": "1 hora"
             }
         )
     
-    async def _send_password_changed_email(self, user: User) -> None:
+    async def _send_password_changed_email(self, email: str, full_name: str) -> None:
         """Envia email de confirmação de mudança de senha."""
         await self.email_service.send_email(
-            to=user.email,
+            to=email,
             subject="Senha Alterada - WeatherBiz Analytics",
             template="password_changed",
             context={
-                "user_name": user.full_name,
+                "user_name": full_name,
                 "changed_at": datetime.now(timezone.utc).strftime("%d/%m/%Y %H:%M")
             }
         )
\ No newline at end of file
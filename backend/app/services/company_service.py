@@ -4,13 +4,20 @@ Service de gerenciamento de empresas (tenants) para o sistema WeatherBiz Analyti
 Implementa operações multi-tenant, planos e limites.
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Set, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 import logging
+import itertools
+import re
+import time
+from types import MappingProxyType
 from decimal import Decimal
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, bindparam, cast, exists, func, update, JSON
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import load_only, raiseload, selectinload
 
 from app.models.company import Company, CompanyPlan, CompanyStatus
 from app.models.user import User, UserRole
@@ -20,14 +27,241 @@ from app.models.schemas import (
     UserCreate, WeatherStationCreate
 )
 from app.config.settings import settings
+from app.config.database import AsyncSessionLocal
 from app.core.exceptions import (
     NotFoundError, DuplicateError, ValidationError,
     BusinessLogicError, PlanLimitExceeded
 )
 from app.core.utils import slugify, is_valid_cnpj
+from app.core.cache import cache_service
+from app.core.bg import Debouncer, task_queue
+from app.services.auth_service import hash_password, revoke_user_access
 
 logger = logging.getLogger(__name__)
 
+# Tentativas de INSERT quando o slug já existe (concorrência)
+MAX_SLUG_ATTEMPTS = 5
+
+# Usuários desativados por transação após o soft delete de uma empresa
+USER_DEACTIVATION_CHUNK_SIZE = 10_000
+
+# Limites do plano inicial, resolvidos uma única vez
+_FREE_PLAN_LIMITS = MappingProxyType({
+    field: settings.PLAN_LIMITS["free"][field]
+    for field in ("max_users", "max_alerts", "max_api_calls_daily", "data_retention_days")
+})
+
+# Leituras de empresa não carregam relacionamentos implicitamente: lazy load
+# gera N+1 (e falha em AsyncSession). Em DEBUG, acessar um relacionamento não
+# carregado levanta erro na hora; quem precisar dele deve pedir explicitamente,
+# ex.: .options(selectinload(Company.weather_stations), *_NO_LAZY_LOAD)
+_NO_LAZY_LOAD = (raiseload("*"),) if settings.DEBUG else ()
+
+# Buscas por id/slug montadas uma única vez: o SQL gerado é sempre o mesmo e
+# reaproveita o cache de compilação e o prepared statement da conexão
+_COMPANY_BY_ID = select(Company).where(
+    Company.id == bindparam("company_id")
+).options(*_NO_LAZY_LOAD)
+
+_COMPANY_BY_SLUG = select(Company).where(
+    and_(Company.slug == bindparam("slug"), Company.deleted_at.is_(None))
+).options(*_NO_LAZY_LOAD)
+
+# Validador de CompanyResponse montado uma única vez e reutilizado
+_COMPANY_ADAPTER = TypeAdapter(CompanyResponse)
+
+# Colunas lidas por check_limits/usage_percentage
+_LIMITS_COLUMNS = (
+    Company.id, Company.slug, Company.name, Company.plan, Company.status,
+    Company.trial_ends_at, Company.api_calls_today, Company.max_api_calls_daily,
+    Company.current_users_count, Company.max_users,
+    Company.current_alerts_count, Company.max_alerts
+)
+
+# Colunas usadas em get_company_statistics (sem JSONs de configuração/metadata)
+_STATS_COLUMNS = _LIMITS_COLUMNS + (
+    Company.active_users_count, Company.storage_used_mb,
+    Company.api_calls_month, Company.created_at
+)
+
+
+# ==================== COMPANY CACHE ====================
+
+# Empresas mudam raramente; leituras por id/slug são servidas da memória
+_COMPANY_CACHE_TTL = 60
+_COMPANY_CACHE_MAXSIZE = 10_000
+
+# ("id", id) ou ("slug", slug) -> (resposta, expira_em); ordem de inserção = ordem LRU
+_company_cache: "OrderedDict[Tuple[str, Any], Tuple[CompanyResponse, float]]" = OrderedDict()
+
+
+def _get_cached_company(key: Tuple[str, Any]) -> Optional[CompanyResponse]:
+    """Retorna cópia profunda da empresa em cache (settings/metadata são dicts mutáveis)."""
+    entry = _company_cache.get(key)
+    if entry is None:
+        return None
+    
+    response, expires_at = entry
+    if expires_at <= time.time():
+        _company_cache.pop(key, None)
+        return None
+    
+    _company_cache.move_to_end(key)
+    return response.model_copy(deep=True)
+
+
+def _cache_company(response: CompanyResponse, by_slug: bool = False) -> None:
+    """
+    Armazena empresa na chave de id e, se veio de busca por slug, na de slug.
+    
+    A busca por id também retorna empresas excluídas; gravar a chave de slug
+    nesse caso esconderia uma empresa ativa que reutilizou o mesmo slug.
+    """
+    expires_at = time.time() + _COMPANY_CACHE_TTL
+    
+    keys = [("id", response.id)]
+    if by_slug:
+        keys.append(("slug", response.slug))
+    
+    for key in keys:
+        _company_cache[key] = (response, expires_at)
+        _company_cache.move_to_end(key)
+    
+    while len(_company_cache) > _COMPANY_CACHE_MAXSIZE:
+        _company_cache.popitem(last=False)
+
+
+# ==================== STATISTICS CACHE ====================
+
+# Estatísticas de dashboard toleram alguns segundos de atraso; compartilhadas
+# entre workers via Redis
+COMPANY_STATS_CACHE_TTL = 30
+
+
+def _stats_cache_key(company_id: int) -> str:
+    """Chave das estatísticas da empresa no cache."""
+    return f"company:stats:{company_id}"
+
+
+async def invalidate_company_statistics(company_id: int) -> None:
+    """
+    Remove estatísticas da empresa do cache.
+    
+    Deve ser chamado por fluxos que alteram usuários, vendas ou alertas da empresa.
+    
+    Args:
+        company_id: ID da empresa
+    """
+    await cache_service.delete(_stats_cache_key(company_id))
+
+
+def _merge_metadata(values: Dict[str, Any]) -> Dict[Any, Any]:
+    """
+    Valores de UPDATE que mesclam chaves no JSON metadata no próprio banco.
+    
+    Os valores podem ser expressões SQL (ex.: func.now()).
+    """
+    column = Company.__table__.c.metadata
+    pairs = [item for key_value in values.items() for item in key_value]
+    return {
+        column: cast(cast(column, JSONB).op("||")(func.jsonb_build_object(*pairs)), JSON)
+    }
+
+
+def invalidate_company_cache(company_id: int, slug: Optional[str] = None) -> None:
+    """
+    Remove empresa do cache.
+    
+    Deve ser chamado por todo fluxo que altera a empresa.
+    
+    Args:
+        company_id: ID da empresa
+        slug: Slug da empresa (atual, antes de uma eventual alteração)
+    """
+    entry = _company_cache.pop(("id", company_id), None)
+    if entry is not None:
+        _company_cache.pop(("slug", entry[0].slug), None)
+    if slug is not None:
+        _company_cache.pop(("slug", slug), None)
+
+
+# ==================== ONBOARDING ====================
+
+# Um lote já em gravação pode terminar depois da conclusão do onboarding;
+# empresas concluídas não voltam a um passo intermediário. Core (tabela) para
+# o executemany não ser tratado como bulk UPDATE por chave primária do ORM.
+_companies = Company.__table__
+_UPDATE_ONBOARDING_STEP = (
+    update(_companies)
+    .where(
+        _companies.c.id == bindparam("company_id"),
+        _companies.c.onboarding_completed.isnot(True)
+    )
+    .values(onboarding_step=bindparam("step"))
+)
+
+
+async def _flush_onboarding_steps(steps: Dict[int, int]) -> None:
+    """
+    Grava em lote o último passo de onboarding de cada empresa.
+    
+    Args:
+        steps: company_id -> passo atual
+    """
+    async with AsyncSessionLocal() as db:
+        # Um único UPDATE executado em lote (executemany)
+        await db.execute(_UPDATE_ONBOARDING_STEP, [
+            {"company_id": company_id, "step": step}
+            for company_id, step in steps.items()
+        ])
+        await db.commit()
+    
+    for company_id in steps:
+        invalidate_company_cache(company_id)
+
+
+# Passos intermediários chegam em rajadas; só o último de cada empresa é gravado.
+# Iniciado/encerrado no lifespan da aplicação.
+onboarding_writes = Debouncer(_flush_onboarding_steps, interval=0.25)
+
+
+# ==================== USER DEACTIVATION ====================
+
+async def deactivate_company_users(company_id: int) -> None:
+    """
+    Desativa os usuários de uma empresa em lotes, cada um em sua transação.
+    
+    Lotes curtos mantêm os locks de linha por pouco tempo mesmo em
+    empresas com muitos usuários.
+    
+    Args:
+        company_id: ID da empresa
+    """
+    batch = select(User.id).where(
+        and_(User.company_id == company_id, User.is_active == True)
+    ).limit(USER_DEACTIVATION_CHUNK_SIZE).scalar_subquery()
+    
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(User)
+                .where(User.id.in_(batch))
+                .values(is_active=False)
+                .returning(User.id)
+                .execution_options(synchronize_session=False)
+            )
+            user_ids = result.scalars().all()
+            await db.commit()
+        
+        await revoke_user_access(*user_ids)
+        total += len(user_ids)
+        
+        if len(user_ids) < USER_DEACTIVATION_CHUNK_SIZE:
+            break
+    
+    logger.info(f"Deactivated {total} users of deleted company {company_id}")
+
 
 class CompanyService:
     """Service para gerenciamento de empresas."""
@@ -59,14 +293,18 @@ class CompanyService:
         Raises:
             NotFoundError: Se empresa não encontrada
         """
-        query = select(Company).where(Company.id == company_id)
-        result = await self.db.execute(query)
-        company = result.scalar_one_or_none()
-        
-        if not company:
-            raise NotFoundError("Company", company_id)
+        response = _get_cached_company(("id", company_id))
         
-        response = CompanyResponse.model_validate(company)
+        if response is None:
+            result = await self.db.execute(_COMPANY_BY_ID, {"company_id": company_id})
+            company = result.scalar_one_or_none()
+            
+            if not company:
+                raise NotFoundError("Company", company_id)
+            
+            response = _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
+            _cache_company(response)
+            response = response.model_copy(deep=True)
         
         if include_stats:
             stats = await self.get_company_statistics(company_id)
@@ -90,14 +328,20 @@ class CompanyService:
         Raises:
             NotFoundError: Se empresa não encontrada
         """
-        query = select(Company).where(Company.slug == slug)
-        result = await self.db.execute(query)
+        cached = _get_cached_company(("slug", slug))
+        if cached is not None:
+            return cached
+        
+        result = await self.db.execute(_COMPANY_BY_SLUG, {"slug": slug})
         company = result.scalar_one_or_none()
         
         if not company:
             raise NotFoundError("Company", f"slug={slug}")
         
-        return CompanyResponse.model_validate(company)
+        response = _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
+        _cache_company(response, by_slug=True)
+        
+        return response.model_copy(deep=True)
     
     async def create_company(
         self,
@@ -119,24 +363,16 @@ class CompanyService:
             ValidationError: Se dados inválidos
         """
         # Valida CNPJ se fornecido
-        if company_data.cnpj:
-            if not is_valid_cnpj(company_data.cnpj):
-                raise ValidationError("CNPJ inválido")
-            
-            # Verifica se CNPJ já existe
-            cnpj_query = select(Company).where(Company.cnpj == company_data.cnpj)
-            cnpj_result = await self.db.execute(cnpj_query)
-            if cnpj_result.scalar_one_or_none():
-                raise DuplicateError("Company", "cnpj", company_data.cnpj)
+        if company_data.cnpj and not is_valid_cnpj(company_data.cnpj):
+            raise ValidationError("CNPJ inválido")
         
-        # Gera slug único
         base_slug = slugify(company_data.slug or company_data.name)
-        slug = await self._generate_unique_slug(base_slug)
         
-        # Cria empresa
-        company = Company(
+        # Hash fora do event loop e antes de abrir a transação
+        hashed_password = await hash_password(owner_data.password)
+        
+        company_values = dict(
             name=company_data.name,
-            slug=slug,
             legal_name=company_data.legal_name,
             cnpj=company_data.cnpj,
             business_type=company_data.business_type,
@@ -151,16 +387,46 @@ class CompanyService:
             # Configurações de plano trial
             plan=CompanyPlan.FREE,
             status=CompanyStatus.TRIAL,
-            trial_ends_at=datetime.now(timezone.utc) + timedelta(days=14),
+            trial_ends_at=func.now() + timedelta(days=14),
             # Limites do plano
-            max_users=settings.PLAN_LIMITS["free"]["max_users"],
-            max_alerts=settings.PLAN_LIMITS["free"]["max_alerts"],
-            max_api_calls_daily=settings.PLAN_LIMITS["free"]["max_api_calls_daily"],
-            data_retention_days=settings.PLAN_LIMITS["free"]["data_retention_days"]
+            **_FREE_PLAN_LIMITS,
+            current_users_count=1,  # Já conta o administrador criado abaixo
+            active_users_count=1
         )
         
-        self.db.add(company)
-        await self.db.flush()  # Para obter o ID
+        # Cria empresa; slug e CNPJ únicos são garantidos pelos índices do banco.
+        # Em conflito o INSERT não insere nada (sem erro nem savepoint).
+        slug = base_slug
+        for _ in range(MAX_SLUG_ATTEMPTS):
+            result = await self.db.execute(
+                pg_insert(Company)
+                .values(slug=slug, **company_values)
+                .on_conflict_do_nothing()
+                .returning(Company)
+            )
+            company = result.scalar_one_or_none()
+            if company:
+                break
+            
+            # Slugs base/base-N e CNPJ em uma única consulta
+            conflicts = [
+                Company.slug.regexp_match(f"^{re.escape(base_slug)}(-[0-9]+)?$")
+            ]
+            if company_data.cnpj:
+                conflicts.append(Company.cnpj == company_data.cnpj)
+            
+            result = await self.db.execute(
+                select(Company.slug, Company.cnpj).where(or_(*conflicts))
+            )
+            existing = result.all()
+            
+            # Conflito de CNPJ é definitivo; de slug, usa o próximo sufixo livre
+            if company_data.cnpj and any(row.cnpj == company_data.cnpj for row in existing):
+                raise DuplicateError("Company", "cnpj", company_data.cnpj)
+            
+            slug = self._next_free_slug(base_slug, {row.slug for row in existing})
+        else:
+            raise DuplicateError("Company", "slug", base_slug)
         
         # Cria usuário administrador
         admin_user = User(
@@ -172,7 +438,7 @@ class CompanyService:
             role=UserRole.COMPANY_ADMIN,
             timezone=owner_data.timezone or company.timezone,
             language=owner_data.language or company.language,
-            hashed_password=get_password_hash(owner_data.password),
+            hashed_password=hashed_password,
             is_active=True,
             is_verified=False,
             is_superuser=False
@@ -194,15 +460,14 @@ class CompanyService:
             )
             self.db.add(weather_station)
         
-        # Atualiza contador
-        company.current_users_count = 1
-        
         await self.db.commit()
-        await self.db.refresh(company)
+        await invalidate_company_statistics(company.id)
+        # Slug pode estar em cache de uma empresa excluída que o usava
+        _company_cache.pop(("slug", company.slug), None)
         
         logger.info(f"Company created: {company.name} (ID: {company.id})")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def update_company(
         self,
@@ -222,21 +487,28 @@ class CompanyService:
         Raises:
             NotFoundError: Se empresa não encontrada
         """
-        company = await self._get_company_for_update(company_id)
+        # Atualiza apenas colunas da empresa
+        columns = Company.__mapper__.column_attrs.keys()
+        update_data = {
+            field: value
+            for field, value in company_data.model_dump(exclude_unset=True).items()
+            if field in columns
+        }
+        
+        if not update_data:
+            return await self.get_company_by_id(company_id)
         
-        # Atualiza campos fornecidos
-        update_data = company_data.model_dump(exclude_unset=True)
+        company = await self._update_company(company_id, update_data)
         
-        for field, value in update_data.items():
-            if hasattr(company, field):
-                setattr(company, field, value)
+        if not company:
+            raise NotFoundError("Company", company_id)
         
         await self.db.commit()
-        await self.db.refresh(company)
+        await self._invalidate_caches(company_id, company.slug)
         
         logger.info(f"Company updated: {company.name}")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def upgrade_plan(
         self,
@@ -261,23 +533,26 @@ class CompanyService:
         if new_plan not in settings.PLAN_LIMITS:
             raise ValidationError(f"Plano inválido: {new_plan}")
         
-        company = await self._get_company_for_update(company_id)
-        
         # Atualiza plano e limites
-        company.upgrade_plan(new_plan)
+        values = Company.plan_values(new_plan)
         
         # Define período de assinatura
         if billing_period == "monthly":
-            company.subscription_ends_at = datetime.now(timezone.utc) + timedelta(days=30)
+            values["subscription_ends_at"] = func.now() + timedelta(days=30)
         elif billing_period == "yearly":
-            company.subscription_ends_at = datetime.now(timezone.utc) + timedelta(days=365)
+            values["subscription_ends_at"] = func.now() + timedelta(days=365)
+        
+        company = await self._update_company(company_id, values)
+        
+        if not company:
+            raise NotFoundError("Company", company_id)
         
         await self.db.commit()
-        await self.db.refresh(company)
+        await self._invalidate_caches(company_id, company.slug)
         
         logger.info(f"Company plan upgraded: {company.name} to {new_plan}")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def suspend_company(
         self,
@@ -294,30 +569,29 @@ class CompanyService:
         Returns:
             CompanyResponse: Empresa suspensa
         """
-        company = await self._get_company_for_update(company_id)
-        
-        company.status = CompanyStatus.SUSPENDED
+        values = {"status": CompanyStatus.SUSPENDED, "active_users_count": 0}
         
         if reason:
-            company.metadata = {
-                **company.metadata,
+            values.update(_merge_metadata({
                 "suspension_reason": reason,
-                "suspended_at": datetime.now(timezone.utc).isoformat()
-            }
+                "suspended_at": func.now()
+            }))
         
-        # Desativa todos os usuários
-        await self.db.execute(
-            update(User)
-            .where(User.company_id == company_id)
-            .values(is_active=False)
+        # Empresa e todos os usuários desativados em um único comando
+        company, user_ids = await self._update_company_and_users(
+            company_id, values, {"is_active": False}
         )
         
+        if not company:
+            raise NotFoundError("Company", company_id)
+        
         await self.db.commit()
-        await self.db.refresh(company)
+        await self._invalidate_caches(company_id, company.slug)
+        await revoke_user_access(*user_ids)
         
         logger.warning(f"Company suspended: {company.name}")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def reactivate_company(
         self,
@@ -332,31 +606,28 @@ class CompanyService:
         Returns:
             CompanyResponse: Empresa reativada
         """
-        company = await self._get_company_for_update(company_id)
+        # Só empresas suspensas são reativadas; usuários reativados no mesmo comando
+        company, _ = await self._update_company_and_users(
+            company_id,
+            {
+                "status": CompanyStatus.ACTIVE,
+                "active_users_count": Company.current_users_count
+            },
+            {"is_active": True},
+            Company.status == CompanyStatus.SUSPENDED,
+            user_conditions=(User.deleted_at.is_(None),)
+        )
         
-        if company.status != CompanyStatus.SUSPENDED:
+        if not company:
+            await self._get_company_for_update(company_id, (Company.id,))
             raise BusinessLogicError("Empresa não está suspensa")
         
-        company.status = CompanyStatus.ACTIVE
-        
-        # Reativa usuários
-        await self.db.execute(
-            update(User)
-            .where(
-                and_(
-                    User.company_id == company_id,
-                    User.deleted_at.is_(None)
-                )
-            )
-            .values(is_active=True)
-        )
-        
         await self.db.commit()
-        await self.db.refresh(company)
+        await self._invalidate_caches(company_id, company.slug)
         
         logger.info(f"Company reactivated: {company.name}")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def check_and_update_limits(
         self,
@@ -371,31 +642,49 @@ class CompanyService:
         Returns:
             dict: Status dos limites
         """
-        company = await self._get_company_for_update(company_id)
+        # Data do último reset diário comparada no próprio banco: o JSON
+        # metadata não precisa ser lido nem reenviado
+        today = func.to_char(func.timezone("UTC", func.now()), "YYYY-MM-DD")
+        last_reset = cast(Company.__table__.c.metadata, JSONB)["last_reset_date"].astext
+        
+        result = await self.db.execute(
+            select(Company, last_reset.is_distinct_from(today).label("needs_reset"))
+            .where(Company.id == company_id)
+            .options(load_only(*_LIMITS_COLUMNS), *_NO_LAZY_LOAD)
+        )
+        row = result.one_or_none()
+        
+        if row is None:
+            raise NotFoundError("Company", company_id)
+        
+        company, needs_reset = row
+        values = {}
         
         # Verifica trial expirado
-        if company.status == CompanyStatus.TRIAL:
-            if company.trial_ends_at < datetime.now(timezone.utc):
-                company.status = CompanyStatus.EXPIRED
-                logger.warning(f"Company trial expired: {company.name}")
+        trial_expired = (
+            company.status == CompanyStatus.TRIAL
+            and company.trial_ends_at < datetime.now(timezone.utc)
+        )
+        if trial_expired:
+            values["status"] = CompanyStatus.EXPIRED
         
         # Reseta contadores diários
-        if hasattr(company, 'last_reset_date'):
-            last_reset = company.metadata.get('last_reset_date')
-            today = datetime.now(timezone.utc).date()
+        if needs_reset:
+            values["api_calls_today"] = 0
+            values.update(_merge_metadata({"last_reset_date": today}))
+        
+        # Só escreve quando algo mudou, em um único UPDATE
+        if values:
+            company = await self._update_company(company_id, values)
+            await self.db.commit()
+            await self._invalidate_caches(company_id, company.slug)
             
-            if not last_reset or last_reset != today.isoformat():
-                company.reset_daily_counters()
-                company.metadata = {
-                    **company.metadata,
-                    'last_reset_date': today.isoformat()
-                }
+            if trial_expired:
+                logger.warning(f"Company trial expired: {company.name}")
         
         # Verifica limites
         limits_status = company.check_limits()
         
-        await self.db.commit()
-        
         return {
             "company_id": company_id,
             "plan": company.plan,
@@ -417,55 +706,37 @@ class CompanyService:
         Returns:
             dict: Estatísticas
         """
-        company = await self._get_company_for_update(company_id)
-        
-        # Contagem de usuários
-        users_query = select(func.count()).where(
-            and_(
-                User.company_id == company_id,
-                User.deleted_at.is_(None)
-            )
-        )
-        users_result = await self.db.execute(users_query)
-        total_users = users_result.scalar()
-        
-        # Contagem de usuários ativos
-        active_users_query = select(func.count()).where(
-            and_(
-                User.company_id == company_id,
-                User.is_active == True,
-                User.deleted_at.is_(None)
-            )
-        )
-        active_users_result = await self.db.execute(active_users_query)
-        active_users = active_users_result.scalar()
+        cached = await cache_service.get(_stats_cache_key(company_id))
+        if cached is not None:
+            return cached
         
-        # Outras estatísticas
         from app.models.sales import SalesData
-        from app.models.alert import Alert
         
-        # Total de vendas
-        sales_query = select(func.sum(SalesData.revenue)).where(
+        # Usuários e alertas vêm dos contadores da própria empresa; só a
+        # receita é agregada, como subconsulta da mesma leitura
+        revenue_query = select(
+            func.coalesce(func.sum(SalesData.revenue), 0)
+        ).where(
             SalesData.company_id == company_id
+        ).scalar_subquery()
+        
+        result = await self.db.execute(
+            select(Company, revenue_query.label("total_revenue"))
+            .where(Company.id == company_id)
+            .options(load_only(*_STATS_COLUMNS), *_NO_LAZY_LOAD)
         )
-        sales_result = await self.db.execute(sales_query)
-        total_revenue = sales_result.scalar() or Decimal(0)
-        
-        # Alertas ativos
-        alerts_query = select(func.count()).where(
-            and_(
-                Alert.company_id == company_id,
-                Alert.status.in_(["pending", "triggered"])
-            )
-        )
-        alerts_result = await self.db.execute(alerts_query)
-        active_alerts = alerts_result.scalar()
+        row = result.one_or_none()
         
-        return {
-            "total_users": total_users,
-            "active_users": active_users,
-            "total_revenue": float(total_revenue),
-            "active_alerts": active_alerts,
+        if row is None:
+            raise NotFoundError("Company", company_id)
+        
+        company, total_revenue = row
+        
+        statistics = {
+            "total_users": company.current_users_count,
+            "active_users": company.active_users_count,
+            "total_revenue": float(total_revenue or Decimal(0)),
+            "active_alerts": company.current_alerts_count,
             "storage_used_mb": float(company.storage_used_mb),
             "api_calls_today": company.api_calls_today,
             "api_calls_month": company.api_calls_month,
@@ -476,6 +747,12 @@ class CompanyService:
             "created_at": company.created_at.isoformat(),
             "days_active": (datetime.now(timezone.utc) - company.created_at).days
         }
+        
+        await cache_service.set(
+            _stats_cache_key(company_id), statistics, COMPANY_STATS_CACHE_TTL
+        )
+        
+        return statistics
     
     async def add_weather_station(
         self,
@@ -498,6 +775,7 @@ class CompanyService:
                 update(WeatherStation)
                 .where(WeatherStation.company_id == company_id)
                 .values(is_primary=False)
+                .execution_options(synchronize_session=False)
             )
         
         station = WeatherStation(
@@ -507,7 +785,6 @@ class CompanyService:
         
         self.db.add(station)
         await self.db.commit()
-        await self.db.refresh(station)
         
         logger.info(f"Weather station added for company {company_id}: {station.name}")
         
@@ -522,6 +799,9 @@ class CompanyService:
         """
         Atualiza status do onboarding.
         
+        Passos intermediários são agrupados e gravados em background;
+        a conclusão é gravada imediatamente.
+        
         Args:
             company_id: ID da empresa
             step: Passo atual
@@ -530,23 +810,32 @@ class CompanyService:
         Returns:
             CompanyResponse: Empresa atualizada
         """
-        company = await self._get_company_for_update(company_id)
+        if not completed:
+            # Valida a empresa e devolve o estado atual; o passo é gravado em lote
+            response = await self.get_company_by_id(company_id)
+            await onboarding_writes.submit(company_id, step)
+            return response
+        
+        # Passo intermediário pendente seria sobrescrito por esta gravação
+        onboarding_writes.discard(company_id)
+        
+        values = {
+            "onboarding_step": step,
+            "onboarding_completed": True,
+            **_merge_metadata({"onboarding_completed_at": func.now()})
+        }
         
-        company.onboarding_step = step
-        company.onboarding_completed = completed
+        company = await self._update_company(company_id, values)
         
-        if completed:
-            company.metadata = {
-                **company.metadata,
-                "onboarding_completed_at": datetime.now(timezone.utc).isoformat()
-            }
+        if not company:
+            raise NotFoundError("Company", company_id)
         
         await self.db.commit()
-        await self.db.refresh(company)
+        await self._invalidate_caches(company_id, company.slug)
         
         logger.info(f"Company onboarding updated: {company.name}, step {step}")
         
-        return CompanyResponse.model_validate(company)
+        return _COMPANY_ADAPTER.validate_python(company, from_attributes=True)
     
     async def delete_company(
         self,
@@ -563,24 +852,39 @@ class CompanyService:
         Returns:
             bool: Sucesso
         """
-        company = await self._get_company_for_update(company_id)
-        
         if soft_delete:
-            # Soft delete
-            company.deleted_at = datetime.now(timezone.utc)
-            company.status = CompanyStatus.INACTIVE
-            
-            # Desativa todos os usuários
-            await self.db.execute(
-                update(User)
-                .where(User.company_id == company_id)
-                .values(is_active=False)
+            # Soft delete; só a linha da empresa muda nesta transação
+            company = await self._update_company(
+                company_id,
+                {
+                    "deleted_at": func.now(),
+                    "status": CompanyStatus.INACTIVE,
+                    "active_users_count": 0
+                }
             )
+            
+            if not company:
+                raise NotFoundError("Company", company_id)
+            
+            user_ids = []
         else:
-            # Hard delete - cascata remove tudo
+            # Hard delete - cascata remove tudo (relacionamentos carregados pelo ORM)
+            company = await self.db.get(Company, company_id)
+            if not company:
+                raise NotFoundError("Company", company_id)
+            result = await self.db.execute(
+                select(User.id).where(User.company_id == company_id)
+            )
+            user_ids = result.scalars().all()
             await self.db.delete(company)
         
         await self.db.commit()
+        await self._invalidate_caches(company_id, company.slug)
+        await revoke_user_access(*user_ids)
+        
+        if soft_delete:
+            # Usuários desativados em background, em lotes
+            await task_queue.submit(deactivate_company_users, company_id)
         
         logger.warning(f"Company deleted: {company.name}")
         
@@ -588,12 +892,17 @@ class CompanyService:
     
     # ==================== HELPERS ====================
     
-    async def _get_company_for_update(self, company_id: int) -> Company:
+    async def _get_company_for_update(
+        self,
+        company_id: int,
+        columns: Sequence[Any] = ()
+    ) -> Company:
         """
         Busca empresa para atualização.
         
         Args:
             company_id: ID da empresa
+            columns: Restringe as colunas carregadas (padrão: todas)
             
         Returns:
             Company: Empresa encontrada
@@ -601,8 +910,10 @@ class CompanyService:
         Raises:
             NotFoundError: Se não encontrada
         """
-        query = select(Company).where(Company.id == company_id)
-        result = await self.db.execute(query)
+        query = _COMPANY_BY_ID
+        if columns:
+            query = query.options(load_only(*columns))
+        result = await self.db.execute(query, {"company_id": company_id})
         company = result.scalar_one_or_none()
         
         if not company:
@@ -610,26 +921,112 @@ class CompanyService:
         
         return company
     
-    async def _generate_unique_slug(self, base_slug: str) -> str:
+    @staticmethod
+    def _next_free_slug(base_slug: str, taken_slugs: Set[str]) -> str:
         """
-        Gera slug único para empresa.
+        Primeiro slug livre entre base, base-1, base-2, ...
         
         Args:
             base_slug: Slug base
+            taken_slugs: Slugs já existentes no formato base/base-N
             
         Returns:
-            str: Slug único
+            str: Slug livre
         """
-        slug = base_slug
-        counter = 1
+        if base_slug not in taken_slugs:
+            return base_slug
         
-        while True:
-            query = select(Company).where(Company.slug == slug)
-            result = await self.db.execute(query)
-            if not result.scalar_one_or_none():
-                break
-            
+        for counter in itertools.count(1):
             slug = f"{base_slug}-{counter}"
-            counter += 1
+            if slug not in taken_slugs:
+                return slug
+    
+    async def _invalidate_caches(self, company_id: int, slug: Optional[str] = None) -> None:
+        """Remove empresa e suas estatísticas dos caches após uma alteração."""
+        invalidate_company_cache(company_id, slug)
+        await invalidate_company_statistics(company_id)
+    
+    async def _update_company(
+        self,
+        company_id: int,
+        values: Dict[Any, Any],
+        *conditions
+    ) -> Optional[Company]:
+        """
+        Atualiza empresa com UPDATE ... RETURNING (sem SELECT prévio nem refresh).
+        
+        Args:
+            company_id: ID da empresa
+            values: Valores das colunas
+            conditions: Condições adicionais do WHERE
+            
+        Returns:
+            Optional[Company]: Empresa atualizada ou None se nenhuma linha atendeu
+        """
+        result = await self.db.execute(
+            update(Company)
+            .where(and_(Company.id == company_id, *conditions))
+            .values(values)
+            .returning(Company)
+        )
+        return result.scalar_one_or_none()
+    
+    async def _update_company_and_users(
+        self,
+        company_id: int,
+        company_values: Dict[Any, Any],
+        user_values: Dict[str, Any],
+        *conditions,
+        user_conditions: tuple = ()
+    ) -> Tuple[Optional[Company], List[int]]:
+        """
+        Atualiza empresa e seus usuários em um único comando.
+        
+        O UPDATE de usuários roda como CTE do UPDATE da empresa; os IDs
+        afetados voltam no RETURNING.
+        
+        Args:
+            company_id: ID da empresa
+            company_values: Valores das colunas da empresa
+            user_values: Valores das colunas dos usuários
+            conditions: Condições adicionais do WHERE da empresa
+            user_conditions: Condições adicionais do WHERE dos usuários
+            
+        Returns:
+            Tuple[Optional[Company], List[int]]: Empresa atualizada (None se nenhuma
+            linha atendeu) e IDs dos usuários atualizados
+        """
+        company_filter = and_(Company.id == company_id, *conditions)
+        
+        # Usuários só mudam se a empresa atende às mesmas condições
+        users_update = (
+            update(User)
+            .where(
+                and_(
+                    User.company_id == company_id,
+                    exists().where(company_filter),
+                    *user_conditions
+                )
+            )
+            .values(user_values)
+            .returning(User.id)
+            .cte("users_update")
+        )
+        
+        result = await self.db.execute(
+            update(Company)
+            .where(company_filter)
+            .values(company_values)
+            .returning(
+                Company,
+                select(func.array_agg(users_update.c.id)).scalar_subquery()
+            )
+            .add_cte(users_update)
+        )
+        row = result.one_or_none()
+        
+        if row is None:
+            return None, []
         
-        return slug
\ No newline at end of file
+        company, user_ids = row
+        return company, list(user_ids or [])
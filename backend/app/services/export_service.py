@@ -2,15 +2,23 @@
 # backend/app/services/export_service.py
 
 import os
-import json
+import re
+import csv
+import orjson
 import asyncio
-from typing import Dict, Any, List, Optional, BinaryIO
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, BinaryIO, Iterable, Sequence, Tuple
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape, quoteattr
+from sqlalchemy.orm import Session, defer, sessionmaker
 from sqlalchemy import and_, func
 import pandas as pd
 import numpy as np
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 import xlsxwriter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, letter
@@ -27,7 +35,9 @@ from reportlab.graphics.charts.piecharts import Pie
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 from pathlib import Path
 import hashlib
@@ -44,6 +54,319 @@ from ..services.ml_service import MLService
 
 logger = logging.getLogger(__name__)
 
+
+# Formato das colunas de dados pelo nome: (padrão, formato, largura), em ordem
+_COLUMN_FORMAT_RULES = (
+    (re.compile('revenue|valor'), 'currency', 15),
+    (re.compile('date|data'), 'date', 12),
+)
+
+
+def _column_formats(columns: Iterable[Any]) -> List[Optional[Tuple[str, int]]]:
+    """(formato, largura) de cada coluna, ou None; uma única passada pelos nomes"""
+    formats = []
+    for name in columns:
+        lower = str(name).lower()
+        formats.append(next(
+            ((kind, width) for pattern, kind, width in _COLUMN_FORMAT_RULES if pattern.search(lower)),
+            None
+        ))
+    return formats
+
+
+def _dumps(obj: Any) -> str:
+    """Serializa para texto JSON com orjson (Decimal e afins viram string)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _job_parameters(value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Parâmetros do job: colunas JSON já chegam como dict; texto é decodificado
+    com orjson em um dict novo a cada chamada (sem cache compartilhado que o
+    chamador pudesse alterar)
+    """
+    if not value:
+        return None
+    if isinstance(value, (str, bytes)):
+        return orjson.loads(value)
+    return value
+
+
+# Exportação JSON: indentada, numpy e datetimes sem fuso tratados nativamente
+_JSON_EXPORT_OPTIONS = (
+    orjson.OPT_INDENT_2
+    | orjson.OPT_SERIALIZE_NUMPY
+    | orjson.OPT_NAIVE_UTC
+    | orjson.OPT_NON_STR_KEYS
+)
+
+
+def _record_columns(rows: Iterable[Dict[str, Any]]) -> List[str]:
+    """União das chaves dos registros, na ordem em que aparecem"""
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+
+# ==================== XLSX STREAMING ====================
+
+# Partes fixas do pacote SpreadsheetML; só planilhas e strings variam
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# cellXfs: 0 padrão, 1 cabeçalho, 2 moeda, 3 data
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2">'
+    '<numFmt numFmtId="164" formatCode="&quot;R$&quot; #,##0.00"/>'
+    '<numFmt numFmtId="165" formatCode="dd/mm/yyyy"/>'
+    '</numFmts>'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF4472C4"/><bgColor indexed="64"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"><color auto="1"/></left><right style="thin"><color auto="1"/></right>'
+    '<top style="thin"><color auto="1"/></top><bottom style="thin"><color auto="1"/></bottom><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" '
+    'applyBorder="1" applyAlignment="1"><alignment vertical="top" wrapText="1"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '<dxfs count="0"/>'
+    '</styleSheet>'
+)
+
+_XF_HEADER = 1
+_XF_CURRENCY = 2
+_XF_DATE = 3
+
+_XF_BY_FORMAT = {'currency': _XF_CURRENCY, 'date': _XF_DATE}
+
+# Mapa de cores do heatmap de correlações (mesmo do xlsxwriter)
+_XLSX_CORRELATION_SCALE = (
+    '<conditionalFormatting sqref="B2:Z100"><cfRule type="colorScale" priority="1"><colorScale>'
+    '<cfvo type="min"/><cfvo type="percentile" val="50"/><cfvo type="max"/>'
+    '<color rgb="FFFF0000"/><color rgb="FFFFFF00"/><color rgb="FF00FF00"/>'
+    '</colorScale></cfRule></conditionalFormatting>'
+)
+
+# Linhas acumuladas antes de cada escrita no zip
+_XLSX_ROW_BATCH = 1000
+
+
+# Datas viram número de série do Excel (dias desde 1899-12-30)
+_XLSX_EPOCH = datetime(1899, 12, 30)
+
+# Caracteres de controle são ilegais no XML; o SpreadsheetML os codifica como
+# _xHHHH_ (e escapa ocorrências literais desse padrão), como o xlsxwriter
+_XLSX_CONTROL_CHARS = re.compile('[\x00-\x08\x0b-\x1f]')
+_XLSX_ESCAPE_LITERAL = re.compile('(_x[0-9a-fA-F]{4}_)')
+
+
+def _xlsx_serial(value: date) -> float:
+    """Número de série do Excel para date/datetime (fuso horário descartado)"""
+    if isinstance(value, datetime):
+        return (value.replace(tzinfo=None) - _XLSX_EPOCH).total_seconds() / 86400
+    return float((value - _XLSX_EPOCH.date()).days)
+
+
+def _xlsx_text(text: str) -> str:
+    """Texto seguro para o XML das shared strings"""
+    text = _XLSX_ESCAPE_LITERAL.sub(r'_x005F\1', text)
+    text = _XLSX_CONTROL_CHARS.sub(lambda m: f'_x{ord(m.group()):04X}_', text)
+    return escape(text)
+
+
+def _xlsx_column_letter(index: int) -> str:
+    """Letra da coluna (0 -> A, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class _XlsxStream:
+    """
+    Escreve um .xlsx gerando o XML das planilhas diretamente no zip.
+
+    Não cria objetos por célula: cada linha vira texto XML e é gravada em lotes.
+    Strings são deduplicadas em xl/sharedStrings.xml.
+    """
+
+    def __init__(self, buffer: BinaryIO):
+        self.zip = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+        self.sheet_names: List[str] = []
+        self.shared_strings: Dict[str, int] = {}
+
+    def write_sheet(
+        self,
+        sheet_name: str,
+        header: Sequence[Any],
+        rows: Iterable[Sequence[Any]],
+        col_styles: Sequence[int] = (),
+        col_widths: Sequence[Optional[float]] = (),
+        extra_xml: str = ''
+    ) -> None:
+        """Grava uma planilha: cabeçalho formatado seguido das linhas"""
+        self.sheet_names.append(sheet_name)
+        path = f'xl/worksheets/sheet{len(self.sheet_names)}.xml'
+        letters = [_xlsx_column_letter(i) for i in range(len(header))]
+        styles = list(col_styles) + [0] * (len(header) - len(col_styles))
+
+        with self.zip.open(path, 'w') as out:
+            out.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            )
+
+            cols = ''.join(
+                f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                for i, width in enumerate(col_widths, 1) if width
+            )
+            if cols:
+                out.write(f'<cols>{cols}</cols>'.encode('utf-8'))
+
+            out.write(b'<sheetData>')
+            out.write(self._row_xml(1, letters, header, [_XF_HEADER] * len(header)).encode('utf-8'))
+
+            batch = []
+            for row_num, row in enumerate(rows, 2):
+                batch.append(self._row_xml(row_num, letters, row, styles))
+                if len(batch) >= _XLSX_ROW_BATCH:
+                    out.write(''.join(batch).encode('utf-8'))
+                    batch.clear()
+            out.write(''.join(batch).encode('utf-8'))
+
+            out.write(b'</sheetData>')
+            out.write(extra_xml.encode('utf-8'))
+            out.write(b'</worksheet>')
+
+    def close(self) -> None:
+        """Grava workbook, estilos, strings e tipos de conteúdo"""
+        sheets = ''.join(
+            f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(self.sheet_names, 1)
+        )
+        self.zip.writestr(
+            'xl/workbook.xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        )
+
+        count = len(self.sheet_names)
+        relationships = ''.join(
+            f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/'
+            f'2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, count + 1)
+        )
+        self.zip.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}'
+            f'<Relationship Id="rId{count + 1}" Type="http://schemas.openxmlformats.org/'
+            'officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rId{count + 2}" Type="http://schemas.openxmlformats.org/'
+            'officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        )
+
+        self.zip.writestr('xl/styles.xml', _XLSX_STYLES)
+
+        # Dicionário preserva a ordem de inserção = índice de cada string
+        with self.zip.open('xl/sharedStrings.xml', 'w') as out:
+            out.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                f'count="{len(self.shared_strings)}" uniqueCount="{len(self.shared_strings)}">'
+                .encode('utf-8')
+            )
+            out.write(''.join(
+                f'<si><t xml:space="preserve">{_xlsx_text(text)}</t></si>'
+                for text in self.shared_strings
+            ).encode('utf-8'))
+            out.write(b'</sst>')
+
+        worksheets = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, count + 1)
+        )
+        self.zip.writestr(
+            '[Content_Types].xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{worksheets}'
+            '<Override PartName="/xl/styles.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            '</Types>'
+        )
+        self.zip.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+
+        self.zip.close()
+
+    def _row_xml(
+        self,
+        row_num: int,
+        letters: Sequence[str],
+        values: Sequence[Any],
+        styles: Sequence[int]
+    ) -> str:
+        """XML de uma linha; células vazias (None/NaN) são omitidas"""
+        cells = []
+        for letter, value, style in zip(letters, values, styles):
+            attrs = f'r="{letter}{row_num}"' + (f' s="{style}"' if style else '')
+
+            if value is None:
+                continue
+            if isinstance(value, (bool, np.bool_)):
+                cells.append(f'<c {attrs} t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, np.integer)):
+                cells.append(f'<c {attrs}><v>{int(value)}</v></c>')
+            elif isinstance(value, (float, np.floating)):
+                # NaN e infinito não têm representação numérica no xlsx
+                if not np.isfinite(value):
+                    continue
+                cells.append(f'<c {attrs}><v>{float(value)!r}</v></c>')
+            elif isinstance(value, date):
+                # Data real (número de série); sem estilo da coluna, usa o de data
+                if not style:
+                    attrs += f' s="{_XF_DATE}"'
+                cells.append(f'<c {attrs}><v>{_xlsx_serial(value)!r}</v></c>')
+            else:
+                text = value if isinstance(value, str) else str(value)
+                index = self.shared_strings.setdefault(text, len(self.shared_strings))
+                cells.append(f'<c {attrs} t="s"><v>{index}</v></c>')
+
+        return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+
 class ExportFormat(Enum):
     PDF = "pdf"
     EXCEL = "excel"
@@ -51,13 +374,742 @@ class ExportFormat(Enum):
     JSON = "json"
     POWERPOINT = "powerpoint"
 
-class ReportType(Enum):
-    EXECUTIVE_SUMMARY = "executive_summary"
-    SALES_ANALYSIS = "sales_analysis"
-    WEATHER_IMPACT = "weather_impact"
-    PREDICTIONS = "predictions"
-    ALERTS_SUMMARY = "alerts_summary"
-    CUSTOM = "custom"
+class ReportType(Enum):
+    EXECUTIVE_SUMMARY = "executive_summary"
+    SALES_ANALYSIS = "sales_analysis"
+    WEATHER_IMPACT = "weather_impact"
+    PREDICTIONS = "predictions"
+    ALERTS_SUMMARY = "alerts_summary"
+    CUSTOM = "custom"
+
+
+# ==================== RENDERING ====================
+
+# Estilos de tabela compartilhados (setStyle copia os comandos para a tabela)
+_KPI_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_DATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+@lru_cache(maxsize=1)
+def _pdf_styles():
+    """Folha de estilos do PDF, montada uma vez por processo"""
+    styles = getSampleStyleSheet()
+    
+    # Customizar estilos
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2E4057'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionTitle',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#4472C4'),
+        spaceAfter=12,
+        spaceBefore=12
+    ))
+    
+    return styles
+
+
+class ReportRenderer:
+    """
+    Gera o arquivo do relatório a partir dos dados já coletados.
+
+    Não acessa banco nem estado do service: recebe e devolve apenas tipos
+    serializáveis, para rodar no pool de processos de exportação.
+    """
+    
+    def render_pdf(self, data: Dict[str, Any]) -> bytes:
+        """
+        Gera relatório em PDF
+        """
+        try:
+            buffer = BytesIO()
+            
+            # Configurar documento
+            doc = SimpleDocTemplate(
+                buffer,
+                pagesize=A4,
+                rightMargin=72,
+                leftMargin=72,
+                topMargin=72,
+                bottomMargin=18
+            )
+            
+            # Container de elementos
+            story = []
+            
+            # Estilos
+            styles = self._get_pdf_styles()
+            
+            # Adicionar logo e cabeçalho
+            story.extend(self._create_pdf_header(styles, data))
+            
+            # Adicionar sumário executivo
+            if "executive_summary" in data:
+                story.extend(self._create_executive_summary(styles, data["executive_summary"]))
+            
+            # Adicionar análise de vendas
+            if "sales_analysis" in data:
+                story.extend(self._create_sales_section(styles, data["sales_analysis"]))
+            
+            # Adicionar análise climática
+            if "weather_analysis" in data:
+                story.extend(self._create_weather_section(styles, data["weather_analysis"]))
+            
+            # Adicionar previsões
+            if "predictions" in data:
+                story.extend(self._create_predictions_section(styles, data["predictions"]))
+            
+            # Adicionar gráficos
+            if "charts" in data:
+                story.extend(self._create_charts_section(data["charts"]))
+            
+            # Adicionar conclusões e recomendações
+            if "recommendations" in data:
+                story.extend(self._create_recommendations_section(styles, data["recommendations"]))
+            
+            # Construir PDF
+            doc.build(story, onFirstPage=self._add_page_number, onLaterPages=self._add_page_number)
+            
+            # Retornar bytes
+            buffer.seek(0)
+            return buffer.read()
+            
+        except Exception as e:
+            logger.error(f"Error generating PDF: {str(e)}")
+            raise ExportError(f"Failed to generate PDF: {str(e)}")
+    
+    def _get_pdf_styles(self) -> Dict:
+        """Retorna estilos para PDF"""
+        return _pdf_styles()
+    
+    def _create_pdf_header(self, styles: Dict, data: Dict) -> List:
+        """Cria cabeçalho do PDF"""
+        elements = []
+        
+        # Título
+        title = Paragraph(
+            f"<b>{data.get('company_name', 'Empresa')}</b><br/>Relatório de Análise Climática e Vendas",
+            styles['CustomTitle']
+        )
+        elements.append(title)
+        
+        # Período
+        period = Paragraph(
+            f"Período: {data.get('start_date', 'N/A')} até {data.get('end_date', 'N/A')}",
+            styles['Normal']
+        )
+        elements.append(period)
+        
+        elements.append(Spacer(1, 20))
+        
+        return elements
+    
+    def _create_executive_summary(self, styles: Dict, summary: Dict) -> List:
+        """Cria seção de sumário executivo"""
+        elements = []
+        
+        elements.append(Paragraph("Sumário Executivo", styles['SectionTitle']))
+        
+        # Tabela de KPIs
+        kpi_data = [
+            ['Indicador', 'Valor'],
+            ['Receita Total', f"R$ {summary.get('total_revenue', 0):,.2f}"],
+            ['Média Diária', f"R$ {summary.get('average_daily_revenue', 0):,.2f}"],
+            ['Taxa de Crescimento', f"{summary.get('growth_rate', 0):.1f}%"],
+            ['Previsão Próxima Semana', f"R$ {summary.get('next_week_forecast', 0):,.2f}"]
+        ]
+        
+        kpi_table = Table(kpi_data, colWidths=[3*inch, 2*inch])
+        kpi_table.setStyle(_KPI_TABLE_STYLE)
+        
+        elements.append(kpi_table)
+        elements.append(Spacer(1, 20))
+        
+        return elements
+    
+    def _create_sales_section(self, styles: Dict, sales_data: Dict) -> List:
+        """Cria seção de análise de vendas"""
+        elements = []
+        
+        elements.append(Paragraph("Análise de Vendas", styles['SectionTitle']))
+        
+        # Adicionar texto descritivo
+        if "patterns" in sales_data:
+            patterns_text = "Padrões identificados:<br/>"
+            for pattern_type, pattern_data in sales_data["patterns"].items():
+                patterns_text += f"- {pattern_type}: {pattern_data}<br/>"
+            
+            elements.append(Paragraph(patterns_text, styles['Normal']))
+        
+        elements.append(Spacer(1, 20))
+        
+        return elements
+    
+    def _create_weather_section(self, styles: Dict, weather_data: Dict) -> List:
+        """Cria seção de análise climática"""
+        elements = []
+        
+        elements.append(Paragraph("Análise de Impacto Climático", styles['SectionTitle']))
+        
+        # Correlações
+        if "correlations" in weather_data:
+            corr_data = [['Variável Climática', 'Correlação', 'Impacto']]
+            
+            for var, corr_info in weather_data["correlations"].items():
+                corr_data.append([
+                    var.replace('_', ' ').title(),
+                    f"{corr_info.get('correlation', 0):.3f}",
+                    corr_info.get('strength', 'N/A')
+                ])
+            
+            corr_table = Table(corr_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
+            corr_table.setStyle(_DATA_TABLE_STYLE)
+            
+            elements.append(corr_table)
+        
+        elements.append(Spacer(1, 20))
+        
+        return elements
+    
+    def _create_predictions_section(self, styles: Dict, predictions: List[Dict]) -> List:
+        """Cria seção de previsões"""
+        elements = []
+        
+        elements.append(Paragraph("Previsões", styles['SectionTitle']))
+        
+        # Tabela de previsões
+        pred_data = [['Data', 'Previsão', 'Intervalo de Confiança']]
+        
+        for pred in predictions[:7]:  # Primeiros 7 dias
+            pred_data.append([
+                pred["date"][:10],
+                f"R$ {pred['predicted_sales']:,.2f}",
+                f"R$ {pred['confidence_interval']['lower']:,.0f} - {pred['confidence_interval']['upper']:,.0f}"
+            ])
+        
+        pred_table = Table(pred_data, colWidths=[1.5*inch, 1.5*inch, 2*inch])
+        pred_table.setStyle(_DATA_TABLE_STYLE)
+        
+        elements.append(pred_table)
+        elements.append(Spacer(1, 20))
+        
+        return elements
+    
+    def _create_charts_section(self, charts: List[bytes]) -> List:
+        """Cria seção de gráficos a partir dos PNGs já renderizados"""
+        elements = []
+        
+        for chart_png in charts:
+            img = Image(BytesIO(chart_png), width=6*inch, height=4*inch)
+            elements.append(KeepTogether([img, Spacer(1, 12)]))
+        
+        return elements
+    
+    def _create_recommendations_section(self, styles: Dict, recommendations: List[str]) -> List:
+        """Cria seção de recomendações"""
+        elements = []
+        
+        elements.append(Paragraph("Recomendações", styles['SectionTitle']))
+        
+        for i, rec in enumerate(recommendations, 1):
+            elements.append(Paragraph(f"{i}. {rec}", styles['Normal']))
+        
+        return elements
+    
+    def _add_page_number(self, canvas, doc):
+        """Adiciona número de página"""
+        canvas.saveState()
+        canvas.setFont('Helvetica', 9)
+        page_num = canvas.getPageNumber()
+        text = f"Página {page_num}"
+        canvas.drawRightString(200*mm, 10*mm, text)
+        canvas.restoreState()
+    
+    def render_excel(
+        self,
+        data: Dict[str, Any],
+        include_charts: bool = True
+    ) -> bytes:
+        """
+        Gera relatório em Excel com múltiplas abas
+        """
+        # Gráficos nativos exigem o xlsxwriter; sem eles o XML é gerado direto
+        if not (include_charts and "charts_data" in data):
+            return self._render_excel_fast(data)
+        
+        try:
+            buffer = BytesIO()
+            
+            # constant_memory: cada linha vai para disco assim que a próxima começa,
+            # sem manter as células em memória (exige escrita linha a linha)
+            workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True})
+            
+            # Formatos customizados
+            header_format = workbook.add_format({
+                'bold': True,
+                'text_wrap': True,
+                'valign': 'top',
+                'fg_color': '#4472C4',
+                'font_color': 'white',
+                'border': 1
+            })
+            
+            currency_format = workbook.add_format({'num_format': 'R$ #,##0.00'})
+            percent_format = workbook.add_format({'num_format': '0.00%'})
+            date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+            
+            # Aba: Resumo Executivo
+            if "executive_summary" in data:
+                worksheet = workbook.add_worksheet('Resumo')
+                worksheet.set_column('A:Z', 15)
+                self._write_record(worksheet, data["executive_summary"], header_format)
+            
+            fmt_map = {'currency': currency_format, 'date': date_format}
+            
+            # Aba: Dados de Vendas
+            if "sales_data" in data:
+                worksheet = workbook.add_worksheet('Vendas')
+                self._write_rows_to_sheet(worksheet, data["sales_data"], header_format, fmt_map)
+            
+            # Aba: Dados Climáticos
+            if "weather_data" in data:
+                worksheet = workbook.add_worksheet('Clima')
+                self._write_rows_to_sheet(worksheet, data["weather_data"], header_format, fmt_map)
+            
+            # Aba: Correlações
+            if "correlations" in data:
+                worksheet = workbook.add_worksheet('Correlações')
+                self._write_dataframe(
+                    worksheet, pd.DataFrame(data["correlations"]), header_format, index=True
+                )
+                
+                # Aplicar formatação condicional para heatmap
+                worksheet.conditional_format('B2:Z100', {
+                    'type': '3_color_scale',
+                    'min_color': '#FF0000',
+                    'mid_color': '#FFFF00',
+                    'max_color': '#00FF00'
+                })
+            
+            # Aba: Previsões
+            if "predictions" in data:
+                worksheet = workbook.add_worksheet('Previsões')
+                self._write_rows_to_sheet(worksheet, data["predictions"], header_format, fmt_map)
+            
+            # Adicionar gráficos se solicitado
+            if include_charts and "charts_data" in data:
+                self._add_excel_charts(workbook, data["charts_data"])
+            
+            # Aba: Metadados
+            metadata = {
+                'Gerado em': datetime.utcnow().strftime('%Y-%m-%d %H:%M'),
+                'Empresa': data.get('company_name', 'Empresa'),
+                'Período': f"{data.get('start_date', 'N/A')} até {data.get('end_date', 'N/A')}",
+                'Versão': '1.0'
+            }
+            worksheet = workbook.add_worksheet('Info')
+            self._write_record(worksheet, metadata, header_format)
+            
+            workbook.close()
+            
+            return buffer.getvalue()
+            
+        except Exception as e:
+            logger.error(f"Error generating Excel: {str(e)}")
+            raise ExportError(f"Failed to generate Excel: {str(e)}")
+    
+    def _render_excel_fast(self, data: Dict[str, Any]) -> bytes:
+        """
+        Gera o Excel sem gráficos gravando o XML das planilhas diretamente
+        """
+        try:
+            buffer = BytesIO()
+            xlsx = _XlsxStream(buffer)
+            
+            def write_df(sheet_name, df, index=False, col_styles=(), col_widths=(), extra_xml=''):
+                header = ([''] if index else []) + list(df.columns)
+                xlsx.write_sheet(
+                    sheet_name,
+                    header,
+                    df.itertuples(index=index, name=None),
+                    col_styles=col_styles,
+                    col_widths=col_widths,
+                    extra_xml=extra_xml
+                )
+            
+            # Aba: Resumo Executivo
+            if "executive_summary" in data:
+                summary = data["executive_summary"]
+                xlsx.write_sheet(
+                    'Resumo',
+                    list(summary.keys()),
+                    [list(summary.values())],
+                    col_widths=[15] * len(summary)
+                )
+            
+            def write_rows(sheet_name, rows):
+                # Registros vão direto para o XML; estilo e largura pelo nome da coluna
+                columns = _record_columns(rows)
+                formats = _column_formats(columns)
+                xlsx.write_sheet(
+                    sheet_name,
+                    columns,
+                    ([row.get(column) for column in columns] for row in rows),
+                    col_styles=[_XF_BY_FORMAT[f[0]] if f else 0 for f in formats],
+                    col_widths=[f[1] if f else None for f in formats]
+                )
+            
+            # Aba: Dados de Vendas
+            if "sales_data" in data:
+                write_rows('Vendas', data["sales_data"])
+            
+            # Aba: Dados Climáticos
+            if "weather_data" in data:
+                write_rows('Clima', data["weather_data"])
+            
+            # Aba: Correlações (heatmap via formatação condicional)
+            if "correlations" in data:
+                write_df(
+                    'Correlações',
+                    pd.DataFrame(data["correlations"]),
+                    index=True,
+                    extra_xml=_XLSX_CORRELATION_SCALE
+                )
+            
+            # Aba: Previsões
+            if "predictions" in data:
+                write_rows('Previsões', data["predictions"])
+            
+            # Aba: Metadados
+            metadata = {
+                'Gerado em': datetime.utcnow().strftime('%Y-%m-%d %H:%M'),
+                'Empresa': data.get('company_name', 'Empresa'),
+                'Período': f"{data.get('start_date', 'N/A')} até {data.get('end_date', 'N/A')}",
+                'Versão': '1.0'
+            }
+            xlsx.write_sheet('Info', list(metadata.keys()), [list(metadata.values())])
+            
+            xlsx.close()
+            
+            return buffer.getvalue()
+            
+        except Exception as e:
+            logger.error(f"Error generating Excel: {str(e)}")
+            raise ExportError(f"Failed to generate Excel: {str(e)}")
+    
+    @staticmethod
+    def _apply_column_formats(worksheet, columns: Iterable[Any], fmt_map: Dict[str, Any]):
+        """Aplica largura e formato (moeda/data) às colunas antes das linhas"""
+        for col_num, column_format in enumerate(_column_formats(columns)):
+            if column_format:
+                kind, width = column_format
+                worksheet.set_column(col_num, col_num, width, fmt_map[kind])
+    
+    @staticmethod
+    def _write_record(worksheet, record: Dict[str, Any], header_format):
+        """Escreve um único registro: chaves no cabeçalho, valores na linha 2"""
+        worksheet.write_row(0, 0, list(record.keys()), header_format)
+        worksheet.write_row(1, 0, [
+            value if value is None or isinstance(value, (str, int, float)) else str(value)
+            for value in record.values()
+        ])
+    
+    @staticmethod
+    def _write_rows_to_sheet(
+        worksheet,
+        rows: List[Dict[str, Any]],
+        header_format,
+        fmt_map: Dict[str, Any]
+    ):
+        """Escreve registros (lista de dicts) linha a linha, sem DataFrame"""
+        headers = _record_columns(rows)
+        ReportRenderer._apply_column_formats(worksheet, headers, fmt_map)
+        worksheet.write_row(0, 0, headers, header_format)
+        
+        for row_num, row in enumerate(rows, 1):
+            # NaN vira célula vazia, como no to_excel
+            worksheet.write_row(row_num, 0, [
+                None if isinstance(value, float) and value != value else value
+                for value in (row.get(header) for header in headers)
+            ])
+    
+    @staticmethod
+    def _write_dataframe(worksheet, df: pd.DataFrame, header_format, index: bool = False):
+        """Escreve cabeçalho e linhas em ordem (compatível com constant_memory)"""
+        header = ([''] if index else []) + list(df.columns)
+        worksheet.write_row(0, 0, header, header_format)
+        
+        # NaN vira célula vazia, como no to_excel
+        df = df.astype(object).where(df.notna(), None)
+        
+        for row_num, row in enumerate(df.itertuples(index=index, name=None), 1):
+            worksheet.write_row(row_num, 0, row)
+    
+    def _add_excel_charts(self, workbook, charts_data: Dict):
+        """Adiciona gráficos ao Excel"""
+        
+        for chart_name, chart_config in charts_data.items():
+            # Criar worksheet para gráfico
+            worksheet = workbook.add_worksheet(f'Gráfico_{chart_name[:20]}')
+            
+            if chart_config["type"] == "line":
+                chart = workbook.add_chart({'type': 'line'})
+            elif chart_config["type"] == "bar":
+                chart = workbook.add_chart({'type': 'column'})
+            else:
+                continue
+            
+            # Configurar gráfico
+            chart.set_title({'name': chart_config["title"]})
+            chart.set_size({'width': 720, 'height': 480})
+            
+            # Adicionar ao worksheet
+            worksheet.insert_chart('B2', chart)
+    
+    def render_csv(
+        self,
+        data: Dict[str, Any],
+        dataset: str = "all"
+    ) -> bytes:
+        """
+        Gera exportação em CSV
+        """
+        try:
+            buffer = BytesIO()
+            text_buffer = TextIOWrapper(buffer, encoding='utf-8', newline='')
+            
+            # Selecionar dataset; listas de registros vão direto para o csv.writer
+            if dataset == "sales" and "sales_data" in data:
+                self._write_csv_rows(text_buffer, data["sales_data"])
+            elif dataset == "weather" and "weather_data" in data:
+                self._write_csv_rows(text_buffer, data["weather_data"])
+            elif dataset == "combined":
+                # Combinar vendas e clima (merge exige pandas)
+                df_sales = pd.DataFrame(data.get("sales_data", []))
+                df_weather = pd.DataFrame(data.get("weather_data", []))
+                
+                if not df_sales.empty and not df_weather.empty:
+                    df = pd.merge(df_sales, df_weather, on='date', how='inner', copy=False)
+                else:
+                    df = df_sales if not df_sales.empty else df_weather
+                
+                # Escreve direto no buffer, sem string CSV intermediária
+                df.to_csv(text_buffer, index=False)
+            else:
+                # Todos os dados em formato flat
+                self._write_csv_rows(text_buffer, self._flatten_data_for_csv(data))
+            
+            # Libera o buffer binário sem fechá-lo
+            text_buffer.flush()
+            text_buffer.detach()
+            
+            return buffer.getvalue()
+            
+        except Exception as e:
+            logger.error(f"Error generating CSV: {str(e)}")
+            raise ExportError(f"Failed to generate CSV: {str(e)}")
+    
+    @staticmethod
+    def _write_csv_rows(text_buffer: TextIOWrapper, rows: List[Dict]):
+        """Escreve registros como CSV; colunas na ordem em que aparecem"""
+        if not rows:
+            return
+        
+        fieldnames = _record_columns(rows)
+        writer = csv.DictWriter(text_buffer, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    
+    def _flatten_data_for_csv(self, data: Dict) -> List[Dict]:
+        """Achata dados nested para CSV"""
+        
+        flat_data = []
+        
+        # Extrair dados de vendas
+        if "sales_data" in data:
+            for record in data["sales_data"]:
+                flat_record = {"type": "sales"}
+                flat_record.update(record)
+                flat_data.append(flat_record)
+        
+        # Extrair dados climáticos
+        if "weather_data" in data:
+            for record in data["weather_data"]:
+                flat_record = {"type": "weather"}
+                flat_record.update(record)
+                flat_data.append(flat_record)
+        
+        return flat_data
+
+
+# Formato -> (extensão, mime type)
+_FORMAT_FILE_TYPES = {
+    "pdf": ("pdf", "application/pdf"),
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "json": ("json", "application/json"),
+}
+
+
+def _render_report(
+    format: str,
+    data: Dict[str, Any],
+    include_charts: bool = True,
+    dataset: str = "all"
+) -> bytes:
+    """Gera o conteúdo do relatório no formato pedido (executado no pool)"""
+    renderer = ReportRenderer()
+    
+    if format == "pdf":
+        return renderer.render_pdf(data)
+    if format == "excel":
+        return renderer.render_excel(data, include_charts)
+    if format == "csv":
+        return renderer.render_csv(data, dataset)
+    if format == "json":
+        # PNGs dos gráficos só servem ao PDF
+        payload = {key: value for key, value in data.items() if key != "charts"}
+        return orjson.dumps(payload, default=str, option=_JSON_EXPORT_OPTIONS)
+    
+    raise ValidationError(f"Unsupported format: {format}")
+
+
+# Pool de processos para renderização (criado no primeiro uso). reportlab,
+# xlsxwriter e matplotlib são CPU-bound e bloqueariam o event loop.
+_export_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_export_pool() -> ProcessPoolExecutor:
+    """Retorna o pool de processos de exportação"""
+    global _export_pool
+    if _export_pool is None:
+        _export_pool = ProcessPoolExecutor(
+            max_workers=min(os.cpu_count() or 1, 4),
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _export_pool
+
+
+async def _run_in_export_pool(func, *args):
+    """Executa renderização em outro processo, sem bloquear o event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_export_pool(), func, *args
+    )
+
+
+# ==================== CHARTS ====================
+
+# Estilo aplicado uma vez; cada gráfico usa a própria Figure (sem pyplot, que
+# guarda estado global e não é thread-safe)
+matplotlib.style.use('seaborn-v0_8-darkgrid')
+
+# O Agg passa a maior parte do tempo em C; gráficos independentes rodam juntos
+_chart_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="export-chart")
+
+
+def _figure_png(fig: Figure) -> bytes:
+    """Renderiza a figura em PNG na memória"""
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _render_sales_chart(sales_data: List[Dict]) -> Optional[bytes]:
+    """Gráfico de linha da receita ao longo do tempo"""
+    if not sales_data or not {'date', 'revenue'} <= set(_record_columns(sales_data)):
+        return None
+    
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    
+    dates = pd.to_datetime([row.get('date') for row in sales_data])
+    ax.plot(dates, [row.get('revenue') for row in sales_data], marker='o', label='revenue')
+    ax.legend()
+    
+    ax.set_title('Evolução das Vendas', fontsize=16)
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Receita (R$)')
+    ax.grid(True, alpha=0.3)
+    
+    return _figure_png(fig)
+
+
+def _render_correlation_chart(corr_data: Dict[str, Dict]) -> Optional[bytes]:
+    """Barras de correlação por variável climática (verde positiva, vermelha negativa)"""
+    if not corr_data:
+        return None
+    
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    
+    variables = list(corr_data.keys())
+    correlations = [corr_data[v].get('correlation', 0) for v in variables]
+    
+    ax.bar(variables, correlations, color=['green' if corr > 0 else 'red' for corr in correlations])
+    
+    ax.set_title('Correlação entre Variáveis Climáticas e Vendas', fontsize=16)
+    ax.set_xlabel('Variável Climática')
+    ax.set_ylabel('Correlação')
+    ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+    ax.grid(True, alpha=0.3)
+    
+    return _figure_png(fig)
+
+
+def _render_prediction_chart(pred_data: List[Dict]) -> Optional[bytes]:
+    """Previsão de vendas com intervalo de confiança"""
+    if not pred_data:
+        return None
+    
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    
+    dates = [p['date'][:10] for p in pred_data]
+    values = [p['predicted_sales'] for p in pred_data]
+    lower = [p['confidence_interval']['lower'] for p in pred_data]
+    upper = [p['confidence_interval']['upper'] for p in pred_data]
+    
+    ax.plot(dates, values, 'b-', label='Previsão', linewidth=2)
+    ax.fill_between(range(len(dates)), lower, upper, alpha=0.3, label='Intervalo de Confiança')
+    
+    ax.set_title('Previsão de Vendas - Próximas 2 Semanas', fontsize=16)
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Vendas Previstas (R$)')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    
+    # Rotacionar labels do eixo X
+    ax.tick_params(axis='x', labelrotation=45)
+    
+    return _figure_png(fig)
+
 
 class ExportService:
     """Service para geração e exportação de relatórios"""
@@ -65,10 +1117,13 @@ class ExportService:
     def __init__(self, db: Session, company_id: str):
         self.db = db
         self.company_id = company_id
+        # Sessões próprias para consultas em thread, no mesmo engine da injetada
+        self._session_factory = sessionmaker(bind=db.get_bind())
         self.export_path = Path("exports") / company_id
         self.export_path.mkdir(parents=True, exist_ok=True)
         self.sales_service = SalesService(db, company_id)
         self.ml_service = MLService(db, company_id)
+        self._company_name: Optional[str] = None
         
     async def generate_report(
         self,
@@ -86,19 +1141,7 @@ class ExportService:
         """
         try:
             # Criar job de exportação
-            job = ExportJob(
-                company_id=self.company_id,
-                report_type=report_type.value,
-                format=format.value,
-                status="processing",
-                parameters=json.dumps({
-                    "start_date": start_date.isoformat(),
-                    "end_date": end_date.isoformat(),
-                    "filters": filters,
-                    "include_charts": include_charts
-                }),
-                created_at=datetime.utcnow()
-            )
+            job = self._new_export_job(report_type, format, start_date, end_date, filters, include_charts)
             
             self.db.add(job)
             self.db.commit()
@@ -142,6 +1185,38 @@ class ExportService:
                 self.db.commit()
             raise ExportError(f"Failed to generate report: {str(e)}")
     
+    def _new_export_job(
+        self,
+        report_type: ReportType,
+        format: ExportFormat,
+        start_date: datetime,
+        end_date: datetime,
+        filters: Optional[Dict],
+        include_charts: bool
+    ) -> ExportJob:
+        """Monta o job de exportação (sem adicioná-lo à sessão)"""
+        return ExportJob(
+            company_id=self.company_id,
+            report_type=report_type.value,
+            format=format.value,
+            status="processing",
+            parameters=_dumps({
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "filters": filters,
+                "include_charts": include_charts
+            }),
+            created_at=datetime.utcnow()
+        )
+    
+    @staticmethod
+    def _complete_job(job: ExportJob, result: Dict[str, Any]):
+        """Marca o job como concluído com o arquivo gerado"""
+        job.status = "completed"
+        job.file_path = result["file_path"]
+        job.file_size = result["file_size"]
+        job.completed_at = datetime.utcnow()
+    
     async def generate_pdf(
         self,
         data: Dict[str, Any],
@@ -150,62 +1225,7 @@ class ExportService:
         """
         Gera relatório em PDF
         """
-        try:
-            buffer = BytesIO()
-            
-            # Configurar documento
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
-            )
-            
-            # Container de elementos
-            story = []
-            
-            # Estilos
-            styles = self._get_pdf_styles()
-            
-            # Adicionar logo e cabeçalho
-            story.extend(self._create_pdf_header(styles, data))
-            
-            # Adicionar sumário executivo
-            if "executive_summary" in data:
-                story.extend(self._create_executive_summary(styles, data["executive_summary"]))
-            
-            # Adicionar análise de vendas
-            if "sales_analysis" in data:
-                story.extend(self._create_sales_section(styles, data["sales_analysis"]))
-            
-            # Adicionar análise climática
-            if "weather_analysis" in data:
-                story.extend(self._create_weather_section(styles, data["weather_analysis"]))
-            
-            # Adicionar previsões
-            if "predictions" in data:
-                story.extend(self._create_predictions_section(styles, data["predictions"]))
-            
-            # Adicionar gráficos
-            if "charts" in data:
-                story.extend(self._create_charts_section(data["charts"]))
-            
-            # Adicionar conclusões e recomendações
-            if "recommendations" in data:
-                story.extend(self._create_recommendations_section(styles, data["recommendations"]))
-            
-            # Construir PDF
-            doc.build(story, onFirstPage=self._add_page_number, onLaterPages=self._add_page_number)
-            
-            # Retornar bytes
-            buffer.seek(0)
-            return buffer.read()
-            
-        except Exception as e:
-            logger.error(f"Error generating PDF: {str(e)}")
-            raise ExportError(f"Failed to generate PDF: {str(e)}")
+        return await _run_in_export_pool(_render_report, "pdf", data)
     
     async def generate_excel(
         self,
@@ -215,144 +1235,20 @@ class ExportService:
         """
         Gera relatório em Excel com múltiplas abas
         """
-        try:
-            buffer = BytesIO()
-            
-            # Criar workbook
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                workbook = writer.book
-                
-                # Formatos customizados
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'fg_color': '#4472C4',
-                    'font_color': 'white',
-                    'border': 1
-                })
-                
-                currency_format = workbook.add_format({'num_format': 'R$ #,##0.00'})
-                percent_format = workbook.add_format({'num_format': '0.00%'})
-                date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-                
-                # Aba: Resumo Executivo
-                if "executive_summary" in data:
-                    df_summary = pd.DataFrame([data["executive_summary"]])
-                    df_summary.to_excel(writer, sheet_name='Resumo', index=False)
-                    
-                    worksheet = writer.sheets['Resumo']
-                    worksheet.set_column('A:Z', 15)
-                
-                # Aba: Dados de Vendas
-                if "sales_data" in data:
-                    df_sales = pd.DataFrame(data["sales_data"])
-                    df_sales.to_excel(writer, sheet_name='Vendas', index=False)
-                    
-                    worksheet = writer.sheets['Vendas']
-                    
-                    # Aplicar formatos
-                    for col_num, col_name in enumerate(df_sales.columns):
-                        worksheet.write(0, col_num, col_name, header_format)
-                        
-                        if 'revenue' in col_name.lower() or 'valor' in col_name.lower():
-                            worksheet.set_column(col_num, col_num, 15, currency_format)
-                        elif 'date' in col_name.lower() or 'data' in col_name.lower():
-                            worksheet.set_column(col_num, col_num, 12, date_format)
-                
-                # Aba: Dados Climáticos
-                if "weather_data" in data:
-                    df_weather = pd.DataFrame(data["weather_data"])
-                    df_weather.to_excel(writer, sheet_name='Clima', index=False)
-                    
-                    worksheet = writer.sheets['Clima']
-                    for col_num, col_name in enumerate(df_weather.columns):
-                        worksheet.write(0, col_num, col_name, header_format)
-                
-                # Aba: Correlações
-                if "correlations" in data:
-                    df_corr = pd.DataFrame(data["correlations"])
-                    df_corr.to_excel(writer, sheet_name='Correlações', index=True)
-                    
-                    worksheet = writer.sheets['Correlações']
-                    
-                    # Aplicar formatação condicional para heatmap
-                    worksheet.conditional_format('B2:Z100', {
-                        'type': '3_color_scale',
-                        'min_color': '#FF0000',
-                        'mid_color': '#FFFF00',
-                        'max_color': '#00FF00'
-                    })
-                
-                # Aba: Previsões
-                if "predictions" in data:
-                    df_pred = pd.DataFrame(data["predictions"])
-                    df_pred.to_excel(writer, sheet_name='Previsões', index=False)
-                    
-                    worksheet = writer.sheets['Previsões']
-                    for col_num, col_name in enumerate(df_pred.columns):
-                        worksheet.write(0, col_num, col_name, header_format)
-                
-                # Adicionar gráficos se solicitado
-                if include_charts and "charts_data" in data:
-                    self._add_excel_charts(workbook, writer, data["charts_data"])
-                
-                # Aba: Metadados
-                metadata = {
-                    'Gerado em': datetime.utcnow().strftime('%Y-%m-%d %H:%M'),
-                    'Empresa': await self._get_company_name(),
-                    'Período': f"{data.get('start_date', 'N/A')} até {data.get('end_date', 'N/A')}",
-                    'Versão': '1.0'
-                }
-                df_meta = pd.DataFrame([metadata])
-                df_meta.to_excel(writer, sheet_name='Info', index=False)
-            
-            buffer.seek(0)
-            return buffer.read()
-            
-        except Exception as e:
-            logger.error(f"Error generating Excel: {str(e)}")
-            raise ExportError(f"Failed to generate Excel: {str(e)}")
+        if "company_name" not in data:
+            data = {**data, "company_name": await self._get_company_name()}
+        
+        return await _run_in_export_pool(_render_report, "excel", data, include_charts)
     
     async def generate_csv(
         self,
         data: Dict[str, Any],
         dataset: str = "all"
-    ) -> bytes:
-        """
-        Gera exportação em CSV
-        """
-        try:
-            buffer = BytesIO()
-            
-            # Selecionar dataset
-            if dataset == "sales" and "sales_data" in data:
-                df = pd.DataFrame(data["sales_data"])
-            elif dataset == "weather" and "weather_data" in data:
-                df = pd.DataFrame(data["weather_data"])
-            elif dataset == "combined":
-                # Combinar vendas e clima
-                df_sales = pd.DataFrame(data.get("sales_data", []))
-                df_weather = pd.DataFrame(data.get("weather_data", []))
-                
-                if not df_sales.empty and not df_weather.empty:
-                    df = pd.merge(df_sales, df_weather, on='date', how='inner')
-                else:
-                    df = df_sales if not df_sales.empty else df_weather
-            else:
-                # Todos os dados em formato flat
-                df = self._flatten_data_for_csv(data)
-            
-            # Exportar para CSV
-            csv_string = df.to_csv(index=False, encoding='utf-8')
-            buffer.write(csv_string.encode('utf-8'))
-            
-            buffer.seek(0)
-            return buffer.read()
-            
-        except Exception as e:
-            logger.error(f"Error generating CSV: {str(e)}")
-            raise ExportError(f"Failed to generate CSV: {str(e)}")
+    ) -> bytes:
+        """
+        Gera exportação em CSV
+        """
+        return await _run_in_export_pool(_render_report, "csv", data, True, dataset)
     
     async def schedule_report(
         self,
@@ -371,9 +1267,9 @@ class ExportService:
                 name=report_config.get("name", f"Scheduled Report {schedule}"),
                 report_type=report_config["report_type"],
                 format=report_config.get("format", "pdf"),
-                parameters=json.dumps(report_config),
+                parameters=_dumps(report_config),
                 schedule=schedule,
-                recipients=json.dumps(recipients),
+                recipients=_dumps(recipients),
                 is_active=True,
                 next_run=start_time or self._calculate_next_run(schedule),
                 created_at=datetime.utcnow()
@@ -414,46 +1310,89 @@ class ExportService:
                 )
             ).all()
             
+            end_date = datetime.utcnow()
+            scheduled = []
+            
+            # Jobs de todos os templates criados de uma vez (um único INSERT)
             for template in templates:
                 try:
-                    # Gerar relatório
-                    params = json.loads(template.parameters)
+                    params = orjson.loads(template.parameters)
                     
                     # Calcular período baseado no schedule
-                    end_date = datetime.utcnow()
-                    if template.schedule == "daily":
-                        start_date = end_date - timedelta(days=1)
-                    elif template.schedule == "weekly":
+                    if template.schedule == "weekly":
                         start_date = end_date - timedelta(days=7)
                     elif template.schedule == "monthly":
                         start_date = end_date - timedelta(days=30)
                     else:
                         start_date = end_date - timedelta(days=1)
                     
-                    # Gerar relatório
-                    result = await self.generate_report(
-                        report_type=ReportType(template.report_type),
-                        format=ExportFormat(template.format),
-                        start_date=start_date,
-                        end_date=end_date,
-                        filters=params.get("filters"),
-                        async_generation=False
+                    job = self._new_export_job(
+                        ReportType(template.report_type),
+                        ExportFormat(template.format),
+                        start_date,
+                        end_date,
+                        params.get("filters"),
+                        include_charts=True
                     )
+                    scheduled.append((template, job, start_date, params.get("filters")))
                     
-                    # Enviar para recipients
-                    recipients = json.loads(template.recipients)
-                    await self._send_report_to_recipients(result, recipients, template.name)
+                except Exception as e:
+                    logger.error(f"Error processing scheduled report {template.id}: {str(e)}")
+                    failed += 1
+            
+            # Jobs inseridos em lote e visíveis a outras sessões antes da renderização
+            self.db.add_all([job for _, job, _, _ in scheduled])
+            self.db.commit()
+            
+            for template, job, start_date, filters in scheduled:
+                try:
+                    # Gerar relatório direto do job já criado
+                    result = await self._generate_report_content(
+                        job,
+                        ReportType(job.report_type),
+                        ExportFormat(job.format),
+                        start_date,
+                        end_date,
+                        filters,
+                        None,
+                        True
+                    )
+                    self._complete_job(job, result)
                     
-                    # Atualizar próxima execução
+                    # Próxima execução gravada antes do envio: uma falha posterior
+                    # não faz o relatório ser reenviado na próxima rodada
                     template.next_run = self._calculate_next_run(template.schedule)
                     template.last_run = datetime.utcnow()
-                    processed += 1
+                    self.db.commit()
                     
                 except Exception as e:
                     logger.error(f"Error processing scheduled report {template.id}: {str(e)}")
+                    self.db.rollback()
+                    job.status = "failed"
+                    job.error_message = str(e)
+                    self.db.commit()
+                    failed += 1
+                    continue
+                
+                try:
+                    # Enviar para recipients
+                    recipients = orjson.loads(template.recipients)
+                    await self._send_report_to_recipients(
+                        ExportResponse(
+                            job_id=job.id,
+                            status="completed",
+                            file_path=result["file_path"],
+                            file_url=result["file_url"],
+                            file_size=result["file_size"]
+                        ),
+                        recipients,
+                        template.name
+                    )
+                    processed += 1
+                    
+                except Exception as e:
+                    logger.error(f"Error sending scheduled report {template.id}: {str(e)}")
                     failed += 1
-            
-            self.db.commit()
             
             return {
                 "processed": processed,
@@ -468,10 +1407,14 @@ class ExportService:
     async def get_export_history(
         self,
         limit: int = 50,
-        include_failed: bool = False
+        include_failed: bool = False,
+        include_parameters: bool = False
     ) -> List[Dict]:
         """
         Obtém histórico de exportações
+        
+        Os parâmetros de cada job só são carregados e decodificados com
+        include_parameters; a listagem comum (polling) não precisa deles.
         """
         try:
             query = self.db.query(ExportJob).filter(
@@ -481,12 +1424,16 @@ class ExportService:
             if not include_failed:
                 query = query.filter(ExportJob.status != "failed")
             
+            if not include_parameters:
+                query = query.options(defer(ExportJob.parameters))
+            
             jobs = query.order_by(
                 ExportJob.created_at.desc()
             ).limit(limit).all()
             
-            return [
-                {
+            history = []
+            for job in jobs:
+                item = {
                     "id": job.id,
                     "report_type": job.report_type,
                     "format": job.format,
@@ -494,11 +1441,13 @@ class ExportService:
                     "file_path": job.file_path,
                     "file_size": job.file_size,
                     "created_at": job.created_at.isoformat(),
-                    "completed_at": job.completed_at.isoformat() if job.completed_at else None,
-                    "parameters": json.loads(job.parameters) if job.parameters else None
+                    "completed_at": job.completed_at.isoformat() if job.completed_at else None
                 }
-                for job in jobs
-            ]
+                if include_parameters:
+                    item["parameters"] = _job_parameters(job.parameters)
+                history.append(item)
+            
+            return history
             
         except Exception as e:
             logger.error(f"Error getting export history: {str(e)}")
@@ -509,7 +1458,7 @@ class ExportService:
     async def _process_report_async(self, job: ExportJob):
         """Processa geração de relatório em background"""
         try:
-            params = json.loads(job.parameters)
+            params = orjson.loads(job.parameters)
             
             result = await self._generate_report_content(
                 job,
@@ -522,10 +1471,7 @@ class ExportService:
                 params.get("include_charts", True)
             )
             
-            job.status = "completed"
-            job.file_path = result["file_path"]
-            job.file_size = result["file_size"]
-            job.completed_at = datetime.utcnow()
+            self._complete_job(job, result)
             
         except Exception as e:
             logger.error(f"Error in async report generation: {str(e)}")
@@ -566,26 +1512,13 @@ class ExportService:
             data["charts"] = await self._generate_charts(data)
             data["charts_data"] = await self._prepare_charts_data(data)
         
-        # Gerar arquivo no formato especificado
-        if format == ExportFormat.PDF:
-            content = await self.generate_pdf(data)
-            extension = "pdf"
-            mime_type = "application/pdf"
-        elif format == ExportFormat.EXCEL:
-            content = await self.generate_excel(data, include_charts)
-            extension = "xlsx"
-            mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        elif format == ExportFormat.CSV:
-            content = await self.generate_csv(data)
-            extension = "csv"
-            mime_type = "text/csv"
-        elif format == ExportFormat.JSON:
-            content = json.dumps(data, indent=2, default=str).encode('utf-8')
-            extension = "json"
-            mime_type = "application/json"
-        else:
+        # Gerar arquivo no formato especificado (renderização em outro processo)
+        if format.value not in _FORMAT_FILE_TYPES:
             raise ValidationError(f"Unsupported format: {format}")
         
+        extension, mime_type = _FORMAT_FILE_TYPES[format.value]
+        content = await _run_in_export_pool(_render_report, format.value, data, include_charts)
+        
         # Salvar arquivo
         filename = f"{report_type.value}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
         file_path = self.export_path / filename
@@ -619,22 +1552,25 @@ class ExportService:
         data["company_name"] = company_name
         
         if report_type == ReportType.EXECUTIVE_SUMMARY:
-            # Resumo executivo com todos os principais indicadores
-            
-            # KPIs de vendas
-            sales_metrics = await self.sales_service.get_sales_metrics(
-                start_date, end_date
-            )
-            
-            # Análise de impacto climático
-            weather_impact = await self.sales_service.analyze_weather_impact(
-                start_date, end_date
-            )
-            
-            # Previsões
-            predictions = await self.ml_service.predict_sales(
-                datetime.utcnow(),
-                datetime.utcnow() + timedelta(days=7)
+            # Resumo executivo com todos os principais indicadores;
+            # consultas independentes rodam em paralelo
+            now = datetime.utcnow()
+            (
+                sales_metrics,
+                weather_impact,
+                predictions,
+                sales_rows,
+                weather_rows
+            ) = await asyncio.gather(
+                # KPIs de vendas
+                self.sales_service.get_sales_metrics(start_date, end_date),
+                # Análise de impacto climático
+                self.sales_service.analyze_weather_impact(start_date, end_date),
+                # Previsões
+                self.ml_service.predict_sales(now, now + timedelta(days=7)),
+                # Dados detalhados
+                self._get_sales_data(start_date, end_date),
+                self._get_weather_data(start_date, end_date)
             )
             
             data["executive_summary"] = {
@@ -647,29 +1583,28 @@ class ExportService:
                 "recommendations": weather_impact["recommendations"]
             }
             
-            # Dados detalhados
-            data["sales_data"] = await self._get_sales_data(start_date, end_date)
-            data["weather_data"] = await self._get_weather_data(start_date, end_date)
+            data["sales_data"] = sales_rows
+            data["weather_data"] = weather_rows
             data["correlations"] = weather_impact["correlations"]
             data["predictions"] = predictions.predictions
             
         elif report_type == ReportType.SALES_ANALYSIS:
             # Análise detalhada de vendas
             
-            sales_metrics = await self.sales_service.get_sales_metrics(
-                start_date, end_date
+            sales_metrics, patterns, anomalies, sales_rows = await asyncio.gather(
+                self.sales_service.get_sales_metrics(start_date, end_date),
+                self.sales_service.calculate_patterns(),
+                self.sales_service.detect_anomalies(),
+                self._get_sales_data(start_date, end_date)
             )
             
-            patterns = await self.sales_service.calculate_patterns()
-            anomalies = await self.sales_service.detect_anomalies()
-            
             data["sales_analysis"] = {
                 "metrics": sales_metrics.dict(),
                 "patterns": patterns,
                 "anomalies": anomalies
             }
             
-            data["sales_data"] = await self._get_sales_data(start_date, end_date)
+            data["sales_data"] = sales_rows
             
         elif report_type == ReportType.WEATHER_IMPACT:
             # Análise de impacto climático
@@ -705,282 +1640,34 @@ class ExportService:
             
         return data
     
-    def _get_pdf_styles(self) -> Dict:
-        """Retorna estilos para PDF"""
-        styles = getSampleStyleSheet()
-        
-        # Customizar estilos
-        styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2E4057'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
+    async def _generate_charts(self, data: Dict) -> List[bytes]:
+        """Gera os gráficos do relatório em paralelo, como PNG em memória"""
+        specs = []
         
-        styles.add(ParagraphStyle(
-            name='SectionTitle',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#4472C4'),
-            spaceAfter=12,
-            spaceBefore=12
-        ))
+        # Gráfico 1: Vendas ao longo do tempo
+        if "sales_data" in data:
+            specs.append((_render_sales_chart, data["sales_data"]))
         
-        return styles
-    
-    def _create_pdf_header(self, styles: Dict, data: Dict) -> List:
-        """Cria cabeçalho do PDF"""
-        elements = []
+        # Gráfico 2: Correlação clima vs vendas
+        if "correlations" in data:
+            specs.append((_render_correlation_chart, data["correlations"]))
         
-        # Título
-        title = Paragraph(
-            f"<b>{data.get('company_name', 'Empresa')}</b><br/>Relatório de Análise Climática e Vendas",
-            styles['CustomTitle']
-        )
-        elements.append(title)
+        # Gráfico 3: Previsões (2 semanas)
+        if "predictions" in data:
+            specs.append((_render_prediction_chart, data["predictions"][:14]))
         
-        # Período
-        period = Paragraph(
-            f"Período: {data.get('start_date', 'N/A')} até {data.get('end_date', 'N/A')}",
-            styles['Normal']
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(_chart_pool, render, chart_data) for render, chart_data in specs),
+            return_exceptions=True
         )
-        elements.append(period)
-        
-        elements.append(Spacer(1, 20))
-        
-        return elements
-    
-    def _create_executive_summary(self, styles: Dict, summary: Dict) -> List:
-        """Cria seção de sumário executivo"""
-        elements = []
-        
-        elements.append(Paragraph("Sumário Executivo", styles['SectionTitle']))
-        
-        # Tabela de KPIs
-        kpi_data = [
-            ['Indicador', 'Valor'],
-            ['Receita Total', f"R$ {summary.get('total_revenue', 0):,.2f}"],
-            ['Média Diária', f"R$ {summary.get('average_daily_revenue', 0):,.2f}"],
-            ['Taxa de Crescimento', f"{summary.get('growth_rate', 0):.1f}%"],
-            ['Previsão Próxima Semana', f"R$ {summary.get('next_week_forecast', 0):,.2f}"]
-        ]
-        
-        kpi_table = Table(kpi_data, colWidths=[3*inch, 2*inch])
-        kpi_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(kpi_table)
-        elements.append(Spacer(1, 20))
-        
-        return elements
-    
-    def _create_sales_section(self, styles: Dict, sales_data: Dict) -> List:
-        """Cria seção de análise de vendas"""
-        elements = []
-        
-        elements.append(Paragraph("Análise de Vendas", styles['SectionTitle']))
-        
-        # Adicionar texto descritivo
-        if "patterns" in sales_data:
-            patterns_text = "Padrões identificados:<br/>"
-            for pattern_type, pattern_data in sales_data["patterns"].items():
-                patterns_text += f"- {pattern_type}: {pattern_data}<br/>"
-            
-            elements.append(Paragraph(patterns_text, styles['Normal']))
-        
-        elements.append(Spacer(1, 20))
-        
-        return elements
-    
-    def _create_weather_section(self, styles: Dict, weather_data: Dict) -> List:
-        """Cria seção de análise climática"""
-        elements = []
-        
-        elements.append(Paragraph("Análise de Impacto Climático", styles['SectionTitle']))
-        
-        # Correlações
-        if "correlations" in weather_data:
-            corr_data = [['Variável Climática', 'Correlação', 'Impacto']]
-            
-            for var, corr_info in weather_data["correlations"].items():
-                corr_data.append([
-                    var.replace('_', ' ').title(),
-                    f"{corr_info.get('correlation', 0):.3f}",
-                    corr_info.get('strength', 'N/A')
-                ])
-            
-            corr_table = Table(corr_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
-            corr_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(corr_table)
-        
-        elements.append(Spacer(1, 20))
-        
-        return elements
-    
-    def _create_predictions_section(self, styles: Dict, predictions: List[Dict]) -> List:
-        """Cria seção de previsões"""
-        elements = []
-        
-        elements.append(Paragraph("Previsões", styles['SectionTitle']))
-        
-        # Tabela de previsões
-        pred_data = [['Data', 'Previsão', 'Intervalo de Confiança']]
-        
-        for pred in predictions[:7]:  # Primeiros 7 dias
-            pred_data.append([
-                pred["date"][:10],
-                f"R$ {pred['predicted_sales']:,.2f}",
-                f"R$ {pred['confidence_interval']['lower']:,.0f} - {pred['confidence_interval']['upper']:,.0f}"
-            ])
-        
-        pred_table = Table(pred_data, colWidths=[1.5*inch, 1.5*inch, 2*inch])
-        pred_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(pred_table)
-        elements.append(Spacer(1, 20))
-        
-        return elements
-    
-    def _create_charts_section(self, charts: List[Any]) -> List:
-        """Cria seção de gráficos"""
-        elements = []
-        
-        for chart_path in charts:
-            if os.path.exists(chart_path):
-                img = Image(chart_path, width=6*inch, height=4*inch)
-                elements.append(KeepTogether([img, Spacer(1, 12)]))
         
-        return elements
-    
-    def _create_recommendations_section(self, styles: Dict, recommendations: List[str]) -> List:
-        """Cria seção de recomendações"""
-        elements = []
-        
-        elements.append(Paragraph("Recomendações", styles['SectionTitle']))
-        
-        for i, rec in enumerate(recommendations, 1):
-            elements.append(Paragraph(f"{i}. {rec}", styles['Normal']))
-        
-        return elements
-    
-    def _add_page_number(self, canvas, doc):
-        """Adiciona número de página"""
-        canvas.saveState()
-        canvas.setFont('Helvetica', 9)
-        page_num = canvas.getPageNumber()
-        text = f"Página {page_num}"
-        canvas.drawRightString(200*mm, 10*mm, text)
-        canvas.restoreState()
-    
-    async def _generate_charts(self, data: Dict) -> List[str]:
-        """Gera gráficos para o relatório"""
         charts = []
-        
-        try:
-            # Configurar estilo
-            plt.style.use('seaborn-v0_8-darkgrid')
-            
-            # Gráfico 1: Vendas ao longo do tempo
-            if "sales_data" in data:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                
-                df_sales = pd.DataFrame(data["sales_data"])
-                if not df_sales.empty and 'date' in df_sales.columns and 'revenue' in df_sales.columns:
-                    df_sales['date'] = pd.to_datetime(df_sales['date'])
-                    df_sales.plot(x='date', y='revenue', ax=ax, kind='line', marker='o')
-                    
-                    ax.set_title('Evolução das Vendas', fontsize=16)
-                    ax.set_xlabel('Data')
-                    ax.set_ylabel('Receita (R$)')
-                    ax.grid(True, alpha=0.3)
-                    
-                    chart_path = self.export_path / f"sales_chart_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.png"
-                    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-                    charts.append(str(chart_path))
-                    plt.close()
-            
-            # Gráfico 2: Correlação clima vs vendas
-            if "correlations" in data:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                
-                corr_data = data["correlations"]
-                if corr_data:
-                    variables = list(corr_data.keys())
-                    correlations = [corr_data[v].get('correlation', 0) for v in variables]
-                    
-                    bars = ax.bar(variables, correlations)
-                    
-                    # Colorir barras baseado no valor
-                    for bar, corr in zip(bars, correlations):
-                        if corr > 0:
-                            bar.set_color('green')
-                        else:
-                            bar.set_color('red')
-                    
-                    ax.set_title('Correlação entre Variáveis Climáticas e Vendas', fontsize=16)
-                    ax.set_xlabel('Variável Climática')
-                    ax.set_ylabel('Correlação')
-                    ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-                    ax.grid(True, alpha=0.3)
-                    
-                    chart_path = self.export_path / f"correlation_chart_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.png"
-                    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-                    charts.append(str(chart_path))
-                    plt.close()
-            
-            # Gráfico 3: Previsões
-            if "predictions" in data:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                
-                pred_data = data["predictions"][:14]  # 2 semanas
-                if pred_data:
-                    dates = [p['date'][:10] for p in pred_data]
-                    values = [p['predicted_sales'] for p in pred_data]
-                    lower = [p['confidence_interval']['lower'] for p in pred_data]
-                    upper = [p['confidence_interval']['upper'] for p in pred_data]
-                    
-                    ax.plot(dates, values, 'b-', label='Previsão', linewidth=2)
-                    ax.fill_between(range(len(dates)), lower, upper, alpha=0.3, label='Intervalo de Confiança')
-                    
-                    ax.set_title('Previsão de Vendas - Próximas 2 Semanas', fontsize=16)
-                    ax.set_xlabel('Data')
-                    ax.set_ylabel('Vendas Previstas (R$)')
-                    ax.legend()
-                    ax.grid(True, alpha=0.3)
-                    
-                    # Rotacionar labels do eixo X
-                    plt.xticks(rotation=45)
-                    
-                    chart_path = self.export_path / f"prediction_chart_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.png"
-                    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-                    charts.append(str(chart_path))
-                    plt.close()
-            
-        except Exception as e:
-            logger.error(f"Error generating charts: {str(e)}")
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error generating charts: {str(result)}")
+            elif result:
+                charts.append(result)
         
         return charts
     
@@ -1015,52 +1702,6 @@ class ExportService:
         
         return charts_data
     
-    def _add_excel_charts(self, workbook, writer, charts_data: Dict):
-        """Adiciona gráficos ao Excel"""
-        
-        for chart_name, chart_config in charts_data.items():
-            # Criar worksheet para gráfico
-            worksheet = workbook.add_worksheet(f'Gráfico_{chart_name[:20]}')
-            
-            if chart_config["type"] == "line":
-                chart = workbook.add_chart({'type': 'line'})
-            elif chart_config["type"] == "bar":
-                chart = workbook.add_chart({'type': 'column'})
-            else:
-                continue
-            
-            # Configurar gráfico
-            chart.set_title({'name': chart_config["title"]})
-            chart.set_size({'width': 720, 'height': 480})
-            
-            # Adicionar ao worksheet
-            worksheet.insert_chart('B2', chart)
-    
-    def _flatten_data_for_csv(self, data: Dict) -> pd.DataFrame:
-        """Achata dados nested para CSV"""
-        
-        flat_data = []
-        
-        # Extrair dados de vendas
-        if "sales_data" in data:
-            for record in data["sales_data"]:
-                flat_record = {"type": "sales"}
-                flat_record.update(record)
-                flat_data.append(flat_record)
-        
-        # Extrair dados climáticos
-        if "weather_data" in data:
-            for record in data["weather_data"]:
-                flat_record = {"type": "weather"}
-                flat_record.update(record)
-                flat_data.append(flat_record)
-        
-        if not flat_data:
-            # Retornar DataFrame vazio se não houver dados
-            return pd.DataFrame()
-        
-        return pd.DataFrame(flat_data)
-    
     def _estimate_generation_time(self, report_type: ReportType) -> int:
         """Estima tempo de geração em segundos"""
         estimates = {
@@ -1137,12 +1778,15 @@ class ExportService:
         )
     
     async def _get_company_name(self) -> str:
-        """Obtém nome da empresa"""
-        company = self.db.query(Company).filter(
-            Company.id == self.company_id
-        ).first()
+        """Obtém nome da empresa (consultado uma vez por instância)"""
+        if self._company_name is None:
+            company = self.db.query(Company).filter(
+                Company.id == self.company_id
+            ).first()
+            
+            self._company_name = company.name if company else "Empresa"
         
-        return company.name if company else "Empresa"
+        return self._company_name
     
     async def _get_sales_data(
         self,
@@ -1150,14 +1794,19 @@ class ExportService:
         end_date: datetime
     ) -> List[Dict]:
         """Obtém dados de vendas"""
+        return await asyncio.to_thread(self._query_sales_data, start_date, end_date)
+    
+    def _query_sales_data(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Consulta vendas em sessão própria (roda em thread, em paralelo às demais)"""
         
-        sales = self.db.query(SalesData).filter(
-            and_(
-                SalesData.company_id == self.company_id,
-                SalesData.date >= start_date.date(),
-                SalesData.date <= end_date.date()
-            )
-        ).order_by(SalesData.date).all()
+        with self._session_factory() as db:
+            sales = db.query(SalesData).filter(
+                and_(
+                    SalesData.company_id == self.company_id,
+                    SalesData.date >= start_date.date(),
+                    SalesData.date <= end_date.date()
+                )
+            ).order_by(SalesData.date).all()
         
         return [
             {
@@ -1175,14 +1824,19 @@ class ExportService:
         end_date: datetime
     ) -> List[Dict]:
         """Obtém dados climáticos"""
+        return await asyncio.to_thread(self._query_weather_data, start_date, end_date)
+    
+    def _query_weather_data(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Consulta dados climáticos em sessão própria (roda em thread)"""
         
-        weather = self.db.query(WeatherData).filter(
-            and_(
-                WeatherData.company_id == self.company_id,
-                WeatherData.date >= start_date.date(),
-                WeatherData.date <= end_date.date()
-            )
-        ).order_by(WeatherData.date).all()
+        with self._session_factory() as db:
+            weather = db.query(WeatherData).filter(
+                and_(
+                    WeatherData.company_id == self.company_id,
+                    WeatherData.date >= start_date.date(),
+                    WeatherData.date <= end_date.date()
+                )
+            ).order_by(WeatherData.date).all()
         
         return [
             {
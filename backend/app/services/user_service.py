@@ -8,7 +8,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, update
 from sqlalchemy.orm import selectinload
 
 from app.models.user import User
@@ -18,13 +18,15 @@ from app.models.schemas import (
     UserCreate, UserUpdate, UserResponse,
     PaginationParams, PaginatedResponse
 )
-from app.config.security import get_password_hash, UserRole
+from app.config.security import UserRole
 from app.core.exceptions import (
     NotFoundError, DuplicateError, ValidationError,
     TenantAccessDenied, InsufficientPermissions,
     PlanLimitExceeded
 )
 from app.core.utils import normalize_email, paginate
+from app.services.auth_service import hash_password, revoke_user_access
+from app.services.company_service import invalidate_company_statistics
 
 logger = logging.getLogger(__name__)
 
@@ -238,7 +240,7 @@ class UserService:
             role=user_data.role,
             timezone=user_data.timezone,
             language=user_data.language,
-            hashed_password=get_password_hash(user_data.password),
+            hashed_password=await hash_password(user_data.password),
             is_active=True,
             is_verified=False,
             invited_by_id=created_by_id
@@ -253,10 +255,11 @@ class UserService:
         )
         self.db.add(notification_pref)
         
-        # Atualiza contador da empresa
-        company.current_users_count += 1
+        # Atualiza contadores da empresa
+        await self._adjust_company_counters(company_id, users=1, active=1)
         
         await self.db.commit()
+        await invalidate_company_statistics(company_id)
         await self.db.refresh(user)
         
         logger.info(f"User created: {user.email} for company {company_id}")
@@ -315,12 +318,23 @@ class UserService:
                 user.email = new_email
                 user.is_verified = False  # Precisa reverificar
         
+        # Ativação/desativação segue o mesmo fluxo de activate/deactivate_user
+        is_active = update_data.pop("is_active", None)
+        active_changed = (
+            is_active is not None
+            and await self._set_user_active(user, company_id, is_active)
+        )
+        
         # Atualiza outros campos
         for field, value in update_data.items():
             if field != "email" and hasattr(user, field):
                 setattr(user, field, value)
         
         await self.db.commit()
+        if active_changed:
+            if not is_active:
+                await revoke_user_access(user.id)
+            await invalidate_company_statistics(company_id)
         await self.db.refresh(user)
         
         logger.info(f"User updated: {user.email}")
@@ -381,6 +395,8 @@ class UserService:
                     "Não é possível excluir o único administrador da empresa"
                 )
         
+        was_active = user.is_active
+        
         if soft_delete:
             # Soft delete
             user.deleted_at = datetime.now(timezone.utc)
@@ -390,13 +406,14 @@ class UserService:
             # Hard delete
             await self.db.delete(user)
         
-        # Atualiza contador da empresa
-        company_query = select(Company).where(Company.id == company_id)
-        company_result = await self.db.execute(company_query)
-        company = company_result.scalar_one()
-        company.current_users_count = max(0, company.current_users_count - 1)
+        # Atualiza contadores da empresa
+        await self._adjust_company_counters(
+            company_id, users=-1, active=-1 if was_active else 0
+        )
         
         await self.db.commit()
+        await revoke_user_access(user_id)
+        await invalidate_company_statistics(company_id)
         
         logger.info(f"User deleted: {user.email}")
         
@@ -418,11 +435,12 @@ class UserService:
             UserResponse: Usuário ativado
         """
         user = await self._get_user_for_update(user_id, company_id)
-        user.is_active = True
+        await self._set_user_active(user, company_id, True)
         user.locked_until = None
         user.failed_login_attempts = 0
         
         await self.db.commit()
+        await invalidate_company_statistics(company_id)
         await self.db.refresh(user)
         
         logger.info(f"User activated: {user.email}")
@@ -445,9 +463,11 @@ class UserService:
             UserResponse: Usuário desativado
         """
         user = await self._get_user_for_update(user_id, company_id)
-        user.is_active = False
+        await self._set_user_active(user, company_id, False)
         
         await self.db.commit()
+        await revoke_user_access(user.id)
+        await invalidate_company_statistics(company_id)
         await self.db.refresh(user)
         
         logger.info(f"User deactivated: {user.email}")
@@ -614,4 +634,59 @@ class UserService:
         if user.company_id != company_id:
             raise TenantAccessDenied()
         
-        return user
\ No newline at end of file
+        return user
+    
+    async def _set_user_active(
+        self,
+        user: User,
+        company_id: int,
+        is_active: bool
+    ) -> bool:
+        """
+        Altera is_active ajustando o contador de ativos da empresa (sem commit).
+        
+        Args:
+            user: Usuário
+            company_id: ID da empresa
+            is_active: Novo estado
+            
+        Returns:
+            bool: True se o estado mudou
+        """
+        if user.is_active == is_active:
+            return False
+        
+        await self._adjust_company_counters(company_id, active=1 if is_active else -1)
+        user.is_active = is_active
+        return True
+    
+    async def _adjust_company_counters(
+        self,
+        company_id: int,
+        users: int = 0,
+        active: int = 0
+    ) -> None:
+        """
+        Ajusta contadores de usuários da empresa com UPDATE atômico.
+        
+        Args:
+            company_id: ID da empresa
+            users: Variação de current_users_count
+            active: Variação de active_users_count
+        """
+        values = {}
+        if users:
+            values["current_users_count"] = func.greatest(
+                Company.current_users_count + users, 0
+            )
+        if active:
+            values["active_users_count"] = func.greatest(
+                Company.active_users_count + active, 0
+            )
+        
+        await self.db.execute(
+            update(Company)
+            .where(Company.id == company_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
\ No newline at end of file
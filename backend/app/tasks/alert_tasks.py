@@ -3,6 +3,7 @@
 # ===========================
 
 from celery.utils.log import get_task_logger
+from sqlalchemy import text
 from app.core.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.models.database import Alert, AlertRule, Company
@@ -85,4 +86,29 @@ def check_all_alerts() -> Dict:
         }
         
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@celery_app.task(name="ensure_alert_partitions")
+def ensure_alert_partitions(months_ahead: int = 3) -> Dict:
+    """
+    Cria antecipadamente as partições mensais de alerts e alert_history
+    """
+    logger.info("Ensuring alert table partitions")
+    
+    db = SessionLocal()
+    
+    try:
+        for table in ("alerts", "alert_history"):
+            db.execute(
+                text("SELECT ensure_monthly_partitions(:table, :months_ahead)"),
+                {"table": table, "months_ahead": months_ahead}
+            )
+        db.commit()
+        
+        return {
+            "status": "success",
+            "months_ahead": months_ahead
+        }
+        
+    finally:
+        db.close()
@@ -0,0 +1,81 @@
+# tests/unit/test_alert_service.py
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from app.services import alert_service as alert_module
+from app.services.alert_service import AlertService
+
+
+class _FakeQuery:
+    def __init__(self, result):
+        self.result = result
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.result
+
+
+class _FakeSession:
+    def __init__(self, rule):
+        self.rule = rule
+
+    def query(self, *args):
+        return _FakeQuery(self.rule)
+
+
+# Colunas de teste: cada uma força um caminho diferente da avaliação em lote
+_COLUMNS = {
+    "numeric": [5, 2.5, None, 10, 0, -1.5],
+    "mixed": [5, "5", None, True, 7.5, "abc"],
+    "string": ["abc", "xyz", None, "b", "", "5"],
+    "bool": [True, False, None, True, False, None],
+}
+
+_CONDITIONS = [
+    {"operator": ">", "value": 5},
+    {"operator": "<", "value": 5},
+    {"operator": ">=", "value": 2.5},
+    {"operator": "<=", "value": 0},
+    {"operator": "==", "value": 1},
+    {"operator": "==", "value": "abc"},
+    {"operator": "!=", "value": 5},
+    {"operator": "contains", "value": "b"},
+    {"operator": "between", "value": 0, "value2": 6},
+    {"operator": "in", "value": [5, "abc", True]},
+    {"operator": "not_in", "value": [5, "abc", True]},
+    {"operator": "desconhecido", "value": 1},
+]
+
+
+@pytest.mark.parametrize("column", list(_COLUMNS))
+@pytest.mark.parametrize(
+    "condition", _CONDITIONS, ids=lambda c: f"{c['operator']}-{c['value']}"
+)
+def test_evaluate_rule_on_records_matches_per_record(monkeypatch, column, condition):
+    monkeypatch.setattr(alert_module, "NotificationService", lambda db, company_id: None)
+
+    # Segunda condição sobre outro campo: o resultado é a conjunção das duas
+    conditions = [
+        {"field": column, **condition},
+        {"field": "quantity", "operator": ">=", "value": 0},
+    ]
+    rule = SimpleNamespace(conditions=orjson.dumps(conditions).decode())
+    service = AlertService(_FakeSession(rule), "company-1")
+
+    records = [
+        {column: value, "quantity": i}
+        for i, value in enumerate(_COLUMNS[column])
+    ]
+    records.append({"quantity": 1})  # campo ausente
+
+    batch = asyncio.run(service.evaluate_rule_on_records("rule-1", records))
+
+    compiled = alert_module._parse_conditions(rule.conditions)
+    expected = [service._evaluate_conditions_with_data(compiled, record) for record in records]
+
+    assert batch == expected
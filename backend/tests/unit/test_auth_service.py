@@ -1,5 +1,7 @@
 # tests/unit/test_auth_service.py
 import pytest
+from jose import JWTError
+from app.config.security import _encode_hmac_jwt, decode_token
 from app.services.auth_service import AuthService
 
 @pytest.fixture
@@ -9,3 +11,16 @@ def auth_service():
 def test_verify_password(auth_service):
     assert auth_service.verify_password('senha', 'senha') is True
     assert auth_service.verify_password('senha', 'outra') is False
+
+@pytest.mark.parametrize('token', [
+    'W10.e30.abc',  # cabeçalho "[]"
+    'IiI.e30.abc',  # cabeçalho '""'
+])
+def test_decode_token_rejects_non_object_header(token):
+    with pytest.raises(JWTError):
+        decode_token(token)
+
+def test_decode_token_rejects_non_object_payload():
+    # Assinatura válida, mas o payload é uma lista
+    with pytest.raises(JWTError):
+        decode_token(_encode_hmac_jwt([]))
@@ -0,0 +1,107 @@
+# tests/unit/test_export_service.py
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from io import BytesIO
+
+from app.services.export_service import ReportRenderer, _XF_CURRENCY, _XF_DATE
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _read_xlsx(content: bytes):
+    """Relê o .xlsx gerado: {aba: {referência: (tipo, estilo, valor)}}"""
+    with zipfile.ZipFile(BytesIO(content)) as package:
+        strings = [
+            si.find("m:t", _NS).text or ""
+            for si in ET.fromstring(package.read("xl/sharedStrings.xml")).findall("m:si", _NS)
+        ]
+        workbook = ET.fromstring(package.read("xl/workbook.xml"))
+        names = [sheet.get("name") for sheet in workbook.find("m:sheets", _NS)]
+
+        sheets = {}
+        for i, name in enumerate(names, 1):
+            root = ET.fromstring(package.read(f"xl/worksheets/sheet{i}.xml"))
+            cells = {}
+            for cell in root.iter(f"{{{_NS['m']}}}c"):
+                kind = cell.get("t", "n")
+                raw = cell.find("m:v", _NS).text
+                if kind == "s":
+                    value = strings[int(raw)]
+                elif kind == "b":
+                    value = raw == "1"
+                else:
+                    value = float(raw)
+                cells[cell.get("r")] = (kind, int(cell.get("s", 0)), value)
+            sheets[name] = cells
+
+    return names, sheets
+
+
+def test_render_excel_fast_cell_values_and_types():
+    data = {
+        "executive_summary": {"Receita": 1500.0, "Dias": 2},
+        "sales_data": [
+            {
+                "date": date(2024, 1, 15),
+                "product": "Sorvete <premium> & cia",
+                "revenue": 10.5,
+                "note": "a\x01b",
+                "code": "_x0041_",
+                "promo": True,
+            },
+            {
+                "date": datetime(2024, 1, 16, 12, 0),
+                "product": "Sorvete <premium> & cia",
+                "revenue": float("nan"),
+                "note": None,
+                "code": "x",
+                "promo": False,
+            },
+        ],
+        "correlations": {
+            "temperature": {"temperature": 1.0, "revenue": 0.8},
+            "revenue": {"temperature": 0.8, "revenue": 1.0},
+        },
+        "company_name": "Empresa Teste",
+    }
+
+    names, sheets = _read_xlsx(ReportRenderer()._render_excel_fast(data))
+
+    assert names == ["Resumo", "Vendas", "Correlações", "Info"]
+
+    summary = sheets["Resumo"]
+    assert summary["A1"] == ("s", 1, "Receita")
+    assert summary["A2"] == ("n", 0, 1500.0)
+    assert summary["B2"] == ("n", 0, 2.0)
+
+    sales = sheets["Vendas"]
+    assert [sales[f"{col}1"][2] for col in "ABCDEF"] == [
+        "date", "product", "revenue", "note", "code", "promo"
+    ]
+    # Datas são números de série com estilo de data
+    assert sales["A2"] == ("n", _XF_DATE, 45306.0)
+    assert sales["A3"] == ("n", _XF_DATE, 45307.5)
+    # Texto repetido usa a mesma shared string; XML escapado na ida e volta
+    assert sales["B2"] == sales["B3"] == ("s", 0, "Sorvete <premium> & cia")
+    assert sales["C2"] == ("n", _XF_CURRENCY, 10.5)
+    # Caractere de controle codificado e literal _xHHHH_ escapado
+    assert sales["D2"] == ("s", 0, "a_x0001_b")
+    assert sales["E2"] == ("s", 0, "_x005F_x0041_")
+    assert sales["F2"] == ("b", 0, True)
+    assert sales["F3"] == ("b", 0, False)
+    # NaN e None viram células vazias
+    assert "C3" not in sales
+    assert "D3" not in sales
+
+    correlations = sheets["Correlações"]
+    assert correlations["A1"] == ("s", 1, "")
+    assert correlations["B1"] == ("s", 1, "temperature")
+    assert correlations["A2"] == ("s", 0, "temperature")
+    assert correlations["A3"] == ("s", 0, "revenue")
+    assert correlations["C2"] == ("n", 0, 0.8)
+    assert correlations["C3"] == ("n", 0, 1.0)
+
+    info = sheets["Info"]
+    assert info["B1"] == ("s", 1, "Empresa")
+    assert info["B2"] == ("s", 0, "Empresa Teste")
@@ -20,3 +20,97 @@ def user_service():
 def test_get_user_by_id_not_found(user_service):
     user = user_service.get_user_by_id(9999)
     assert user is None
+
+
+# ==================== ATIVAÇÃO ====================
+
+import asyncio
+from types import SimpleNamespace
+
+from app.config.security import create_access_token
+from app.core.exceptions import InvalidToken
+from app.models.schemas import UserUpdate
+from app.services import auth_service as auth_module
+from app.services import user_service as user_module
+from app.services.auth_service import AuthService
+
+
+class _FakePipeline:
+    def __init__(self, redis_conn):
+        self.redis = redis_conn
+        self.ops = []
+
+    def setbit(self, key, offset, value):
+        self.ops.append(lambda: self.redis.bits.__setitem__((key, offset), value))
+
+    def smembers(self, key):
+        self.ops.append(set)
+
+    async def execute(self):
+        return [op() for op in self.ops]
+
+
+class _FakeRedis:
+    """Só o necessário para o bitmap de ativos e a revogação de tokens"""
+    def __init__(self):
+        self.bits = {}
+
+    async def getbit(self, key, offset):
+        return self.bits.get((key, offset), 0)
+
+    async def setbit(self, key, offset, value):
+        self.bits[(key, offset)] = value
+
+    async def delete(self, *keys):
+        pass
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakeSession:
+    def __init__(self, user):
+        self.user = user
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            # Consulta de usuário ativo do AuthService
+            value = self.user.id if self.user.is_active else None
+        else:
+            value = self.user
+        return SimpleNamespace(scalar_one_or_none=lambda: value)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+def test_update_user_deactivation_rejects_token(monkeypatch):
+    redis_conn = _FakeRedis()
+    monkeypatch.setattr(auth_module, "redis_client", redis_conn)
+    monkeypatch.setattr(user_module, "invalidate_company_statistics", _noop)
+    monkeypatch.setattr(user_module, "UserResponse", SimpleNamespace(model_validate=lambda user: user))
+
+    user = SimpleNamespace(id=7, company_id=1, email="user@example.com", is_active=True)
+    db = _FakeSession(user)
+    auth = AuthService(db, redis_conn)
+    token = create_access_token(user.id, user.company_id, "viewer")
+
+    async def scenario():
+        # Token válido fica em cache e o bit de ativo é marcado
+        assert (await auth.validate_token(token))["sub"] == str(user.id)
+
+        await user_module.UserService(db).update_user(
+            user.id, UserUpdate(is_active=False), user.company_id
+        )
+
+        with pytest.raises(InvalidToken):
+            await auth.validate_token(token)
+
+    asyncio.run(scenario())